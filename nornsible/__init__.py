@@ -1,23 +1,79 @@
 """ansible-like inventory utility for nornir"""
+import importlib
 import logging
 from logging import NullHandler
-
-from nornsible.decorators import nornsible_delegate, nornsible_task
-
-from nornsible.nornsible import InitNornsible
-from nornsible.functions import print_result
-from nornsible.inventory import AnsibleInventory
+import sys
+from typing import Any, List, TYPE_CHECKING
 
 
 __version__ = "2020.01.11"
 __all__ = (
     "AnsibleInventory",
     "InitNornsible",
+    "is_skipped",
     "nornsible_delegate",
     "nornsible_task",
     "print_result",
 )
 
+# public names are resolved on first access so that "import nornsible" does not drag in nornir,
+# colorama, ruamel and friends for scripts that only need a subset of nornsible
+_LAZY_IMPORTS = {
+    "AnsibleInventory": "nornsible.inventory",
+    "InitNornsible": "nornsible.nornsible",
+    "is_skipped": "nornsible.results",
+    "nornsible_delegate": "nornsible.decorators",
+    "nornsible_task": "nornsible.decorators",
+    "print_result": "nornsible.functions",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Lazily import and cache public nornsible names
+
+    Arguments:
+        name: name of attribute to resolve
+
+    Returns:
+        Any: resolved attribute
+
+    Raises:
+        AttributeError: if name is not a public nornsible name
+
+    """
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """
+    List module attributes including lazily imported public names
+
+    Arguments:
+        N/A  # noqa
+
+    Returns:
+        list: sorted list of attribute names
+
+    Raises:
+        N/A  # noqa
+
+    """
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
+
+# module level __getattr__ is only supported from python 3.7 on
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from nornsible.decorators import nornsible_delegate, nornsible_task  # noqa
+    from nornsible.nornsible import InitNornsible  # noqa
+    from nornsible.functions import print_result  # noqa
+    from nornsible.inventory import AnsibleInventory  # noqa
+    from nornsible.results import is_skipped  # noqa
+
 
 # Setup logger
 session_log = logging.getLogger(__name__)
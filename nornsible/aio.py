@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import os
+import threading
+import traceback
+from typing import Any, Coroutine, Dict, List, Optional
+
+from nornir.core import Nornir
+from nornir.core.exceptions import NornirSubTaskError
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Result, Task
+
+from nornsible.scheduler import Slot, host_slots
+
+
+# default maximum number of hosts an async task runs on concurrently; nornir's num_workers caps
+# worker threads, which async tasks do not use, so it only applies when passed to run explicitly
+CONCURRENCY = 1000
+
+LOG = logging.getLogger(__name__)
+
+
+class _EventLoop:
+    def __init__(self) -> None:
+        """
+        Event loop shared by every async nornsible task, run forever on one daemon thread
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        """
+        Get the shared event loop, starting it (again, after a fork) if required
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            loop: running asyncio event loop
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(
+                        target=loop.run_forever, name="nornsible-loop", daemon=True
+                    )
+                    thread.start()
+                    self.loop, self.thread = loop, thread
+                    self.pid = os.getpid()
+        return self.loop  # type: ignore
+
+    def in_loop_thread(self) -> bool:
+        """
+        Determine if the caller is running on the shared event loop
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            bool: True if called from the event loop thread
+
+        Raises:
+            N/A  # noqa
+
+        """
+        return self.pid == os.getpid() and threading.current_thread() is self.thread
+
+
+EVENT_LOOP = _EventLoop()
+
+
+def run_coroutine(coro: Coroutine) -> Any:
+    """
+    Run a coroutine on the shared event loop and wait for its result; the sync bridge used when an
+    async task is called by nornir itself, i.e. as a subtask of a sync task
+
+    Arguments:
+        coro: coroutine to run
+
+    Returns:
+        Any: return value of the coroutine
+
+    Raises:
+        RuntimeError: if called from the event loop itself, which would deadlock; async tasks
+            must await async subtasks via run_subtask rather than calling task.run
+
+    """
+    if EVENT_LOOP.in_loop_thread():
+        coro.close()
+        raise RuntimeError(
+            "async nornsible tasks can not be run synchronously from the event loop; "
+            "use 'await nornsible.aio.run_subtask(task, ...)' instead of 'task.run(...)'"
+        )
+    return asyncio.run_coroutine_threadsafe(coro, EVENT_LOOP.get()).result()
+
+
+async def _start(task: Task, host: Host, nr: Nornir) -> MultiResult:
+    """
+    Run an async task for a host; the async equivalent of nornir.core.task.Task.start
+
+    Arguments:
+        task: nornir.core.task.Task object of the async task
+        host: nornir.core.inventory.Host to run the task for
+        nr: Nornir object
+
+    Returns:
+        multi_result: nornir.core.task.MultiResult of the task and its subtasks
+
+    Raises:
+        N/A  # noqa
+
+    """
+    task.host = host
+    task.nornir = nr
+
+    if task.parent_task is not None:
+        nr.processors.subtask_instance_started(task, host)
+    else:
+        nr.processors.task_instance_started(task, host)
+    try:
+        r = await task.task.nornsible_async(task, **task.params)
+        if not isinstance(r, Result):
+            r = Result(host=host, result=r)
+    except NornirSubTaskError as e:
+        LOG.error("Host %r: task %r failed with traceback:\n%s", host.name, task.name, e)
+        r = Result(host, exception=e, result=str(e), failed=True)
+    except Exception as e:  # pylint: disable=W0703
+        tb = traceback.format_exc()
+        LOG.error("Host %r: task %r failed with traceback:\n%s", host.name, task.name, tb)
+        r = Result(host, exception=e, result=tb, failed=True)
+
+    r.name = task.name
+    r.severity_level = logging.ERROR if r.failed else task.severity_level
+    task.results.insert(0, r)
+
+    if task.parent_task is not None:
+        nr.processors.subtask_instance_completed(task, host, task.results)
+    else:
+        nr.processors.task_instance_completed(task, host, task.results)
+    return task.results
+
+
+async def run_subtask(parent: Task, task: Any, **kwargs: Any) -> MultiResult:
+    """
+    Run an async subtask from an async task; the async equivalent of task.run
+
+    Arguments:
+        parent: nornir.core.task.Task object of the calling (async) task
+        task: async nornsible_task wrapped function to run
+        **kwargs: keyword arguments passed to the subtask
+
+    Returns:
+        multi_result: nornir.core.task.MultiResult of the subtask
+
+    Raises:
+        NornirSubTaskError: if the subtask failed, as with task.run
+
+    """
+    if not hasattr(task, "nornsible_async"):
+        raise TypeError(f"{task!r} is not an async nornsible task")
+    if "severity_level" not in kwargs:
+        kwargs["severity_level"] = parent.severity_level
+    subtask = Task(task, parent_task=parent, **kwargs)
+    r = await _start(subtask, parent.host, parent.nornir)
+    parent.results.append(r[0] if len(r) == 1 else r)
+    if r.failed:
+        raise NornirSubTaskError(task=task, result=r)
+    return r
+
+
+async def _run_hosts(
+    nr: Nornir, task: Task, hosts: List[Host], concurrency: int
+) -> List[MultiResult]:
+    """
+    Run an async task for every host on the event loop, honoring concurrency and throttle limits
+
+    Throttle slot semaphores are always acquired in the same (sorted) order so hosts sharing
+    several slots can not deadlock each other. If the run is traced, the context captured by
+    nornsible run is adopted first so that task spans are children of the run span.
+
+    Arguments:
+        nr: Nornir object
+        task: nornir.core.task.Task object of the async task
+        hosts: list of hosts to run the task against
+        concurrency: maximum number of hosts to run concurrently
+
+    Returns:
+        results: list of nornir.core.task.MultiResult, in the order of hosts
+
+    Raises:
+        N/A  # noqa
+
+    """
+    context = getattr(nr, "nornsible_trace_context", None)
+    if context is not None:
+        # adopt the run span context (see nornsible.runner.run); copied into every host's task
+        for var, value in context.items():
+            var.set(value)
+
+    workers = asyncio.Semaphore(concurrency)
+    limits: Dict[Slot, int] = {}
+    throttle = getattr(nr, "throttle", None) or {}
+    slots = {host.name: sorted(host_slots(host, throttle, limits), key=repr) for host in hosts}
+    semaphores = {slot: asyncio.Semaphore(limit) for slot, limit in limits.items()}
+
+    async def run_host(host: Host) -> MultiResult:
+        acquired = []
+        try:
+            for slot in slots[host.name]:
+                await semaphores[slot].acquire()
+                acquired.append(semaphores[slot])
+            async with workers:
+                return await _start(task.copy(), host, nr)
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
+
+    return await asyncio.gather(*(run_host(host) for host in hosts))
+
+
+def run_async(
+    nr: Nornir, task: Task, hosts: List[Host], num_workers: Optional[int] = None
+) -> AggregatedResult:
+    """
+    Run an async nornsible task against hosts on the shared event loop, without worker threads
+
+    Arguments:
+        nr: Nornir object
+        task: nornir.core.task.Task object of the async task
+        hosts: list of hosts to run the task against
+        num_workers: (optional) maximum number of hosts to run concurrently; CONCURRENCY if not
+            provided
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    agg_result = AggregatedResult(task.name)
+    results = run_coroutine(_run_hosts(nr, task, hosts, num_workers or CONCURRENCY))
+    for host, multi_result in zip(hosts, results):
+        agg_result[host.name] = multi_result
+    return agg_result
@@ -0,0 +1,382 @@
+from abc import ABC, abstractmethod
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
+
+from nornir.core.inventory import Host
+from nornir.core.task import Result
+
+if TYPE_CHECKING:
+    import sqlite3  # noqa
+
+
+DEFAULT_CACHE = ".nornsible_facts.json"
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# cache entry: time stored (seconds since the epoch), and result, diff and changed of the result
+Entry = Tuple[float, Dict[str, Any]]
+
+
+def cache_key(task: str, host: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    """
+    Build the cache key of a task run for a host with arguments
+
+    Arguments:
+        task: name of the task
+        host: name of the host
+        args: positional arguments of the task
+        kwargs: keyword arguments of the task
+
+    Returns:
+        str: cache key
+
+    Raises:
+        N/A  # noqa
+
+    """
+    arguments = json.dumps([args, kwargs], sort_keys=True, default=repr)
+    return f"{task}|{host}|{hashlib.sha1(arguments.encode()).hexdigest()}"
+
+
+def cached_result(host: Host, entry: Entry) -> Result:
+    """
+    Build a Result from a cache entry
+
+    Arguments:
+        host: nornir.core.inventory.Host object
+        entry: cache entry
+
+    Returns:
+        result: nornir Result marked as cached (nornsible_cached)
+
+    Raises:
+        N/A  # noqa
+
+    """
+    stored, payload = entry
+    result = Result(host, result=payload.get("result"), diff=payload.get("diff", ""))
+    result.changed = payload.get("changed", False)
+    result.nornsible_cached = stored
+    return result
+
+
+def _payload(result: Any) -> Optional[str]:
+    """
+    Serialize the cacheable parts of a task's return value
+
+    Arguments:
+        result: return value of a task; a Result or any other value
+
+    Returns:
+        str: json payload, or None if the result failed or can not be serialized
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if isinstance(result, Result):
+        if result.failed:
+            return None
+        payload = {"result": result.result, "diff": result.diff, "changed": result.changed}
+    else:
+        payload = {"result": result}
+    try:
+        return json.dumps(payload)
+    except (TypeError, ValueError):
+        return None
+
+
+class FactCache(ABC):
+    """
+    Base class of fact caches; get/store are called from nornir worker threads
+
+    """
+
+    def get(self, key: str, ttl: float) -> Optional[Entry]:
+        """
+        Get a cache entry if it is younger than ttl seconds
+
+        Arguments:
+            key: cache key
+            ttl: maximum age of the entry in seconds
+
+        Returns:
+            entry: cache entry, or None if missing or expired
+
+        Raises:
+            N/A  # noqa
+
+        """
+        entry = self._get(key)
+        if entry is None or time.time() - entry[0] > ttl:
+            return None
+        return entry
+
+    def store(self, key: str, result: Any) -> None:
+        """
+        Store a task's return value, unless it failed or can not be serialized
+
+        Arguments:
+            key: cache key
+            result: return value of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        payload = _payload(result)
+        if payload is not None:
+            self._store(key, time.time(), payload)
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Entry]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _store(self, key: str, stored: float, payload: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """
+        Persist any pending entries
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+
+
+class JsonFactCache(FactCache):
+    def __init__(self, path: str) -> None:
+        """
+        Fact cache held in memory and persisted to a json file
+
+        The file is read on first use, and new entries are written out on flush (at the end of each
+        nornsible run, and at exit). Flushing merges pending entries into the file as it is on
+        disk and replaces it atomically, so worker processes (see --processes) flushing in turn
+        keep each other's entries.
+
+        Arguments:
+            path: path of the json file
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Optional[Dict[str, Entry]] = None
+        self.pending: Dict[str, Entry] = {}
+        atexit.register(self.flush)
+
+    def _read(self) -> Dict[str, Entry]:
+        try:
+            with open(self.path) as f:
+                return {k: (v[0], v[1]) for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _get(self, key: str) -> Optional[Entry]:
+        with self.lock:
+            if self.entries is None:
+                self.entries = self._read()
+            return self.entries.get(key)
+
+    def _store(self, key: str, stored: float, payload: str) -> None:
+        entry = (stored, json.loads(payload))
+        with self.lock:
+            if self.entries is None:
+                self.entries = self._read()
+            self.entries[key] = self.pending[key] = entry
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries, self.pending = {}, {}
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self.pending:
+                return
+            entries = self._read()
+            entries.update(self.pending)
+            self.pending = {}
+            import tempfile  # pylint: disable=C0415
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".nornsible-cache-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class SqliteFactCache(FactCache):
+    def __init__(self, path: str) -> None:
+        """
+        Fact cache stored in a sqlite database; entries are committed as they are stored
+
+        Arguments:
+            path: path of the sqlite database
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection: Optional["sqlite3.Connection"] = None
+        self.pid: Optional[int] = None
+
+    def _connect(self) -> "sqlite3.Connection":
+        # caller must hold the lock; connections are not shared with forked worker processes
+        if self.connection is None or self.pid != os.getpid():
+            import sqlite3  # pylint: disable=C0415
+
+            self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS facts "
+                "(key TEXT PRIMARY KEY, stored REAL, payload TEXT)"
+            )
+            self.pid = os.getpid()
+        return self.connection
+
+    def _get(self, key: str) -> Optional[Entry]:
+        with self.lock:
+            row = (
+                self._connect()
+                .execute("SELECT stored, payload FROM facts WHERE key = ?", (key,))
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _store(self, key: str, stored: float, payload: str) -> None:
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO facts VALUES (?, ?, ?)", (key, stored, payload)
+                )
+
+    def clear(self) -> None:
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM facts")
+
+
+def open_cache(path: str) -> FactCache:
+    """
+    Open a fact cache; sqlite if path ends in .db, .sqlite or .sqlite3, otherwise json
+
+    Arguments:
+        path: path of the cache file
+
+    Returns:
+        cache: FactCache
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if path.endswith(SQLITE_SUFFIXES):
+        return SqliteFactCache(path)
+    return JsonFactCache(path)
+
+
+_CACHE: Optional[FactCache] = None
+
+
+def get_cache() -> FactCache:
+    """
+    Get the fact cache used by nornsible_task(cache_ttl=...); DEFAULT_CACHE unless set_cache was
+    called (i.e. via --fact-cache)
+
+    Arguments:
+        N/A  # noqa
+
+    Returns:
+        cache: FactCache
+
+    Raises:
+        N/A  # noqa
+
+    """
+    global _CACHE  # pylint: disable=W0603
+    if _CACHE is None:
+        _CACHE = open_cache(DEFAULT_CACHE)
+    return _CACHE
+
+
+def set_cache(cache: Optional[FactCache]) -> None:
+    """
+    Set (or, with None, reset to the default) the fact cache
+
+    Arguments:
+        cache: FactCache
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    global _CACHE  # pylint: disable=W0603
+    _CACHE = cache
+
+
+def flush_cache() -> None:
+    """
+    Persist pending entries of the fact cache, if one is in use
+
+    Arguments:
+        N/A  # noqa
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if _CACHE is not None:
+        _CACHE.flush()
@@ -1,5 +1,73 @@
 import argparse
-from typing import List
+from typing import Dict, List, Tuple
+
+
+def _parse_throttle(raw_throttle: str) -> Dict[str, int]:
+    """
+    Parse throttle argument into dict of host variable name to concurrency limit
+
+    Arguments:
+        raw_throttle: comma separated list of var=limit pairs, i.e. "site=4,ha_pair=1"
+
+    Returns:
+        throttle: dict of host variable name to concurrency limit
+
+    Raises:
+        argparse.ArgumentTypeError: if throttle is not formatted as var=limit pairs
+
+    """
+    throttle = {}
+    for pair in raw_throttle.split(","):
+        var, _, limit = pair.partition("=")
+        if not var or not limit.isdigit() or int(limit) < 1:
+            raise argparse.ArgumentTypeError(f"invalid throttle {pair!r}, expected var=limit")
+        throttle[var] = int(limit)
+    return throttle
+
+
+def _parse_shard(raw_shard: str) -> Tuple[int, int]:
+    """
+    Parse shard argument into shard index and shard count
+
+    Arguments:
+        raw_shard: shard in the form "i/n" where i is the (one based) index of n total shards
+
+    Returns:
+        shard: tuple of shard index and shard count
+
+    Raises:
+        argparse.ArgumentTypeError: if shard is not formatted as i/n with 1 <= i <= n
+
+    """
+    index, _, count = raw_shard.partition("/")
+    if not index.isdigit() or not count.isdigit() or not 1 <= int(index) <= int(count):
+        raise argparse.ArgumentTypeError(f"invalid shard {raw_shard!r}, expected i/n")
+    return int(index), int(count)
+
+
+def _parse_rate(raw_rate: str) -> float:
+    """
+    Parse rate argument into number of task starts per second
+
+    Arguments:
+        raw_rate: rate in the form "N/s" or "N/m" (per second or per minute), or just N per second
+
+    Returns:
+        rate: number of task starts per second
+
+    Raises:
+        argparse.ArgumentTypeError: if rate is not formatted as N/s or N/m with N positive
+
+    """
+    count, _, unit = raw_rate.partition("/")
+    seconds = {"": 1, "s": 1, "m": 60}.get(unit)
+    try:
+        rate = float(count) / seconds if seconds else 0.0
+    except ValueError:
+        rate = 0.0
+    if not rate > 0:
+        raise argparse.ArgumentTypeError(f"invalid rate {raw_rate!r}, expected N/s or N/m")
+    return rate
 
 
 def parse_cli_args(raw_args: List[str]) -> dict:
@@ -27,8 +95,8 @@ def parse_cli_args(raw_args: List[str]) -> dict:
     parser.add_argument(
         "-l",
         "--limit",
-        help="limit to host or comma separated list of hosts",
-        type=str.lower,
+        help="limit to host or comma separated list of hosts; @file to read hosts from file",
+        type=str,
         default="",
     )
     parser.add_argument(
@@ -45,13 +113,180 @@ def parse_cli_args(raw_args: List[str]) -> dict:
     parser.add_argument(
         "-d", "--disable-delegate", help="disable adding delegate host", action="store_true"
     )
+    parser.add_argument(
+        "--throttle",
+        help="limit concurrent hosts per value of host var(s); comma separated var=limit pairs",
+        type=_parse_throttle,
+        default={},
+    )
+    parser.add_argument(
+        "--processes",
+        help="number of processes to split hosts across, each with its own pool of workers",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--shard",
+        help="run only shard i of n of the (limited) inventory, i.e. 2/4",
+        type=_parse_shard,
+        default=None,
+    )
+    parser.add_argument(
+        "--shard-weight",
+        help="balance shards by host var name, or by @file of json host:duration mappings",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--list-hosts", help="list hosts the run would target and exit", action="store_true"
+    )
+    parser.add_argument(
+        "--list-tasks",
+        help="list nornsible tasks and whether they would run or be skipped and exit",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--retry-file",
+        help="write hosts that fail to this file (default <script>.retry)",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--retry", help="limit to hosts that failed in the previous run", action="store_true"
+    )
+    parser.add_argument(
+        "--stream",
+        help="print each host's results as soon as it completes rather than after the run",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--json-output",
+        help="write one json line per host per task to this file (.gz to compress, - for stdout)",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--json-payload", help="include result payloads in --json-output", action="store_true"
+    )
+    parser.add_argument(
+        "--recap", help="print a per host recap of task outcomes at exit", action="store_true"
+    )
+    parser.add_argument(
+        "--retention",
+        help="keep all of each result, only its status, or spill large payloads to disk",
+        choices=["all", "status", "spill"],
+        default="all",
+    )
+    parser.add_argument(
+        "--spill-threshold",
+        help="size in bytes over which payloads are spilled to disk with --retention spill",
+        type=int,
+        default=1048576,
+    )
+    parser.add_argument(
+        "--timings",
+        help="write per task/host timings at exit to this json file (or .prom prometheus file)",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--profile",
+        help="profile the run and write a pstats file (default <script>.pstats) at exit",
+        nargs="?",
+        const=True,
+        default=False,
+    )
+    parser.add_argument(
+        "--prewarm",
+        help="open each host's connections before running any task, dropping failed hosts",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--prewarm-workers",
+        help="number of hosts to connect to concurrently with --prewarm",
+        type=int,
+        default=100,
+    )
+    parser.add_argument(
+        "--prewarm-timeout",
+        help="seconds each host may take to connect with --prewarm",
+        type=float,
+        default=30.0,
+    )
+    parser.add_argument(
+        "--fact-cache",
+        help="fact cache file for cached tasks (default .nornsible_facts.json; .db for sqlite)",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--flush-cache", help="discard all cached facts before running", action="store_true"
+    )
+    parser.add_argument(
+        "--journal",
+        help="append a record to this file as each host completes each task, for --resume",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--resume",
+        help="skip tasks on hosts this journal records as done, and keep appending to it",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--rate",
+        help="maximum rate of task starts across hosts, i.e. 10/s or 100/m",
+        type=_parse_rate,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--burst",
+        help="number of task starts allowed at once, before --rate applies",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--rate-scope",
+        help="apply --rate to the hosts of group:NAME only, or per value of a host var",
+        type=str,
+        default="",
+    )
     args, _ = parser.parse_known_args(raw_args)
     cli_args = {
         "workers": args.workers if args.workers else False,
-        "limit": set(args.limit.split(",")) if args.limit else False,
+        "limit": {h if h.startswith("@") else h.lower() for h in args.limit.split(",")}
+        if args.limit
+        else False,
         "groups": set(args.groups.split(",")) if args.groups else False,
         "run_tags": set(args.tags.split(",")) if args.tags else [],
         "skip_tags": set(args.skip.split(",")) if args.skip else [],
         "disable_delegate": args.disable_delegate,
+        "throttle": args.throttle,
+        "processes": args.processes if args.processes > 1 else False,
+        "shard": args.shard if args.shard else False,
+        "shard_weight": args.shard_weight if args.shard_weight else False,
+        "list_hosts": args.list_hosts,
+        "list_tasks": args.list_tasks,
+        "retry_file": args.retry_file if args.retry_file else False,
+        "retry": args.retry,
+        "stream": args.stream,
+        "json_output": args.json_output if args.json_output else False,
+        "json_payload": args.json_payload,
+        "recap": args.recap,
+        "retention": args.retention if args.retention != "all" else False,
+        "spill_threshold": args.spill_threshold,
+        "timings": args.timings if args.timings else False,
+        "profile": args.profile,
+        "prewarm": args.prewarm,
+        "prewarm_workers": args.prewarm_workers,
+        "prewarm_timeout": args.prewarm_timeout,
+        "fact_cache": args.fact_cache if args.fact_cache else False,
+        "flush_cache": args.flush_cache,
+        "journal": args.journal if args.journal else False,
+        "resume": args.resume if args.resume else False,
+        "rate": args.rate if args.rate else False,
+        "burst": args.burst,
+        "rate_scope": args.rate_scope if args.rate_scope else None,
     }
     return cli_args
@@ -0,0 +1,370 @@
+import argparse
+import copy
+import importlib
+from io import BufferedIOBase
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+from typing import Any, Dict, Iterator, List, Optional
+
+from nornir.core import Nornir
+from nornir.core.state import GlobalState
+
+from nornsible.cache import open_cache, set_cache
+from nornsible.cli import parse_cli_args
+from nornsible.nornsible import InitNornsible
+from nornsible.processors import JsonLinesProcessor
+from nornsible.retention import SPILL
+
+
+# name of the function of a job module that is called with the job's nornsible-ified Nornir object
+ENTRYPOINT = "run"
+
+# cli options a job may not use: they change state of the whole daemon process (the fact cache,
+# profiler or timings in use), act at exit or hold files open for the life of the daemon, fork it,
+# or write to the daemon's stdout rather than to the client
+REJECTED_OPTIONS = (
+    "fact_cache",
+    "list_hosts",
+    "list_tasks",
+    "stream",
+    "recap",
+    "json_output",
+    "journal",
+    "resume",
+    "profile",
+    "timings",
+    "processes",
+)
+
+
+class SocketLinesProcessor(JsonLinesProcessor):
+    def __init__(self, wfile: BufferedIOBase, payload: bool = False) -> None:
+        """
+        Stream one json line per host per task (see JsonLinesProcessor) back to a daemon client
+
+        Lines are written as soon as each host completes; if the client goes away the job carries
+        on and its lines are discarded.
+
+        Arguments:
+            wfile: writable binary file of the client connection
+            payload: include result payloads
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        super().__init__("-", payload=payload)
+        self.wfile = wfile
+        self.closed = False
+
+    def _write(self, line: str) -> None:
+        """
+        Write a line to the client
+
+        Arguments:
+            line: json encoded line
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            if self.closed:
+                return
+            try:
+                self.wfile.write(f"{line}\n".encode())
+                self.wfile.flush()
+            except OSError:
+                self.closed = True
+
+    def send(self, reply: Dict[str, Any]) -> None:
+        """
+        Write a reply (other than a result line) to the client
+
+        Arguments:
+            reply: json serializable reply
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self._write(json.dumps(reply))
+
+
+def job_args(request: Dict[str, Any]) -> List[str]:
+    """
+    Build the nornsible cli arguments of a job request
+
+    Arguments:
+        request: job request; "args" (list of cli arguments) and/or "tags", "skip", "limit" and
+            "groups" (lists of names)
+
+    Returns:
+        args: list of cli arguments
+
+    Raises:
+        N/A  # noqa
+
+    """
+    args = list(request.get("args") or [])
+    for key, flag in (("tags", "-t"), ("skip", "-s"), ("limit", "-l"), ("groups", "-g")):
+        if request.get(key):
+            args.extend([flag, ",".join(request[key])])
+    return args
+
+
+class NornsibleDaemon(socketserver.UnixStreamServer):
+    def __init__(self, nr: Nornir, socket_path: str) -> None:
+        """
+        Serve nornsible jobs over a unix socket from one long running process
+
+        The parsed inventory, imported job modules, and any connections opened by jobs (or by
+        prewarm) are kept between jobs, so a job only pays for running its tasks. Each job gets its
+        own Nornir object, sharing the daemon's hosts but with its own cli arguments, failed hosts
+        and processors. Jobs run one at a time, so connections are never used by two jobs at once.
+
+        A job request is a single json line with "module" (importable module with a run(nr)
+        function, or "entrypoint" to name another one), and optionally "args", "tags", "skip",
+        "limit", "groups" (see job_args) and "payload". The reply is one json line per host per task
+        as results arrive (see JsonLinesProcessor), then a final line with "event" "done" and the
+        job's failed hosts, or "event" "error" and the error.
+
+        Jobs may not use options that would affect the whole daemon rather than just the job (see
+        REJECTED_OPTIONS; the fact cache is the daemon's, see "serve --fact-cache"); such jobs get
+        an "error" reply.
+
+        Arguments:
+            nr: Nornir object (not nornsible-ified) holding the inventory to serve
+            socket_path: path of the unix socket to listen on; an existing socket file is replaced
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.nr = nr
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _JobHandler)
+        os.chmod(socket_path, 0o600)
+
+    def job_nornir(self, args: List[str]) -> Nornir:
+        """
+        Build a nornsible-ified Nornir object for a job, sharing the daemon's hosts
+
+        Arguments:
+            args: nornsible cli arguments of the job
+
+        Returns:
+            nr: Nornir object for the job
+
+        Raises:
+            ValueError: if args use any of REJECTED_OPTIONS
+
+        """
+        cli_args = parse_cli_args(args)
+        rejected = [f"--{o.replace('_', '-')}" for o in REJECTED_OPTIONS if cli_args[o]]
+        if cli_args["retention"] == SPILL:
+            # each spill directory is only removed when the daemon exits
+            rejected.append("--retention spill")
+        if rejected:
+            raise ValueError(f"not supported in daemon jobs: {', '.join(rejected)}")
+        config = copy.copy(self.nr.config)
+        config.core = copy.copy(config.core)
+        nr = Nornir(
+            # a new hosts mapping (of the same hosts) so the job's delegate host stays its own
+            inventory=self.nr.inventory.filter(filter_func=lambda h: True),
+            config=config,
+            data=GlobalState(dry_run=self.nr.data.dry_run),
+        )
+        return InitNornsible(nr, args)
+
+    def run_job(self, request: Dict[str, Any], wfile: BufferedIOBase) -> None:
+        """
+        Run a job request, streaming its results to wfile
+
+        Arguments:
+            request: job request
+            wfile: writable binary file of the client connection
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        processor = SocketLinesProcessor(wfile, payload=bool(request.get("payload")))
+        nr: Optional[Nornir] = None
+        try:
+            module = importlib.import_module(request["module"])
+            if request.get("reload"):
+                module = importlib.reload(module)
+            entrypoint = getattr(module, request.get("entrypoint") or ENTRYPOINT)
+            nr = self.job_nornir(job_args(request))
+            nr.processors.append(processor)
+            entrypoint(nr)
+        except SystemExit:
+            # i.e. --list-hosts, or a job module exiting early
+            pass
+        except Exception as exc:  # pylint: disable=W0703
+            processor.send(
+                {
+                    "event": "error",
+                    "error": f"{type(exc).__name__}: {exc}",
+                    "traceback": traceback.format_exc(),
+                }
+            )
+            return
+        failed_hosts = sorted(nr.data.failed_hosts) if nr is not None else []
+        processor.send({"event": "done", "failed_hosts": failed_hosts})
+
+    def server_close(self) -> None:
+        """
+        Stop listening, remove the socket file and close all connections held by the daemon
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.nr.close_connections()
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    server: NornsibleDaemon
+
+    def handle(self) -> None:
+        """
+        Read a job request from the client and run it
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError as exc:
+            reply = {"event": "error", "error": f"invalid job request: {exc}"}
+            self.wfile.write(f"{json.dumps(reply)}\n".encode())
+            return
+        self.server.run_job(request, self.wfile)
+
+
+def submit(socket_path: str, module: str, **request: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Submit a job to a nornsible daemon and yield its replies as they arrive
+
+    Arguments:
+        socket_path: path of the daemon's unix socket
+        module: importable module with the job's run(nr) function
+        **request: other job request fields; see NornsibleDaemon
+
+    Yields:
+        reply: one dict per json line of the reply; the last one has an "event" key
+
+    Raises:
+        N/A  # noqa
+
+    """
+    request["module"] = module
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(f"{json.dumps(request)}\n".encode())
+        with sock.makefile("rb") as rfile:
+            for line in rfile:
+                yield json.loads(line)
+
+
+def main(raw_args: Optional[List[str]] = None) -> int:
+    """
+    Run or submit a job to a nornsible daemon; "python -m nornsible.daemon serve|submit ..."
+
+    Arguments:
+        raw_args: (optional) cli arguments; sys.argv if not provided
+
+    Returns:
+        int: exit code; 1 if a submitted job errored or had failed hosts
+
+    Raises:
+        N/A  # noqa
+
+    """
+    parser = argparse.ArgumentParser(prog="python -m nornsible.daemon")
+    parser.add_argument("--socket", help="path of the daemon's unix socket", required=True)
+    commands = parser.add_subparsers(dest="command")
+    serve = commands.add_parser("serve", help="run the daemon")
+    serve.add_argument("--config-file", help="nornir config file", default="config.yaml")
+    serve.add_argument("--prewarm", help="open all connections at start", action="store_true")
+    serve.add_argument("--fact-cache", help="fact cache file for cached tasks", default="")
+    job = commands.add_parser("submit", help="submit a job and print its results")
+    job.add_argument("module", help="module with the job's run(nr) function")
+    job.add_argument("--entrypoint", help="function to call in place of run", default=None)
+    job.add_argument("--payload", help="include result payloads", action="store_true")
+    job.add_argument("args", nargs=argparse.REMAINDER, help="nornsible cli arguments for the job")
+    args = parser.parse_args(raw_args)
+
+    if args.command == "serve":
+        from nornir import InitNornir  # pylint: disable=C0415
+
+        nr = InitNornir(config_file=args.config_file)
+        if args.fact_cache:
+            set_cache(open_cache(args.fact_cache))
+        if args.prewarm:
+            from nornsible.prewarm import prewarm  # pylint: disable=C0415
+
+            prewarm(nr)
+        with NornsibleDaemon(nr, args.socket) as daemon:
+            try:
+                daemon.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    if args.command != "submit":
+        parser.error("a command (serve or submit) is required")
+    status = 0
+    replies = submit(
+        args.socket, args.module, entrypoint=args.entrypoint, payload=args.payload, args=args.args
+    )
+    for reply in replies:
+        sys.stdout.write(f"{json.dumps(reply)}\n")
+        if reply.get("event") == "error" or reply.get("failed_hosts"):
+            status = 1
+    sys.stdout.flush()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,67 @@
-import threading
-from typing import Dict, List, Any, Union, Callable, Optional
+from functools import lru_cache, partial
+from inspect import iscoroutinefunction
+import time
+from typing import Dict, FrozenSet, Iterable, List, Any, Union, Callable, Optional, Tuple
 
-from colorama import Back, Fore, init, Style
 from nornir.core.task import Result, Task
 
+from nornsible import profiling, tracing
+from nornsible.cache import cache_key, cached_result, get_cache
+from nornsible.output import OUTPUT
+from nornsible.results import (
+    SKIPPED,
+    SKIPPED_DELEGATE,
+    SKIPPED_NON_DELEGATE,
+    skipped_result,
+)
+from nornsible.retention import KEEP_ALL, RetentionPolicy, get_retention
+from nornsible.tags import inherit_tags
+from nornsible.timings import TIMINGS
 
-init(autoreset=True, strip=False)
-LOCK = threading.Lock()
 
+# names (and tags) of all tasks decorated with nornsible_task, in order of decoration
+NORNSIBLE_TASKS: Dict[str, FrozenSet[str]] = {}
 
-def nornsible_task_message(msg: str, critical: Optional[bool] = False) -> None:
+
+@lru_cache(maxsize=None)
+def _init_colorama() -> None:
     """
-    Handle printing pretty messages for nornsible_task decorator
+    Initialize colorama once, on first use rather than at import time
+
+    Arguments:
+        N/A  # noqa
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from colorama import init  # pylint: disable=C0415
+
+    init(autoreset=True, strip=False)
+
+
+def format_message(msg: str, critical: Optional[bool] = False) -> str:
+    """
+    Format a pretty nornsible message banner
 
     Args:
-        msg: message to beautifully print to stdout
+        msg: message to format
         critical: (optional) message is critical
 
     Returns:
-         N/A
+        str: formatted message
 
     Raises:
         N/A  # noqa
 
     """
+    from colorama import Back, Fore, Style  # pylint: disable=C0415
+
+    _init_colorama()
+
     if critical:
         back = Back.RED
         fore = Fore.WHITE
@@ -31,19 +69,312 @@ def nornsible_task_message(msg: str, critical: Optional[bool] = False) -> None:
         back = Back.CYAN
         fore = Fore.WHITE
 
-    LOCK.acquire()
+    return f"{Style.BRIGHT}{back}{fore}{msg}{'-' * (80 - len(msg))}"
+
+
+def nornsible_task_message(msg: str, critical: Optional[bool] = False) -> None:
+    """
+    Handle printing pretty messages for nornsible_task decorator
+
+    Messages are queued to the nornsible output writer; see nornsible.output.
+
+    Args:
+        msg: message to beautifully print to stdout
+        critical: (optional) message is critical
+
+    Returns:
+         N/A
+
+    Raises:
+        N/A  # noqa
+
+    """
+    OUTPUT.write(format_message(msg, critical))
+
+
+def _parent_tags(task: Task) -> Optional[FrozenSet[str]]:
+    """
+    Find the effective tags of the nearest nornsible_task ancestor of a (sub)task
+
+    Arguments:
+        task: nornir.core.task.Task object
+
+    Returns:
+        tags: effective tags of the nearest nornsible_task parent task, or None
+
+    Raises:
+        N/A  # noqa
+
+    """
+    parent = task.parent_task
+    while parent is not None:
+        tags: Optional[FrozenSet[str]] = getattr(parent, "nornsible_tags", None)
+        if tags is not None:
+            return tags
+        parent = parent.parent_task
+    return None
+
+
+def _run_task(
+    task: Task, wrapped_func: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Any:
+    """
+    Run a wrapped task, in a span of the configured tracer if there is one
+
+    Top level tasks run in (a copy of) the context captured by nornsible run, so their spans are
+    children of the run span even though they run on nornir worker threads.
+
+    Arguments:
+        task: nornir.core.task.Task object
+        wrapped_func: wrapped task function
+        args: positional arguments for the wrapped function
+        kwargs: keyword arguments for the wrapped function
+
+    Returns:
+        result: result of the wrapped function
+
+    Raises:
+        N/A  # noqa
+
+    """
+    tracer = tracing.TRACER
+    if tracer is None:
+        return wrapped_func(task, *args, **kwargs)
+
+    def traced() -> Any:
+        attributes = {"nornsible.task": wrapped_func.__name__, "nornsible.host": task.host.name}
+        with tracer.start_as_current_span(wrapped_func.__name__, attributes=attributes):
+            return wrapped_func(task, *args, **kwargs)
+
+    context = getattr(task.nornir, "nornsible_trace_context", None)
+    if task.parent_task is None and context is not None:
+        return context.copy().run(traced)
+    return traced()
+
+
+def _run_retained(
+    task: Task,
+    wrapped_func: Callable,
+    retention: Optional[RetentionPolicy],
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    cache_ttl: Optional[float] = None,
+) -> Any:
+    """
+    Run (and time) a wrapped task, then apply the result retention policy to its result and
+    subtask results
+
+    The task's own retention policy applies wherever the task runs; the run-wide policy (set by
+    InitNornsible from the cli) applies only to top level tasks, so parent tasks can still read the
+    payloads of their subtasks. With a cache_ttl, a fresh cached result is returned in place of
+    running the task at all, and new results are cached (before retention applies). Top level
+    tasks that do run first wait for their turn under the run's rate limit, if any.
+
+    Arguments:
+        task: nornir.core.task.Task object
+        wrapped_func: wrapped task function
+        retention: retention policy of the task, if any
+        args: positional arguments for the wrapped function
+        kwargs: keyword arguments for the wrapped function
+        cache_ttl: (optional) maximum age in seconds of cached results to use; see nornsible.cache
+
+    Returns:
+        result: result of the wrapped function; converted to a Result if a policy applies
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if cache_ttl is not None:
+        key = cache_key(wrapped_func.__name__, task.host.name, args, kwargs)
+        entry = get_cache().get(key, cache_ttl)
+        if entry is not None:
+            return _retain(task, cached_result(task.host, entry), retention)
+    rate_limit = getattr(task.nornir, "rate_limit", None) if task.parent_task is None else None
+    if rate_limit is not None:
+        rate_limit.acquire(task.host)
+    started = time.perf_counter()
+    try:
+        if profiling.PROFILER is not None and task.parent_task is None:
+            result = profiling.PROFILER.runcall(_run_task, task, wrapped_func, args, kwargs)
+        else:
+            result = _run_task(task, wrapped_func, args, kwargs)
+    finally:
+        TIMINGS.record(wrapped_func.__name__, task.host.name, time.perf_counter() - started)
+    if cache_ttl is not None:
+        get_cache().store(key, result)
+    return _retain(task, result, retention)
+
+
+async def _run_retained_async(
+    task: Task,
+    wrapped_func: Callable,
+    retention: Optional[RetentionPolicy],
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    cache_ttl: Optional[float] = None,
+) -> Any:
+    """
+    Await (and time) a wrapped async task, then apply the result retention policy; see
+    _run_retained
+
+    Async tasks run on the shared event loop thread (see nornsible.aio), which is not covered by
+    --profile.
+
+    Arguments:
+        task: nornir.core.task.Task object
+        wrapped_func: wrapped async task function
+        retention: retention policy of the task, if any
+        args: positional arguments for the wrapped function
+        kwargs: keyword arguments for the wrapped function
+        cache_ttl: (optional) maximum age in seconds of cached results to use
+
+    Returns:
+        result: result of the wrapped function; converted to a Result if a policy applies
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if cache_ttl is not None:
+        key = cache_key(wrapped_func.__name__, task.host.name, args, kwargs)
+        entry = get_cache().get(key, cache_ttl)
+        if entry is not None:
+            return _retain(task, cached_result(task.host, entry), retention)
+    rate_limit = getattr(task.nornir, "rate_limit", None) if task.parent_task is None else None
+    if rate_limit is not None:
+        delay = rate_limit.reserve(task.host)
+        if delay:
+            import asyncio  # pylint: disable=C0415
+
+            await asyncio.sleep(delay)
+    started = time.perf_counter()
     try:
-        print(f"{Style.BRIGHT}{back}{fore}{msg}{'-' * (80 - len(msg))}")
+        if tracing.TRACER is None:
+            result = await wrapped_func(task, *args, **kwargs)
+        else:
+            attributes = {"nornsible.task": wrapped_func.__name__, "nornsible.host": task.host.name}
+            with tracing.TRACER.start_as_current_span(wrapped_func.__name__, attributes=attributes):
+                result = await wrapped_func(task, *args, **kwargs)
     finally:
-        LOCK.release()
+        TIMINGS.record(wrapped_func.__name__, task.host.name, time.perf_counter() - started)
+    if cache_ttl is not None:
+        get_cache().store(key, result)
+    return _retain(task, result, retention)
+
+
+def _retain(task: Task, result: Any, retention: Optional[RetentionPolicy]) -> Any:
+    """
+    Apply the result retention policy to the result of a wrapped task and its subtask results
+
+    Arguments:
+        task: nornir.core.task.Task object
+        result: result of the wrapped function
+        retention: retention policy of the task, if any
+
+    Returns:
+        result: result of the wrapped function; converted to a Result if a policy applies
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if retention is None and task.parent_task is None:
+        retention = getattr(task.nornir, "retention", None)
+    if retention is None or retention.mode == KEEP_ALL:
+        return result
+    if not isinstance(result, Result):
+        result = Result(host=task.host, result=result)
+    retention.retain(result)
+    for subtask_result in task.results:
+        retention.retain(subtask_result)
+    return result
+
+
+def _tag_skip(task: Task, task_tags: FrozenSet[str], name: str) -> Optional[Result]:
+    """
+    Decide if a nornsible_task runs for a host, based on its effective tags
+
+    Arguments:
+        task: nornir.core.task.Task object
+        task_tags: tags of the task itself
+        name: name of the task
+
+    Returns:
+        result: skipped result if the task must not run for the host, otherwise None
+
+    Raises:
+        N/A  # noqa
 
+    """
+    if task.host.name == "delegate":
+        return skipped_result(task.host, SKIPPED_DELEGATE)
+    effective_tags = task_tags
+    if task.parent_task is not None:
+        effective_tags = inherit_tags(task_tags, _parent_tags(task))
+    task.nornsible_tags = effective_tags
+    allowed = task.nornir.tag_filter.decisions.get(effective_tags)
+    if allowed is None:
+        allowed = task.nornir.tag_filter.allows(effective_tags)
+    if allowed:
+        return None
+    # grouped into one "skipping task" banner per task by the output writer
+    OUTPUT.skip(name)
+    return skipped_result(task.host, SKIPPED)
 
-def nornsible_task(wrapped_func: Callable) -> Callable:
+
+def _delegate_skip(task: Task, name: str) -> Optional[Result]:
+    """
+    Decide if a nornsible_delegate task runs for a host, i.e. only for the delegate host
+
+    Arguments:
+        task: nornir.core.task.Task object
+        name: name of the task
+
+    Returns:
+        result: skipped result if the task must not run for the host, otherwise None
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if "delegate" not in task.nornir.inventory.hosts.keys():
+        msg = f"---- WARNING no delegate available for task {name} "
+        nornsible_task_message(msg, critical=True)
+        return skipped_result(task.host, SKIPPED_DELEGATE)
+    if task.host.name != "delegate":
+        return skipped_result(task.host, SKIPPED_NON_DELEGATE)
+    return None
+
+
+def nornsible_task(
+    wrapped_func: Optional[Callable] = None,
+    *,
+    tags: Optional[Iterable[str]] = None,
+    retention: Optional[Union[str, RetentionPolicy]] = None,
+    cache_ttl: Optional[float] = None,
+) -> Callable:
     """
     Decorate an "operation" -- execute or skip the operation based on tags
 
+    May be used bare (@nornsible_task), in which case the only tag is the function name, or with
+    arguments (@nornsible_task(tags=["deploy"])) to add tags. Subtasks inherit the tags of their
+    nornsible_task parent(s).
+
+    "async def" tasks are supported as well: nornsible run runs every host of an async task on one
+    shared event loop rather than on nornir worker threads (see nornsible.aio), and the wrapped
+    function stays a normal (blocking) nornir task for everything else, i.e. plain nornir run or
+    task.run from a sync task.
+
     Args:
         wrapped_func: function to wrap in tag processor
+        tags: (optional) tags for the task in addition to its name; see nornsible.tags for the
+            special "always" and "never" tags
+        retention: (optional) result retention policy, or mode ("all", "status" or "spill"), for
+            the task; see nornsible.retention
+        cache_ttl: (optional) cache each host's (successful, json serializable) result in the fact
+            cache, and use cached results up to this many seconds old rather than running the
+            task; results are cached per task, host and task arguments, see nornsible.cache
 
     Returns:
         tag_wrapper: wrapped function
@@ -52,36 +383,62 @@ def nornsible_task(wrapped_func: Callable) -> Callable:
         N/A  # noqa
 
     """
+    if wrapped_func is None:
+        return partial(nornsible_task, tags=tags, retention=retention, cache_ttl=cache_ttl)
 
-    def tag_wrapper(
-        task: Task, *args: List[Any], **kwargs: Dict[str, Any]
-    ) -> Union[Callable, Result]:
-        if task.host.name == "delegate":
-            return Result(
-                host=task.host, result="Task skipped, delegate host!", failed=False, changed=False
-            )
-        if {wrapped_func.__name__}.intersection(task.nornir.skip_tags):
-            msg = f"---- {task.host} skipping task {wrapped_func.__name__} "
-            nornsible_task_message(msg)
-            return Result(host=task.host, result="Task skipped!", failed=False, changed=False)
-        if not task.nornir.run_tags:
-            return wrapped_func(task, *args, **kwargs)
-        if {wrapped_func.__name__}.intersection(task.nornir.run_tags):
-            return wrapped_func(task, *args, **kwargs)
-        msg = f"---- {task.host} skipping task {wrapped_func.__name__} "
-        nornsible_task_message(msg)
-        return Result(host=task.host, result="Task skipped!", failed=False, changed=False)
+    policy = get_retention(retention)
+
+    task_tags = frozenset({wrapped_func.__name__.lower()} | {t.lower() for t in tags or ()})
+
+    if iscoroutinefunction(wrapped_func):
+
+        async def async_tag_wrapper(
+            task: Task, *args: List[Any], **kwargs: Dict[str, Any]
+        ) -> Union[Callable, Result]:
+            skipped = _tag_skip(task, task_tags, wrapped_func.__name__)
+            if skipped is not None:
+                return skipped
+            return await _run_retained_async(task, wrapped_func, policy, args, kwargs, cache_ttl)
+
+        def tag_wrapper(
+            task: Task, *args: List[Any], **kwargs: Dict[str, Any]
+        ) -> Union[Callable, Result]:
+            from nornsible.aio import run_coroutine  # pylint: disable=C0415
+
+            return run_coroutine(async_tag_wrapper(task, *args, **kwargs))
+
+        # allows nornsible run to run every host on the event loop rather than on worker threads
+        setattr(tag_wrapper, "nornsible_async", async_tag_wrapper)
+
+    else:
+
+        def tag_wrapper(
+            task: Task, *args: List[Any], **kwargs: Dict[str, Any]
+        ) -> Union[Callable, Result]:
+            skipped = _tag_skip(task, task_tags, wrapped_func.__name__)
+            if skipped is not None:
+                return skipped
+            return _run_retained(task, wrapped_func, policy, args, kwargs, cache_ttl)
 
     tag_wrapper.__name__ = wrapped_func.__name__
+    # allows nornsible run to skip tag filtered tasks once rather than once per host
+    setattr(tag_wrapper, "nornsible_tags", task_tags)
+    NORNSIBLE_TASKS[wrapped_func.__name__] = task_tags
     return tag_wrapper
 
 
-def nornsible_delegate(wrapped_func: Callable) -> Callable:
+def nornsible_delegate(
+    wrapped_func: Optional[Callable] = None,
+    *,
+    retention: Optional[Union[str, RetentionPolicy]] = None,
+) -> Callable:
     """
     Decorate an "operation" -- execute only on "delegate" (localhost)
 
     Args:
         wrapped_func: function to wrap in delegate_wrapper
+        retention: (optional) result retention policy, or mode ("all", "status" or "spill"), for
+            the task; see nornsible.retention
 
     Returns:
         tag_wrapper: wrapped function
@@ -90,24 +447,41 @@ def nornsible_delegate(wrapped_func: Callable) -> Callable:
         N/A  # noqa
 
     """
+    if wrapped_func is None:
+        return partial(nornsible_delegate, retention=retention)
 
-    def delegate_wrapper(
-        task: Task, *args: List[Any], **kwargs: Dict[str, Any]
-    ) -> Union[Callable, Result]:
-        if "delegate" not in task.nornir.inventory.hosts.keys():
-            msg = f"---- WARNING no delegate available for task {wrapped_func.__name__} "
-            nornsible_task_message(msg, critical=True)
-            return Result(
-                host=task.host, result="Task skipped, delegate host!", failed=False, changed=False
-            )
-        if task.host.name != "delegate":
-            return Result(
-                host=task.host,
-                result="Task skipped, non-delegate host!",
-                failed=False,
-                changed=False,
-            )
-        return wrapped_func(task, *args, **kwargs)
+    policy = get_retention(retention)
+
+    if iscoroutinefunction(wrapped_func):
+
+        async def async_delegate_wrapper(
+            task: Task, *args: List[Any], **kwargs: Dict[str, Any]
+        ) -> Union[Callable, Result]:
+            skipped = _delegate_skip(task, wrapped_func.__name__)
+            if skipped is not None:
+                return skipped
+            return await _run_retained_async(task, wrapped_func, policy, args, kwargs)
+
+        def delegate_wrapper(
+            task: Task, *args: List[Any], **kwargs: Dict[str, Any]
+        ) -> Union[Callable, Result]:
+            from nornsible.aio import run_coroutine  # pylint: disable=C0415
+
+            return run_coroutine(async_delegate_wrapper(task, *args, **kwargs))
+
+        setattr(delegate_wrapper, "nornsible_async", async_delegate_wrapper)
+
+    else:
+
+        def delegate_wrapper(
+            task: Task, *args: List[Any], **kwargs: Dict[str, Any]
+        ) -> Union[Callable, Result]:
+            skipped = _delegate_skip(task, wrapped_func.__name__)
+            if skipped is not None:
+                return skipped
+            return _run_retained(task, wrapped_func, policy, args, kwargs)
 
     delegate_wrapper.__name__ = wrapped_func.__name__
+    # allows nornsible run to schedule only the delegate host rather than every host
+    setattr(delegate_wrapper, "nornsible_delegate", True)
     return delegate_wrapper
@@ -1,36 +1,239 @@
+from collections import OrderedDict
+import json
 import logging
-import threading
-from typing import List, Optional
+import pprint
+from typing import List, Optional, TYPE_CHECKING
 
-from nornir.core.task import AggregatedResult, MultiResult, Result
-from nornir.plugins.functions.text import _print_result
+from nornsible.output import OUTPUT
 
+if TYPE_CHECKING:
+    from nornir.core.task import Result  # noqa
 
-LOCK = threading.Lock()
+    from nornsible.results import FilteredMultiResult  # noqa
+
+
+def _color(result: "Result", failed: bool) -> str:
+    """
+    Get the color to render a result in; mirrors nornir print_result
+
+    Arguments:
+        result: nornir Result
+        failed: if True assume the task failed
+
+    Returns:
+        str: colorama color
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from colorama import Fore  # pylint: disable=C0415
+
+    if result.failed or failed:
+        return str(Fore.RED)
+    if result.changed:
+        return str(Fore.YELLOW)
+    return str(Fore.GREEN)
+
+
+def _render_individual_result(
+    result: "Result",
+    attrs: List[str],
+    failed: bool,
+    severity_level: int,
+    lines: List[str],
+    task_group: bool = False,
+) -> None:
+    """
+    Render a single Result in the same format as nornir print_result
+
+    Arguments:
+        result: nornir Result
+        attrs: attributes of the result to render
+        failed: if True assume the task failed
+        severity_level: render only results with this severity level or higher
+        lines: list of lines to append the rendered result to
+        task_group: result is the first result of a MultiResult
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from colorama import Style  # pylint: disable=C0415
+
+    if result.severity_level < severity_level:
+        return
+
+    subtitle = "" if result.changed is None else f" ** changed : {result.changed} "
+    level_name = logging.getLevelName(result.severity_level)
+    symbol = "v" if task_group else "-"
+    msg = f"{symbol * 4} {result.name}{subtitle}"
+    lines.append(
+        f"{Style.BRIGHT}{_color(result, failed)}{msg}{symbol * (80 - len(msg))} {level_name}"
+    )
+    for attribute in attrs:
+        x = getattr(result, attribute, "")
+        if isinstance(x, BaseException):
+            lines.append(f"{x.__class__.__name__}{x.args}")
+        elif x and not isinstance(x, str):
+            if isinstance(x, OrderedDict):
+                lines.append(json.dumps(x, indent=2))
+            else:
+                lines.append(pprint.pformat(x, indent=2))
+        elif x:
+            lines.append(x)
+
+
+def _render_title(name: str, lines: List[str]) -> None:
+    """
+    Render the title banner of a task
+
+    Arguments:
+        name: name of the task
+        lines: list of lines to append the rendered banner to
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from colorama import Fore, Style  # pylint: disable=C0415
+
+    lines.append(f"{Style.BRIGHT}{Fore.CYAN}{name}{'*' * (80 - len(name))}")
+
+
+def _render_host(
+    host: str,
+    host_data: "FilteredMultiResult",
+    attrs: List[str],
+    failed: bool,
+    severity_level: int,
+    lines: List[str],
+) -> None:
+    """
+    Render the results of a task for one host, including the host banner
+
+    Arguments:
+        host: name of the host
+        host_data: filtered view of the MultiResult of the task for the host
+        attrs: attributes of the result(s) to render
+        failed: if True assume the task failed
+        severity_level: render only results with this severity level or higher
+        lines: list of lines to append the rendered results to
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from colorama import Fore, Style  # pylint: disable=C0415
+
+    title = "" if host_data.changed is None else f" ** changed : {host_data.changed} "
+    msg = f"* {host}{title}"
+    lines.append(f"{Style.BRIGHT}{Fore.BLUE}{msg}{'*' * (80 - len(msg))}")
+    _render_result(host_data, attrs, failed, severity_level, lines)
+
+
+def _render_result(
+    result: "Result",
+    attrs: List[str],
+    failed: bool,
+    severity_level: int,
+    lines: List[str],
+) -> None:
+    """
+    Render an AggregatedResult, MultiResult or Result, omitting nornsible skipped results
+
+    Skipped results (and host results already written out by the StreamingResultProcessor) are
+    filtered through the read-only views in nornsible.results rather than copied.
+
+    Arguments:
+        result: nornir AggregatedResult, MultiResult or Result, or a filtered view of one
+        attrs: attributes of the result(s) to render
+        failed: if True assume the task failed
+        severity_level: render only results with this severity level or higher
+        lines: list of lines to append the rendered result to
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from colorama import Style  # pylint: disable=C0415
+    from nornir.core.task import AggregatedResult, MultiResult  # pylint: disable=C0415
+
+    from nornsible.results import (  # pylint: disable=C0415
+        FilteredAggregatedResult,
+        FilteredMultiResult,
+        is_skipped,
+    )
+
+    if isinstance(result, (AggregatedResult, FilteredAggregatedResult)):
+        if not isinstance(result, FilteredAggregatedResult):
+            result = FilteredAggregatedResult(result)
+        host_results = sorted(result.items())
+        if not host_results:
+            return
+        _render_title(result.name, lines)
+        for host, host_data in host_results:
+            _render_host(host, host_data, attrs, failed, severity_level, lines)
+    elif isinstance(result, (MultiResult, FilteredMultiResult)):
+        results = iter(FilteredMultiResult(result) if isinstance(result, MultiResult) else result)
+        first = next(results, None)
+        if first is None:
+            return
+        _render_individual_result(first, attrs, failed, severity_level, lines, True)
+        for r in results:
+            _render_result(r, attrs, failed, severity_level, lines)
+        msg = f"^^^^ END {first.name} "
+        lines.append(f"{Style.BRIGHT}{_color(first, failed)}{msg}{'^' * (80 - len(msg))}")
+    elif not is_skipped(result):
+        _render_individual_result(result, attrs, failed, severity_level, lines)
 
 
 def print_result(
-    result: Result,
+    result: "Result",
     host: Optional[str] = None,
     nr_vars: List[str] = None,
     failed: bool = False,
     severity_level: int = logging.INFO,
 ) -> None:
-    updated_agg_result = AggregatedResult(result.name)
-    for hostname, multi_result in result.items():
-        updated_multi_result = MultiResult(result.name)
-        for r in multi_result:
-            if isinstance(r.result, str) and r.result.startswith("Task skipped"):
-                continue
-            updated_multi_result.append(r)
-        if updated_multi_result:
-            updated_agg_result[hostname] = updated_multi_result  # noqa
-
-    if not updated_agg_result:
-        return
+    """
+    Print a nornir result in the same format as nornir print_result, omitting skipped results
+
+    The result is rendered on the calling thread and written by the nornsible output writer (see
+    nornsible.output), so calling print_result from within a task never blocks the worker on stdout.
+
+    Arguments:
+        result: nornir AggregatedResult, MultiResult or Result
+        host: unused; kept for compatibility with nornir print_result
+        nr_vars: attributes of the result(s) to print
+        failed: if True assume the task failed
+        severity_level: print only results with this severity level or higher
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    # pylint: disable=W0613
+    attrs = nr_vars or ["diff", "result", "stdout"]
+    if isinstance(attrs, str):
+        attrs = [attrs]
 
-    LOCK.acquire()
-    try:
-        _print_result(updated_agg_result, host, nr_vars, failed, severity_level)
-    finally:
-        LOCK.release()
+    # rendered here rather than on the writer thread, as result retention (see --retention) may
+    # drop the payload once the task returns
+    lines: List[str] = []
+    _render_result(result, attrs, failed, severity_level, lines)
+    OUTPUT.write("\n".join(lines))
@@ -1,12 +1,9 @@
 import configparser as cp
 from collections import defaultdict
 from copy import deepcopy
-import json
-from json.decoder import JSONDecodeError
 import logging
 import os
 from pathlib import Path
-import subprocess
 from typing import (
     Any,
     DefaultDict,
@@ -33,9 +30,8 @@ from nornir.plugins.inventory.ansible import (
     YAMLParser,
     VARS_FILENAME_EXTENSIONS,
 )
-from ruamel.yaml.composer import ComposerError
-from ruamel.yaml.scanner import ScannerError
-from ruamel.yaml.parser import ParserError
+
+from nornsible import tracing
 
 NORNIR_LOGGER = logging.getLogger("nornir")
 VARS_FILENAME_EXTENSIONS.append(".py")
@@ -50,6 +46,9 @@ class ScriptParser(AnsibleParser):
         return False
 
     def load_hosts_file(self) -> None:
+        import json  # pylint: disable=C0415
+        import subprocess  # pylint: disable=C0415
+
         if not self.verify_file():
             raise TypeError(f"AnsibleInventory: invalid script file {self.hostsfile}")
 
@@ -229,6 +228,12 @@ class AnsibleInventory(Inventory):
 
     @staticmethod
     def _gather_valid_inventory_sources(possible_sources: List[str]) -> List[AnsibleParser]:
+        # deferred until inventory is actually parsed to keep module import cheap
+        from json.decoder import JSONDecodeError  # pylint: disable=C0415
+        from ruamel.yaml.composer import ComposerError  # pylint: disable=C0415
+        from ruamel.yaml.parser import ParserError  # pylint: disable=C0415
+        from ruamel.yaml.scanner import ScannerError  # pylint: disable=C0415
+
         valid_sources: List[AnsibleParser] = []
         for possible_source in possible_sources:
             try:
@@ -294,7 +299,11 @@ class AnsibleInventory(Inventory):
         defaults: Dict[str, Any] = {}
 
         for source in valid_sources:
-            source.parse()
+            with tracing.span(
+                "nornsible.inventory.parse",
+                {"nornsible.source": source.hostsfile, "nornsible.parser": type(source).__name__},
+            ):
+                source.parse()
             hosts = self.combine_inventory(hosts, source.hosts, hash_behavior)
             groups = self.combine_inventory(groups, source.groups, hash_behavior)
             defaults = self.combine_inventory(defaults, source.defaults, hash_behavior)
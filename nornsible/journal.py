@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+from typing import Dict, Set
+
+from nornir.core.inventory import Host
+from nornir.core.task import MultiResult, Task
+
+from nornsible.processors import NornsibleProcessor, result_status
+
+
+# statuses of journal records that count as done when resuming
+DONE_STATUSES = ("ok", "changed")
+
+
+def journal_key(task: Task) -> str:
+    """
+    Build the key a task is journaled under: its name and a hash of its arguments
+
+    Runs of the same task with different arguments are journaled (and resumed) separately.
+    Arguments are hashed via their json (or repr, if not json serializable) form, so a task passed
+    an argument whose repr differs between runs is never considered done.
+
+    Arguments:
+        task: nornir.core.task.Task object
+
+    Returns:
+        str: journal key
+
+    Raises:
+        N/A  # noqa
+
+    """
+    arguments = json.dumps(task.params, sort_keys=True, default=repr)
+    return f"{task.name}|{hashlib.sha1(arguments.encode()).hexdigest()}"
+
+
+def read_journal(path: str) -> Dict[str, Set[str]]:
+    """
+    Read the hosts each task is done for from a journal; the last record of a host/task wins
+
+    Arguments:
+        path: path of the journal; a missing journal has no records
+
+    Returns:
+        dict: journal key (see journal_key) to set of host names the task succeeded on
+
+    Raises:
+        N/A  # noqa
+
+    """
+    done: Dict[str, Set[str]] = {}
+    try:
+        f = open(path)
+    except FileNotFoundError:
+        return done
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                hosts = done.setdefault(record["key"], set())
+            except (KeyError, ValueError):
+                # i.e. the last line of a journal of a run that was killed mid write
+                continue
+            if record["status"] in DONE_STATUSES:
+                hosts.add(record["host"])
+            else:
+                hosts.discard(record["host"])
+    return done
+
+
+class JournalProcessor(NornsibleProcessor):
+    def __init__(self, path: str, append: bool = False) -> None:
+        """
+        Append a (host, task, key, status) json record to a journal as each host completes a top
+        level nornsible_task; see --resume and journal_key
+
+        Each record is written with its own append to a file descriptor that stays open, so the
+        journal is up to date even if the run is killed, and worker processes (see --processes)
+        can append to it as well. Records are not fsynced, so a host crash may lose the last few.
+
+        Arguments:
+            path: path of the journal
+            append: append to an existing journal rather than truncating it
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.path = path
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        if not append:
+            flags |= os.O_TRUNC
+        self.fd = os.open(path, flags, 0o644)
+
+    def task_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
+        """
+        Append the record of a host completing a nornsible_task
+
+        Arguments:
+            task: nornir.core.task.Task that completed
+            host: nornir.core.inventory.Host the task completed on
+            result: nornir.core.task.MultiResult of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if getattr(task.task, "nornsible_tags", None) is None:
+            return
+        record = {
+            "host": host.name,
+            "task": task.name,
+            "key": journal_key(task),
+            "status": result_status(result),
+        }
+        os.write(self.fd, f"{json.dumps(record)}\n".encode())
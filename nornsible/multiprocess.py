@@ -0,0 +1,268 @@
+import multiprocessing
+import pickle
+from typing import Any, Dict, List, Optional, Tuple
+
+from nornir.core import Nornir
+from nornir.core.connections import Connections
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Result, Task
+
+from nornsible.cache import flush_cache
+from nornsible.output import OUTPUT
+from nornsible.processors import NornsibleProcessor
+from nornsible.results import is_streamed, mark_streamed
+from nornsible.decorators import nornsible_task_message
+from nornsible.scheduler import Slot, host_slots, inventory_throttled, run_throttled
+from nornsible.timings import TIMINGS
+
+
+# job is stashed here immediately before forking so worker processes inherit it rather than
+# having the Nornir object, its inventory, and the task pickled over to them
+_JOB: Optional[Tuple[Nornir, Task, List[List[Host]], int, Dict[str, Any]]] = None
+
+# worker processes inherit the job, so they must be forked; platforms without fork (i.e. windows)
+# run --processes jobs in this process instead
+START_METHOD = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+
+# connections a worker process inherited from the parent, kept referenced so they are never torn
+# down (which would close the parent's sessions) while the worker opens its own
+_INHERITED: List[Connections] = []
+
+
+def _picklable(value: Any) -> Any:
+    """
+    Return value if it can be pickled, otherwise its repr
+
+    Arguments:
+        value: object to check
+
+    Returns:
+        value: original value or its repr if it cannot be pickled
+
+    Raises:
+        N/A  # noqa
+
+    """
+    try:
+        pickle.dumps(value)
+    except Exception:  # pylint: disable=W0703
+        if isinstance(value, BaseException):
+            return Exception(repr(value))
+        return repr(value)
+    return value
+
+
+def _dehydrate(result: Any, sanitize: bool = False) -> Any:
+    """
+    Convert a MultiResult/Result into a picklable structure without references to host objects
+
+    Arguments:
+        result: nornir MultiResult or Result object
+        sanitize: replace any attribute values that cannot be pickled with their repr
+
+    Returns:
+        dehydrated: tuple representation of the result
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if isinstance(result, MultiResult):
+        items = [_dehydrate(r, sanitize) for r in result]
+        return ("multi", result.name, items, is_streamed(result))
+    state = {k: v for k, v in result.__dict__.items() if k != "host"}
+    if sanitize:
+        state = {k: _picklable(v) for k, v in state.items()}
+    return ("result", type(result), state)
+
+
+def _rehydrate(dehydrated: Any, host: Host) -> Any:
+    """
+    Rebuild a MultiResult/Result from its dehydrated form, re-attaching the parent process host
+
+    Arguments:
+        dehydrated: tuple representation of the result as returned from _dehydrate
+        host: nornir.core.inventory.Host object from the parent process inventory
+
+    Returns:
+        result: nornir MultiResult or Result object
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if dehydrated[0] == "multi":
+        _, name, items, streamed = dehydrated
+        multi_result = MultiResult(name)
+        multi_result.extend(_rehydrate(r, host) for r in items)
+        if streamed:
+            # already written out in the worker process, so not printed again by print_result
+            mark_streamed(multi_result)
+        return multi_result
+    _, result_type, state = dehydrated
+    result: Result = result_type.__new__(result_type)
+    result.__dict__.update(state)
+    result.host = host
+    return result
+
+
+def _run_chunk(index: int) -> Tuple[bytes, Any]:
+    """
+    Run the stashed job against one chunk of hosts; executed in a worker process
+
+    Arguments:
+        index: index of the chunk of hosts this process is responsible for
+
+    Returns:
+        results: pickled dict of host name to dehydrated MultiResult, and the timings recorded by
+            this process (see nornsible.timings)
+
+    Raises:
+        N/A  # noqa
+
+    """
+    nr, task, chunks, num_workers, kwargs = _JOB  # type: ignore
+    # connections opened before the fork (i.e. by --prewarm) share their sockets with the parent,
+    # and their transport threads did not survive the fork, so this process opens its own
+    for host in nr.inventory.hosts.values():
+        if host.connections:
+            _INHERITED.append(host.connections)
+            host.connections = Connections()
+    # timings forked from the parent (or left by a previous chunk) are not this chunk's to report
+    TIMINGS.reset()
+    if num_workers == 1:
+        agg_result = Nornir._run_serial(nr, task, chunks[index], **kwargs)  # pylint: disable=W0212
+    elif inventory_throttled(nr):
+        agg_result = run_throttled(nr, task, chunks[index], num_workers, **kwargs)
+    else:
+        agg_result = Nornir._run_parallel(  # pylint: disable=W0212
+            nr, task, chunks[index], num_workers, **kwargs
+        )
+    # worker processes have their own output writer, processor buffers and fact cache; flush them
+    # before the pool is torn down
+    for processor in nr.processors:
+        if isinstance(processor, NornsibleProcessor):
+            processor.flush()
+    OUTPUT.flush()
+    flush_cache()
+    try:
+        results = pickle.dumps({h: _dehydrate(r) for h, r in agg_result.items()})
+    except Exception:  # pylint: disable=W0703
+        results = pickle.dumps({h: _dehydrate(r, sanitize=True) for h, r in agg_result.items()})
+    return results, TIMINGS.snapshot()
+
+
+def host_chunks(nr: Nornir, hosts: List[Host], processes: int) -> List[List[Host]]:
+    """
+    Split hosts into (at most) one chunk per process, keeping throttled hosts together
+
+    Throttles can only be enforced within a process, so hosts that share a throttle slot (directly
+    or via another host, see nornsible.scheduler.host_slots) always end up in the same chunk; the
+    resulting units of hosts are spread over the chunks largest first.
+
+    Arguments:
+        nr: Nornir object
+        hosts: list of hosts to split
+        processes: maximum number of chunks
+
+    Returns:
+        chunks: list of non empty lists of hosts
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if not inventory_throttled(nr):
+        return [hosts[i::processes] for i in range(processes) if hosts[i::processes]]
+
+    parents = list(range(len(hosts)))
+
+    def find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    limits: Dict[Slot, int] = {}
+    first_host: Dict[Slot, int] = {}
+    for i, host in enumerate(hosts):
+        for slot in host_slots(host, nr.throttle, limits):
+            parents[find(i)] = find(first_host.setdefault(slot, i))
+    units: Dict[int, List[Host]] = {}
+    for i, host in enumerate(hosts):
+        units.setdefault(find(i), []).append(host)
+
+    chunks: List[List[Host]] = [[] for _ in range(processes)]
+    for unit in sorted(units.values(), key=len, reverse=True):
+        min(chunks, key=len).extend(unit)
+    return [chunk for chunk in chunks if chunk]
+
+
+def run_multiprocess(
+    self: Nornir, task: Task, hosts: List[Host], num_workers: int = 1, **kwargs: Dict[str, Any]
+) -> AggregatedResult:
+    """
+    Drop-in replacement for Nornir._run_parallel/_run_serial that splits hosts across processes
+
+    Each worker process runs its own nornir thread pool (of num_workers) over its share of the
+    hosts; results are merged back into a single AggregatedResult in the parent process. Hosts that
+    share a throttle always run in the same process (see host_chunks), processors are applied per
+    process, the rate limit (if any) is split evenly between processes, and any changes tasks make
+    to nornir global state in a worker process are not seen by the parent. Where fork is not
+    available the task runs in this process, as without --processes.
+
+    Arguments:
+        self: Nornir object
+        task: nornir.core.task.Task object to run
+        hosts: list of hosts to run the task against
+        num_workers: number of threads per process; 1 to run hosts serially in each process
+        **kwargs: keyword arguments passed to nornir run
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    global _JOB  # pylint: disable=W0603
+    agg_result = AggregatedResult(kwargs.get("name") or task.name)
+    if START_METHOD is None:
+        msg = "---- WARNING fork is not available, ignoring --processes "
+        nornsible_task_message(msg, critical=True)
+        if num_workers == 1:
+            return Nornir._run_serial(self, task, hosts, **kwargs)  # pylint: disable=W0212
+        if inventory_throttled(self):
+            return run_throttled(self, task, hosts, num_workers, **kwargs)
+        return Nornir._run_parallel(  # pylint: disable=W0212
+            self, task, hosts, num_workers, **kwargs
+        )
+    chunks = host_chunks(self, hosts, min(self.processes, len(hosts)))
+    processes = len(chunks)
+    if not processes:
+        return agg_result
+
+    _JOB = (self, task, chunks, num_workers, kwargs)
+    rate_limit = getattr(self, "rate_limit", None)
+    if rate_limit is not None:
+        # each worker process paces its own starts, so gets an equal share of the rate limit
+        self.rate_limit = rate_limit.share(processes)
+    try:
+        with multiprocessing.get_context(START_METHOD).Pool(processes) as pool:
+            chunk_results = pool.map(_run_chunk, range(processes))
+    finally:
+        _JOB = None
+        if rate_limit is not None:
+            self.rate_limit = rate_limit
+
+    merged = {h: r for chunk, _ in chunk_results for h, r in pickle.loads(chunk).items()}
+    for _, timings in chunk_results:
+        TIMINGS.merge(timings)
+    parent_processors = [
+        p for p in self.processors if isinstance(p, NornsibleProcessor) and not p.per_process
+    ]
+    for host in hosts:
+        agg_result[host.name] = _rehydrate(merged[host.name], host)
+        for processor in parent_processors:
+            processor.task_instance_completed(task, host, agg_result[host.name])
+    return agg_result
@@ -1,10 +1,33 @@
+import atexit
+import hashlib
+import heapq
+import json
+import math
+from pathlib import Path
 import sys
-from typing import List
+from types import MethodType
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from nornir.core import Nornir, Config, Inventory
 from nornir.core.inventory import Host
 
+from nornsible import tracing
+from nornsible.cache import get_cache, open_cache, set_cache
 from nornsible.cli import parse_cli_args
+from nornsible.decorators import NORNSIBLE_TASKS
+from nornsible.journal import JournalProcessor, read_journal
+from nornsible.processors import (
+    JsonLinesProcessor,
+    RetryFileProcessor,
+    StreamingResultProcessor,
+)
+from nornsible.ratelimit import RateLimit
+from nornsible.recap import RecapProcessor
+from nornsible.retention import SPILL, RetentionPolicy
+from nornsible.runner import run
+from nornsible.scheduler import inventory_throttled, run_throttled
+from nornsible.tags import TagFilter
+from nornsible.timings import TIMINGS
 
 
 def _filter_host(
@@ -43,6 +66,147 @@ def _filter_host(
     return True
 
 
+def _shard_hash(name: str) -> int:
+    """
+    Stable (across processes, runs, and machines) hash of a host name
+
+    Arguments:
+        name: host name to hash
+
+    Returns:
+        int: hash of the host name
+
+    Raises:
+        N/A  # noqa
+
+    """
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big")
+
+
+def _shard_cost(name: str, cost: Any, source: str) -> float:
+    """
+    Validate the cost of a host for weighted sharding
+
+    Arguments:
+        name: host name
+        cost: cost of the host as found in the host var or durations file
+        source: where the cost came from, for the error message
+
+    Returns:
+        float: cost of the host
+
+    Raises:
+        ValueError: if cost is not a finite, non negative number
+
+    """
+    try:
+        value = float(cost)
+    except (TypeError, ValueError):
+        value = math.nan
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"invalid shard weight {cost!r} for host {name} in {source}")
+    return value
+
+
+def _shard_costs(shard_weight: str, inv: Inventory) -> Dict[str, float]:
+    """
+    Determine the cost of each host for weighted sharding
+
+    Arguments:
+        shard_weight: host var name holding host cost, or "@" prefixed path to a json file mapping
+            host names to durations recorded from previous runs (or a --timings json file)
+        inv: nornir.core.inventory.Inventory object
+
+    Returns:
+        costs: dict of host name to cost; hosts with no known cost get the mean of known costs
+
+    Raises:
+        N/A  # noqa
+
+    """
+    source = shard_weight[1:] if shard_weight.startswith("@") else f"host var {shard_weight}"
+    if shard_weight.startswith("@"):
+        with open(shard_weight[1:], "r") as f:
+            durations = json.load(f)
+        if isinstance(durations.get("hosts"), dict):
+            # --timings output; total duration of all tasks per host
+            durations = {
+                h: sum(_shard_cost(h, d, source) for d in t.values())
+                for h, t in durations["hosts"].items()
+            }
+        known = {h: _shard_cost(h, c, source) for h, c in durations.items() if h in inv.hosts}
+    else:
+        known = {}
+        for name, host in inv.hosts.items():
+            cost = host.get(shard_weight)
+            if cost is not None:
+                known[name] = _shard_cost(name, cost, source)
+    default = sum(known.values()) / len(known) if known else 1.0
+    return {name: known.get(name, default) for name in inv.hosts}
+
+
+def _shard_hosts(shard: Tuple[int, int], shard_weight: str, inv: Inventory) -> Set[str]:
+    """
+    Determine which hosts belong to a given shard
+
+    Without a weight hosts are assigned by stable hash of host name. With a weight, hosts are
+    assigned greedily (most expensive first) to the least loaded shard; as every runner sorts the
+    same inventory the same way, each computes the same disjoint assignment.
+
+    Arguments:
+        shard: tuple of (one based) shard index and shard count
+        shard_weight: see _shard_costs; empty to shard by hash only
+        inv: nornir.core.inventory.Inventory object
+
+    Returns:
+        hosts: set of host names in the selected shard
+
+    Raises:
+        N/A  # noqa
+
+    """
+    index, count = shard
+    if not shard_weight:
+        return {name for name in inv.hosts if _shard_hash(name) % count == index - 1}
+
+    costs = _shard_costs(shard_weight, inv)
+    loads = [(0.0, i) for i in range(count)]
+    selected = set()
+    for name in sorted(inv.hosts, key=lambda h: (-costs[h], _shard_hash(h), h)):
+        load, i = heapq.heappop(loads)
+        if i == index - 1:
+            selected.add(name)
+        heapq.heappush(loads, (load + costs[name], i))
+    return selected
+
+
+def _expand_limit_files(limit: Set[str]) -> Set[str]:
+    """
+    Expand any "@file" entries in a host limit to the (lowercased) hosts listed in the file
+
+    Arguments:
+        limit: set of host limit entries
+
+    Returns:
+        limit: set of host limit entries with any "@file" entries replaced by the hosts they list
+
+    Raises:
+        N/A  # noqa
+
+    """
+    expanded = set()
+    for entry in limit:
+        if not entry.startswith("@"):
+            expanded.add(entry)
+            continue
+        try:
+            with open(entry[1:], "r") as f:
+                expanded.update(line.strip().lower() for line in f if line.strip())
+        except FileNotFoundError:
+            print(f"Host limit file {entry[1:]} does not exist, ignoring")
+    return expanded
+
+
 def patch_inventory(cli_args: dict, inv: Inventory) -> Inventory:
     """
     Patch nornir inventory configurations per cli arguments.
@@ -58,12 +222,41 @@ def patch_inventory(cli_args: dict, inv: Inventory) -> Inventory:
         N/A  # noqa
 
     """
-    if cli_args["limit"]:
+    with tracing.span("nornsible.patch_inventory", {"nornsible.hosts": len(inv.hosts)}) as span:
+        inv = _patch_inventory(cli_args, inv)
+        if span is not None:
+            span.set_attribute("nornsible.selected_hosts", len(inv.hosts))
+    return inv
+
+
+def _patch_inventory(cli_args: dict, inv: Inventory) -> Inventory:
+    """
+    Filter nornir inventory per cli host/group limits and shard; see patch_inventory
+
+    Arguments:
+        cli_args: Updates from CLI to update in Nornir objects
+        inv: nornir.core.inventory.Inventory object; Initialized Nornir Inventory object
+
+    Returns:
+        inv: nornir.core.inventory.Inventory object; Updated Nornir Inventory object
+
+    Raises:
+        N/A  # noqa
+
+    """
+    limit = cli_args["limit"]
+    if limit and any(h.startswith("@") for h in limit):
+        limit = _expand_limit_files(limit)
+        if not limit:
+            # limiting to an empty (or missing) host file must not fall through to all hosts!
+            return inv.filter(filter_func=lambda h: False)
+
+    if limit:
         lower_hosts = [h.lower() for h in inv.hosts.keys()]
         include_valid_hosts = []
         skip_valid_hosts = []
         invalid_hosts = []
-        for host in cli_args["limit"]:
+        for host in limit:
             normalize_host = host.replace("!", "")
             if normalize_host not in lower_hosts:
                 invalid_hosts.append(normalize_host)
@@ -93,6 +286,10 @@ def patch_inventory(cli_args: dict, inv: Inventory) -> Inventory:
             )
         )
 
+    if cli_args["shard"]:
+        shard_hosts = _shard_hosts(cli_args["shard"], cli_args["shard_weight"], inv)
+        inv = inv.filter(filter_func=lambda h: h.name in shard_hosts)
+
     return inv
 
 
@@ -136,12 +333,205 @@ def patch_config(cli_args: dict, conf: Config) -> Config:
     return conf
 
 
-def InitNornsible(nr: Nornir) -> Nornir:
+def list_hosts(inv: Inventory) -> None:
+    """
+    Print hosts in the inventory (excluding the delegate host), one per line
+
+    Hosts are written as they are iterated rather than building a (potentially huge) string.
+
+    Arguments:
+        inv: nornir.core.inventory.Inventory object
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    hosts = [h for h in inv.hosts if h != "delegate"]
+    sys.stdout.write(f"hosts ({len(hosts)}):\n")
+    for host in hosts:
+        sys.stdout.write(f"  {host}\n")
+    sys.stdout.flush()
+
+
+def list_tasks(tag_filter: TagFilter) -> None:
+    """
+    Print nornsible tasks and whether each will run or be skipped per the run and skip tags
+
+    Arguments:
+        tag_filter: TagFilter of run and skip tags
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    sys.stdout.write(f"tasks ({len(NORNSIBLE_TASKS)}):\n")
+    for task_name, task_tags in NORNSIBLE_TASKS.items():
+        action = "run" if tag_filter.allows(task_tags) else "skip"
+        extra_tags = sorted(task_tags - {task_name.lower()})
+        tags = f" (tags: {', '.join(extra_tags)})" if extra_tags else ""
+        sys.stdout.write(f"  {action:<5}{task_name}{tags}\n")
+    sys.stdout.flush()
+
+
+# cli arguments nornsible acts on itself, rather than by patching nornir config and inventory
+NORNSIBLE_OPTIONS = (
+    "profile",
+    "list_hosts",
+    "list_tasks",
+    "retry_file",
+    "retry",
+    "stream",
+    "json_output",
+    "json_payload",
+    "recap",
+    "retention",
+    "spill_threshold",
+    "timings",
+    "prewarm",
+    "prewarm_workers",
+    "prewarm_timeout",
+    "fact_cache",
+    "flush_cache",
+    "journal",
+    "resume",
+    "rate",
+    "burst",
+    "rate_scope",
+)
+
+
+def _start_profiling(profile: Union[bool, str]) -> None:
+    """
+    Start profiling the run if requested, writing the pstats file at exit
+
+    Arguments:
+        profile: pstats file path, True for the default (<script>.pstats), or False
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if not profile:
+        return
+    from nornsible.profiling import start_profiling  # pylint: disable=C0415
+
+    profile_path = profile if isinstance(profile, str) else f"{Path(sys.argv[0]).stem}.pstats"
+    atexit.register(start_profiling(profile_path).finish)
+
+
+def _install_processors(nr: Nornir, options: Dict[str, Any]) -> None:
+    """
+    Append the processors selected by cli options to the nornir object, ending with the recap
+
+    Arguments:
+        nr: Nornir object
+        options: nornsible cli options (see NORNSIBLE_OPTIONS)
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if options["retry_file"]:
+        nr.processors.append(RetryFileProcessor(options["retry_file"]))
+
+    if options["json_output"]:
+        nr.processors.append(
+            JsonLinesProcessor(options["json_output"], payload=options["json_payload"])
+        )
+
+    journal, resume = options["journal"], options["resume"]
+    nr.resume = read_journal(resume) if resume else {}
+    if journal or resume:
+        nr.processors.append(JournalProcessor(journal or resume, append=bool(resume)))
+
+    if options["stream"]:
+        # after any processor that reads payloads, as streaming drops them once written
+        nr.processors.append(StreamingResultProcessor())
+
+    nr.recap = RecapProcessor()
+    nr.processors.append(nr.recap)
+    if options["recap"]:
+        atexit.register(nr.recap.print_recap)
+
+
+def _configure_tasks(nr: Nornir, options: Dict[str, Any]) -> None:
+    """
+    Set up result retention, rate limiting, timings and the fact cache per cli options
+
+    Arguments:
+        nr: Nornir object
+        options: nornsible cli options (see NORNSIBLE_OPTIONS)
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    retention = options["retention"]
+    nr.retention = RetentionPolicy(retention, options["spill_threshold"]) if retention else None
+    if retention == SPILL:
+        # created up front so that worker processes (see --processes) spill to the same place
+        nr.retention.ensure_spill_dir()
+
+    rate = options["rate"]
+    nr.rate_limit = RateLimit(rate, options["burst"], options["rate_scope"]) if rate else None
+
+    if options["timings"]:
+        atexit.register(TIMINGS.write, options["timings"])
+
+    if options["fact_cache"]:
+        set_cache(open_cache(options["fact_cache"]))
+    if options["flush_cache"]:
+        get_cache().clear()
+
+
+def _patch_schedulers(nr: Nornir) -> None:
+    """
+    Bind nornsible run, and the throttled or multiprocess schedulers if needed, to a nornir object
+
+    Arguments:
+        nr: Nornir object
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if inventory_throttled(nr):
+        nr._run_parallel = MethodType(run_throttled, nr)  # pylint: disable=W0212
+
+    if nr.processes:
+        from nornsible.multiprocess import run_multiprocess  # pylint: disable=C0415
+
+        nr._run_serial = MethodType(run_multiprocess, nr)  # pylint: disable=W0212
+        nr._run_parallel = MethodType(run_multiprocess, nr)  # pylint: disable=W0212
+
+    nr.run = MethodType(run, nr)
+
+
+def InitNornsible(nr: Nornir, args: Optional[List[str]] = None) -> Nornir:
     """
     Patch nornir object based on cli arguments
 
     Arguments:
         nr: Nornir object
+        args: (optional) cli arguments to use in place of sys.argv, i.e. for nornsible daemon jobs
 
     Returns:
         nr: Nornir object; modified if cli args dictate the need to do so; otherwise passed as is
@@ -150,16 +540,47 @@ def InitNornsible(nr: Nornir) -> Nornir:
         N/A  # noqa
 
     """
-    cli_args = parse_cli_args(sys.argv[1:])
+    cli_args = parse_cli_args(sys.argv[1:] if args is None else args)
+    options = {option: cli_args.pop(option) for option in NORNSIBLE_OPTIONS}
+
+    _start_profiling(options["profile"])
 
     nr.run_tags = cli_args.pop("run_tags")
     nr.skip_tags = cli_args.pop("skip_tags")
+    nr.tag_filter = TagFilter(nr.run_tags, nr.skip_tags)
+    nr.throttle = cli_args.pop("throttle")
+    nr.processes = cli_args.pop("processes")
+
+    if not options["retry_file"] and args is None:
+        # daemon jobs (args given) only write a retry file when asked to, as jobs share the cwd
+        options["retry_file"] = f"{Path(sys.argv[0]).stem}.retry"
+    if options["retry"]:
+        retry_file = options["retry_file"]
+        if not retry_file or not Path(retry_file).is_file():
+            sys.exit(f"Retry file {retry_file or '<unset>'} does not exist, nothing to retry")
+        cli_args["limit"] = (cli_args["limit"] or set()) | {f"@{retry_file}"}
 
     if any(a for a in cli_args.values()):
         nr.config = patch_config(cli_args, nr.config)
         nr.inventory = patch_inventory(cli_args, nr.inventory)
 
+    if options["list_hosts"] or options["list_tasks"]:
+        if options["list_hosts"]:
+            list_hosts(nr.inventory)
+        if options["list_tasks"]:
+            list_tasks(nr.tag_filter)
+        sys.exit(0)
+
     if not cli_args["disable_delegate"]:
         nr.inventory = patch_inventory_delegate(nr.inventory)
 
+    _install_processors(nr, options)
+    _configure_tasks(nr, options)
+    _patch_schedulers(nr)
+
+    if options["prewarm"]:
+        from nornsible.prewarm import prewarm  # pylint: disable=C0415
+
+        prewarm(nr, num_workers=options["prewarm_workers"], timeout=options["prewarm_timeout"])
+
     return nr
@@ -0,0 +1,287 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Union
+
+
+# maximum number of queued messages written (and flushed) to stdout in one go
+BATCH_SIZE = 256
+
+Message = Union[str, Callable[[], str]]
+
+
+class _Flush:
+    def __init__(self) -> None:
+        """
+        Flush marker; set once every message queued before it has been written
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.done = threading.Event()
+
+
+class _Skip:
+    def __init__(self, task_name: str) -> None:
+        """
+        Skip marker; counted by the writer and summarized (per task) on the next flush
+
+        Arguments:
+            task_name: name of the skipped task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.task_name = task_name
+
+
+# anything the writer thread drains: messages, and flush and skip markers
+_QueueItem = Union[Message, _Flush, _Skip]
+
+
+class OutputWriter:
+    def __init__(self) -> None:
+        """
+        Single output channel for nornsible: a queue drained by one writer thread
+
+        Messages are either strings or callables returning strings; callables are rendered on the
+        writer thread so that formatting large results does not hold up nornir worker threads
+        either. The writer writes whatever is queued in batches of up to BATCH_SIZE messages with
+        a single write and flush of stdout, so callers never block on a slow terminal or pipe.
+
+        Per host skip banners are counted rather than written, and are written as one summary line
+        per task on flush.
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.lock = threading.Lock()
+        self.queue: "queue.Queue[_QueueItem]" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+        self.atexit_registered = False
+
+    def _ensure_started(self) -> None:
+        """
+        Start the writer thread if it is not running in this process
+
+        Threads do not survive a fork, so a forked worker process (see nornsible.multiprocess) gets
+        a fresh queue and writer thread of its own on first use.
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(
+                target=self._drain, args=(self.queue,), name="nornsible-output", daemon=True
+            )
+            self.thread.start()
+            self.pid = os.getpid()
+            if not self.atexit_registered:
+                atexit.register(self.flush)
+                self.atexit_registered = True
+
+    def write(self, message: Message) -> None:
+        """
+        Queue a message to be written to stdout
+
+        Messages written from the main thread are flushed before returning so that they stay in
+        order with anything else the script prints; messages from any other thread are not waited
+        for.
+
+        Arguments:
+            message: string, or callable returning a string, to write; a newline is appended, and
+                empty strings are not written at all
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self._ensure_started()
+        self.queue.put(message)
+        if threading.current_thread() is threading.main_thread():
+            self.flush()
+
+    def skip(self, task_name: str) -> None:
+        """
+        Record that a task was skipped for a host; never blocks
+
+        Arguments:
+            task_name: name of the skipped task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self._ensure_started()
+        self.queue.put(_Skip(task_name))
+
+    def flush(self) -> None:
+        """
+        Write any pending skip summaries and wait for everything queued so far to be written
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if self.pid != os.getpid() or self.thread is None or not self.thread.is_alive():
+            return
+        marker = _Flush()
+        self.queue.put(marker)
+        marker.done.wait()
+
+    def _drain(self, messages: "queue.Queue[_QueueItem]") -> None:
+        """
+        Writer thread loop
+
+        Arguments:
+            messages: queue to drain
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        skipped: Dict[str, int] = {}
+        while True:
+            batch = [messages.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(messages.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: List[str] = []
+            flushes: List[_Flush] = []
+            for message in batch:
+                if isinstance(message, _Skip):
+                    skipped[message.task_name] = skipped.get(message.task_name, 0) + 1
+                elif isinstance(message, _Flush):
+                    lines.extend(_format_skip(n, c) for n, c in skipped.items())
+                    skipped.clear()
+                    flushes.append(message)
+                else:
+                    rendered = _render(message)
+                    if rendered:
+                        lines.append(rendered)
+
+            try:
+                if lines:
+                    sys.stdout.write("\n".join(lines) + "\n")
+                sys.stdout.flush()
+            except Exception:  # pylint: disable=W0703
+                # nothing sensible can be done about a broken stdout, keep draining regardless
+                pass
+            for marker in flushes:
+                marker.done.set()
+
+
+def _render(message: Message) -> str:
+    """
+    Render a queued message
+
+    Arguments:
+        message: string or callable returning a string
+
+    Returns:
+        str: rendered message
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if callable(message):
+        try:
+            return message()
+        except Exception as exc:  # pylint: disable=W0703
+            return f"nornsible failed to render output: {exc!r}"
+    return message
+
+
+def _format_skip(task_name: str, count: int) -> str:
+    """
+    Format the grouped skip banner for a task
+
+    Arguments:
+        task_name: name of the skipped task
+        count: number of hosts the task was skipped for
+
+    Returns:
+        str: skip banner
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from nornsible.decorators import format_message  # pylint: disable=C0415
+
+    return format_message(f"---- skipping task {task_name} on {count} host(s) ")
+
+
+OUTPUT = OutputWriter()
+
+
+def flush_output() -> None:
+    """
+    Wait for all queued nornsible output to be written to stdout
+
+    Nornsible flushes at the end of each run and at exit; call this before writing directly to
+    stdout from a thread other than the main thread if ordering matters.
+
+    Arguments:
+        N/A  # noqa
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    OUTPUT.flush()
@@ -0,0 +1,180 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import time
+from typing import Dict, Iterable, List, Optional
+
+from nornir.core import Nornir
+from nornir.core.configuration import Config
+from nornir.core.inventory import Group, Host
+from nornir.core.task import AggregatedResult, MultiResult, Result, Task
+
+from nornsible.decorators import nornsible_task_message
+
+
+# host (or group/defaults) var listing the connections to prewarm; if not set, every connection
+# with connection_options anywhere in the host's inventory is prewarmed
+PREWARM_VAR = "nornsible_prewarm"
+
+PREWARM_WORKERS = 100
+PREWARM_TIMEOUT = 30.0
+# seconds between checks for hosts that exceeded the prewarm timeout
+POLL_INTERVAL = 0.1
+
+
+def _group_connections(groups: Iterable[Group]) -> List[str]:
+    """
+    Recursively collect the names of connections with connection_options set in groups
+
+    Arguments:
+        groups: nornir.core.inventory.Group objects to inspect
+
+    Returns:
+        connections: list of connection names, may contain duplicates
+
+    Raises:
+        N/A  # noqa
+
+    """
+    connections: List[str] = []
+    for group in groups:
+        connections.extend(group.connection_options)
+        connections.extend(_group_connections(group.groups.refs))
+    return connections
+
+
+def host_connections(host: Host) -> List[str]:
+    """
+    Determine the connections to prewarm for a host
+
+    Arguments:
+        host: nornir.core.inventory.Host object
+
+    Returns:
+        connections: deduplicated list of connection plugin names
+
+    Raises:
+        N/A  # noqa
+
+    """
+    connections = host.get(PREWARM_VAR)
+    if connections is None:
+        connections = list(host.connection_options)
+        connections.extend(_group_connections(host.groups.refs))
+        connections.extend(host.defaults.connection_options)
+    elif isinstance(connections, str):
+        connections = connections.split(",")
+    return list(dict.fromkeys(connections))
+
+
+def _open_connections(host: Host, connections: List[str], config: Config) -> List[str]:
+    """
+    Open (if not already open) connections to a host; runs on a prewarm worker thread
+
+    Arguments:
+        host: nornir.core.inventory.Host object
+        connections: names of the connection plugins to open
+        config: nornir.core.configuration.Config object
+
+    Returns:
+        connections: names of the opened connections
+
+    Raises:
+        N/A  # noqa
+
+    """
+    for connection in connections:
+        host.get_connection(connection, config)
+    return connections
+
+
+def prewarm(
+    nr: Nornir,
+    num_workers: int = PREWARM_WORKERS,
+    timeout: float = PREWARM_TIMEOUT,
+    connections: Optional[List[str]] = None,
+) -> AggregatedResult:
+    """
+    Open the connections of every selected host before any task runs
+
+    Connections are opened on a dedicated pool of num_workers threads, so connection setup (often
+    the long tail of the first task) can run at a higher concurrency than the tasks themselves.
+    Hosts that fail to connect, or are still connecting timeout seconds after they started, are
+    marked as failed so that they are not scheduled for any further (on_good) tasks.
+
+    Processors see a "prewarm" task, so the retry file, recap and json output all account for
+    hosts dropped here. Per host events are fired from the calling thread as each host completes.
+
+    Worker processes (see --processes) do not use connections opened here, as their sockets and
+    transport threads do not survive the fork; each worker process opens its own.
+
+    Arguments:
+        nr: Nornir object
+        num_workers: maximum number of hosts to connect to concurrently
+        timeout: seconds each host may take to open all of its connections
+        connections: (optional) connection plugin names to open on every host; by default those
+            named in each host's inventory, see host_connections
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the prewarm, one Result per host
+
+    Raises:
+        N/A  # noqa
+
+    """
+    nornir_task = Task(_open_connections, name="prewarm")
+    agg_result = AggregatedResult(nornir_task.name)
+    host_names = {
+        name: connections or host_connections(host)
+        for name, host in nr.inventory.hosts.items()
+        if name != "delegate" and name not in nr.data.failed_hosts
+    }
+
+    def completed(host: Host, result: Result) -> None:
+        result.name = nornir_task.name
+        multi_result = MultiResult(nornir_task.name)
+        multi_result.append(result)
+        agg_result[host.name] = multi_result
+        host_task = nornir_task.copy()
+        host_task.host, host_task.nornir = host, nr
+        nr.processors.task_instance_started(host_task, host)
+        nr.processors.task_instance_completed(host_task, host, multi_result)
+
+    nr.processors.task_started(nornir_task)
+    started: Dict[str, float] = {}
+
+    def open_host(host: Host) -> List[str]:
+        started[host.name] = time.monotonic()
+        return _open_connections(host, host_names[host.name], nr.config)
+
+    pool = ThreadPoolExecutor(max(num_workers, 1), thread_name_prefix="nornsible-prewarm")
+    pending: Dict[Future, Host] = {
+        pool.submit(open_host, nr.inventory.hosts[name]): nr.inventory.hosts[name]
+        for name, names in host_names.items()
+        if names
+    }
+    while pending:
+        done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        for future in done:
+            host = pending.pop(future)
+            exception = future.exception()
+            if exception is None:
+                completed(host, Result(host, result=future.result()))
+            else:
+                result = f"{type(exception).__name__}: {exception}"
+                completed(host, Result(host, result=result, exception=exception, failed=True))
+        now = time.monotonic()
+        for future, host in list(pending.items()):
+            if host.name in started and now - started[host.name] > timeout:
+                # the worker can not be interrupted; whatever it opens late is simply not used
+                del pending[future]
+                exception = TimeoutError(f"connecting timed out after {timeout}s")
+                result = str(exception)
+                completed(host, Result(host, result=result, exception=exception, failed=True))
+    pool.shutdown(wait=False)
+
+    failed_hosts = agg_result.failed_hosts
+    nr.data.failed_hosts.update(failed_hosts.keys())
+    if failed_hosts:
+        msg = f"---- prewarm failed on {len(failed_hosts)} host(s) "
+        nornsible_task_message(msg, critical=True)
+    nr.processors.task_completed(nornir_task, agg_result)
+    return agg_result
@@ -0,0 +1,433 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Task
+
+from nornsible.functions import _render_host, _render_title
+from nornsible.output import OUTPUT
+from nornsible.results import FilteredMultiResult, is_skipped, is_unscheduled, mark_streamed
+
+
+class NornsibleProcessor:
+    """
+    Base nornir processor implementing every processor method as a no-op
+
+    Nornir requires processors to implement each method of its Processor protocol; nornsible
+    processors subclass this and override only the events they care about.
+
+    """
+
+    # pylint: disable=W0613
+
+    # processors are forked into (and run in) each worker process when hosts are split across
+    # processes; processors that must see every host in the parent process set this to False and
+    # have task_instance_completed replayed there instead
+    per_process = True
+
+    def task_started(self, task: Task) -> None:
+        pass
+
+    def task_completed(self, task: Task, result: AggregatedResult) -> None:
+        pass
+
+    def task_instance_started(self, task: Task, host: Host) -> None:
+        pass
+
+    def task_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
+        pass
+
+    def subtask_instance_started(self, task: Task, host: Host) -> None:
+        pass
+
+    def subtask_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
+        pass
+
+    def flush(self) -> None:
+        """
+        Flush anything buffered; called by nornsible before a worker process returns its results
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+
+
+class RetryFileProcessor(NornsibleProcessor):
+    def __init__(self, retry_file: str) -> None:
+        """
+        Write failed hosts to a retry file as soon as they fail
+
+        The retry file is truncated when the processor is created, and each failed host is appended
+        (and flushed) as it fails, so an aborted run still leaves a usable list of failed hosts.
+
+        Arguments:
+            retry_file: path to the retry file
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.retry_file = retry_file
+        self.failed_hosts: Set[str] = set()
+        self.lock = threading.Lock()
+        with open(self.retry_file, "w"):
+            pass
+
+    def task_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
+        """
+        Append host to the retry file if it failed and has not already been recorded
+
+        Arguments:
+            task: nornir.core.task.Task that completed
+            host: nornir.core.inventory.Host the task completed on
+            result: nornir.core.task.MultiResult of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if not result.failed or host.name == "delegate" or host.name in self.failed_hosts:
+            return
+        with self.lock:
+            if host.name in self.failed_hosts:
+                return
+            self.failed_hosts.add(host.name)
+            with open(self.retry_file, "a") as f:
+                f.write(f"{host.name}\n")
+
+
+class StreamingResultProcessor(NornsibleProcessor):
+    def __init__(
+        self,
+        attrs: Optional[List[str]] = None,
+        severity_level: int = logging.INFO,
+        keep_results: bool = False,
+    ) -> None:
+        """
+        Write each host's results to the nornsible output writer as soon as the host completes
+
+        Results are written in the same format (and with the same skip filtering) as print_result,
+        and are marked as streamed so that a later print_result of the AggregatedResult does not
+        write them a second time. Unless keep_results is set, the payload (result, diff, stdout and
+        stderr) of each streamed result is dropped once rendered so the run only holds on to the
+        status (failed, changed, exception) of each host; processors that read payloads (i.e.
+        JsonLinesProcessor with payload) must therefore come before this one.
+
+        Arguments:
+            attrs: attributes of the result(s) to write; defaults to diff, result and stdout
+            severity_level: write only results with this severity level or higher
+            keep_results: keep result payloads after writing them
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.attrs = attrs or ["diff", "result", "stdout"]
+        self.severity_level = severity_level
+        self.keep_results = keep_results
+        self.titled: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def task_started(self, task: Task) -> None:
+        """
+        Reset the title state of a task, so each run of a task gets its own title banner
+
+        Arguments:
+            task: nornir.core.task.Task that started
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            self.titled.discard(task.name)
+
+    def task_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
+        """
+        Queue the (non skipped) results of a host to be written, then drop their payloads
+
+        Arguments:
+            task: nornir.core.task.Task that completed
+            host: nornir.core.inventory.Host the task completed on
+            result: nornir.core.task.MultiResult of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if all(is_skipped(r) for r in result):
+            return
+        with self.lock:
+            needs_title = task.name not in self.titled
+            self.titled.add(task.name)
+        mark_streamed(result)
+        lines: List[str] = []
+        if needs_title:
+            _render_title(task.name, lines)
+        _render_host(
+            host.name, FilteredMultiResult(result), self.attrs, False, self.severity_level, lines
+        )
+        OUTPUT.write("\n".join(lines))
+        if not self.keep_results:
+            for r in result:
+                if not is_skipped(r):
+                    r.result = r.stdout = r.stderr = None
+                    r.diff = ""
+
+
+def result_status(result: MultiResult) -> str:
+    """
+    Summarize a host's MultiResult as ok, changed, failed or skipped
+
+    Arguments:
+        result: nornir.core.task.MultiResult of a task for a host
+
+    Returns:
+        str: status of the result
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if result.failed:
+        return "failed"
+    if all(is_skipped(r) for r in result):
+        return "skipped"
+    if result.changed:
+        return "changed"
+    return "ok"
+
+
+class JsonLinesProcessor(NornsibleProcessor):
+    def __init__(self, output: str, payload: bool = False, buffer_size: int = 65536) -> None:
+        """
+        Write one json object per host per task, as results arrive, to a file or stdout
+
+        Each line holds the host, task, status (ok/changed/failed/skipped), duration in seconds
+        and, if payload is set, the (non skipped) results of the task. Lines are buffered and
+        written once buffer_size bytes are pending, and at the end of each task; each batch is
+        written with a single append so worker processes can share the file. Output files ending
+        in ".gz" are gzip compressed (as one gzip member per batch, which gzip readers treat as a
+        single stream). An output of "-" writes to stdout via the nornsible output writer.
+
+        Arguments:
+            output: path of the file to write, or "-" for stdout
+            payload: include result payloads
+            buffer_size: number of bytes to buffer before writing
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.output = output
+        self.payload = payload
+        self.buffer_size = buffer_size
+        self.compress = output.endswith(".gz")
+        self.lock = threading.Lock()
+        self.batch: List[str] = []
+        self.batch_size = 0
+        self.pid = os.getpid()
+        if output != "-":
+            with open(output, "wb"):
+                pass
+            atexit.register(self.flush)
+
+    def task_instance_started(self, task: Task, host: Host) -> None:
+        """
+        Record the start time of a task instance
+
+        Arguments:
+            task: nornir.core.task.Task that started
+            host: nornir.core.inventory.Host the task started on
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        task.nornsible_started = time.monotonic()
+
+    def task_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
+        """
+        Queue the json line for a completed task instance
+
+        Arguments:
+            task: nornir.core.task.Task that completed
+            host: nornir.core.inventory.Host the task completed on
+            result: nornir.core.task.MultiResult of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        started = getattr(task, "nornsible_started", None)
+        duration = time.monotonic() - started if started is not None else 0.0
+        self._write(self._line(task.name, host.name, result, duration))
+
+    def task_completed(self, task: Task, result: AggregatedResult) -> None:
+        """
+        Queue json lines for hosts the task was never scheduled on, then flush
+
+        Arguments:
+            task: nornir.core.task.Task that completed
+            result: nornir.core.task.AggregatedResult of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        for host, multi_result in result.items():
+            if is_unscheduled(multi_result):
+                self._write(self._line(result.name, host, multi_result, 0.0))
+        self.flush()
+
+    def _line(self, task: str, host: str, result: MultiResult, duration: float) -> str:
+        """
+        Build the json line for a host's result
+
+        Arguments:
+            task: name of the task
+            host: name of the host
+            result: nornir.core.task.MultiResult of the task for the host
+            duration: duration of the task for the host in seconds
+
+        Returns:
+            str: json encoded line
+
+        Raises:
+            N/A  # noqa
+
+        """
+        record: Dict[str, Any] = {
+            "host": host,
+            "task": task,
+            "status": result_status(result),
+            "duration": round(duration, 6),
+        }
+        if self.payload:
+            record["payload"] = [
+                {
+                    "name": r.name,
+                    "result": r.result,
+                    "diff": r.diff,
+                    "changed": r.changed,
+                    "failed": r.failed,
+                    "exception": repr(r.exception) if r.exception else None,
+                }
+                for r in FilteredMultiResult(result)
+            ]
+        return json.dumps(record, default=repr)
+
+    def _write(self, line: str) -> None:
+        """
+        Buffer a line, writing the batch out once buffer_size bytes are pending
+
+        Arguments:
+            line: json encoded line
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if self.output == "-":
+            OUTPUT.write(line)
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                # forked worker process; whatever was pending belongs to (and is written by) the
+                # parent
+                self.batch, self.batch_size, self.pid = [], 0, os.getpid()
+            self.batch.append(line)
+            self.batch_size += len(line) + 1
+            if self.batch_size >= self.buffer_size:
+                self._write_batch()
+
+    def _write_batch(self) -> None:
+        """
+        Write the pending batch with a single append; caller must hold the lock
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if not self.batch:
+            return
+        data = ("\n".join(self.batch) + "\n").encode()
+        self.batch, self.batch_size = [], 0
+        if self.compress:
+            import gzip  # pylint: disable=C0415
+
+            data = gzip.compress(data)
+        fd = os.open(self.output, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+        finally:
+            os.close(fd)
+
+    def flush(self) -> None:
+        """
+        Write out any pending lines
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                self.batch, self.batch_size, self.pid = [], 0, os.getpid()
+            self._write_batch()
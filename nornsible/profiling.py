@@ -0,0 +1,149 @@
+import io
+import threading
+from typing import Any, Callable, List, Optional, TYPE_CHECKING
+
+from nornsible.output import OUTPUT
+
+if TYPE_CHECKING:
+    import cProfile  # noqa
+
+
+# number of functions listed in the summary printed at the end of a profiled run
+SUMMARY_LINES = 20
+
+
+class RunProfiler:
+    def __init__(self, path: str) -> None:
+        """
+        Profile the main thread and every nornir worker thread running nornsible wrapped tasks
+
+        Each worker thread gets its own cProfile.Profile, enabled only while a (top level)
+        nornsible_task/nornsible_delegate task runs on it; at the end of the run all profiles are
+        merged into a single pstats file.
+
+        Arguments:
+            path: path of the pstats file to write
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        import cProfile  # pylint: disable=C0415
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.main = cProfile.Profile()
+        self.profiles: List["cProfile.Profile"] = []
+        self.finished = False
+
+    def start(self) -> None:
+        """
+        Start profiling the main thread
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.main.enable()
+
+    def runcall(self, func: Callable, *args: Any) -> Any:
+        """
+        Call func under the calling (worker) thread's profiler
+
+        Arguments:
+            func: function to call
+            *args: arguments for func
+
+        Returns:
+            Any: return value of func
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if threading.current_thread() is threading.main_thread():
+            # already covered by the main thread profiler, i.e. with -w 1
+            return func(*args)
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            profile = self.local.profile = type(self.main)()
+            with self.lock:
+                self.profiles.append(profile)
+        try:
+            profile.enable()
+        except ValueError:
+            # python 3.12+ allows only one active profiler per interpreter
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+
+    def finish(self) -> None:
+        """
+        Stop profiling, merge all profiles, write the pstats file and print a short summary
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        import pstats  # pylint: disable=C0415
+
+        if self.finished:
+            return
+        self.finished = True
+        self.main.disable()
+        stats = pstats.Stats(self.main)
+        with self.lock:
+            for profile in self.profiles:
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    # profile of a thread that never ran anything has no stats to add
+                    continue
+        stats.dump_stats(self.path)
+
+        summary = io.StringIO()
+        stats.stream = summary  # type: ignore
+        stats.sort_stats("cumulative").print_stats(SUMMARY_LINES)
+        OUTPUT.write(f"profile of {len(self.profiles) + 1} thread(s) written to {self.path}")
+        OUTPUT.write(summary.getvalue().strip("\n"))
+
+
+PROFILER: Optional[RunProfiler] = None
+
+
+def start_profiling(path: str) -> RunProfiler:
+    """
+    Start profiling the run; see RunProfiler
+
+    Arguments:
+        path: path of the pstats file to write when the run ends
+
+    Returns:
+        profiler: RunProfiler
+
+    Raises:
+        N/A  # noqa
+
+    """
+    global PROFILER  # pylint: disable=W0603
+    PROFILER = RunProfiler(path)
+    PROFILER.start()
+    return PROFILER
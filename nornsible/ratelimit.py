@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from nornir.core.inventory import Host
+
+
+# --rate-scope prefix scoping the rate limit to the hosts of one group
+GROUP_SCOPE = "group:"
+
+
+class GCRA:
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """
+        Token bucket rate limiter, implemented as a generic cell rate algorithm (GCRA)
+
+        Rather than refilling tokens, GCRA keeps a single "theoretical arrival time"; each caller
+        reserves the next free slot under a lock and then sleeps (once) until its slot, so callers
+        are served in the order they arrive and nobody spins.
+
+        Arguments:
+            rate: sustained number of starts per second
+            burst: number of starts allowed at once after a quiet period
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            ValueError: if rate or burst is not positive
+
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.interval = 1 / rate
+        self.tolerance = self.interval * (burst - 1)
+        self.lock = threading.Lock()
+        self.tat = 0.0
+
+    def reserve(self) -> float:
+        """
+        Reserve the next start slot
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            float: seconds to wait before starting
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            now = time.monotonic()
+            tat = max(self.tat, now)
+            self.tat = tat + self.interval
+            return max(tat - self.tolerance - now, 0.0)
+
+
+class RateLimit:
+    def __init__(self, rate: float, burst: int = 1, scope: Optional[str] = None) -> None:
+        """
+        Rate limit of nornsible_task starts, either for every host together or per scope
+
+        With a scope of "group:NAME" only hosts in group NAME (directly or via a parent group) are
+        limited, sharing one bucket; any other scope is a host variable name, with one bucket per
+        distinct value of it (i.e. per jump host), and hosts that do not have it are not limited.
+
+        Arguments:
+            rate: sustained number of starts per second (per bucket)
+            burst: number of starts allowed at once after a quiet period
+            scope: (optional) "group:NAME" or host variable name
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            ValueError: if rate or burst is not positive
+
+        """
+        self.rate = rate
+        self.burst = burst
+        self.scope = scope
+        self.lock = threading.Lock()
+        self.buckets: Dict[Optional[str], GCRA] = {}
+        # validate rate and burst up front
+        GCRA(rate, burst)
+
+    def _key(self, host: Host) -> Optional[str]:
+        if self.scope is None:
+            return ""
+        if self.scope.startswith(GROUP_SCOPE):
+            group = self.scope[len(GROUP_SCOPE) :]
+            return group if host.has_parent_group(group) else None
+        value = host.get(self.scope)
+        return None if value is None else str(value)
+
+    def bucket(self, host: Host) -> Optional[GCRA]:
+        """
+        Get the bucket a host's task starts are limited by
+
+        Arguments:
+            host: nornir.core.inventory.Host object
+
+        Returns:
+            bucket: GCRA of the host's scope, or None if the host is not limited
+
+        Raises:
+            N/A  # noqa
+
+        """
+        key = self._key(host)
+        if key is None:
+            return None
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.setdefault(key, GCRA(self.rate, self.burst))
+        return bucket
+
+    def reserve(self, host: Host) -> float:
+        """
+        Reserve the next start slot for a host
+
+        Arguments:
+            host: nornir.core.inventory.Host object
+
+        Returns:
+            float: seconds to wait before starting
+
+        Raises:
+            N/A  # noqa
+
+        """
+        bucket = self.bucket(host)
+        return 0.0 if bucket is None else bucket.reserve()
+
+    def acquire(self, host: Host) -> None:
+        """
+        Wait until a host may start a task
+
+        Arguments:
+            host: nornir.core.inventory.Host object
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        delay = self.reserve(host)
+        if delay:
+            time.sleep(delay)
+
+    def share(self, parts: int) -> "RateLimit":
+        """
+        Get a fresh rate limit with a 1/parts share of the rate and burst, i.e. for each of parts
+        worker processes
+
+        Arguments:
+            parts: number of parts to share the rate limit between
+
+        Returns:
+            rate_limit: RateLimit
+
+        Raises:
+            N/A  # noqa
+
+        """
+        return RateLimit(self.rate / parts, max(self.burst // parts, 1), self.scope)
@@ -0,0 +1,163 @@
+from typing import Dict, List
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Task
+
+from nornsible.output import OUTPUT
+from nornsible.processors import NornsibleProcessor, result_status
+from nornsible.results import is_unscheduled
+
+
+class HostRecap:
+    """
+    Counters of task outcomes for a single host; "ok" includes "changed", as with Ansible
+
+    """
+
+    __slots__ = ("ok", "changed", "failed", "skipped")
+
+    def __init__(self) -> None:
+        self.ok = 0
+        self.changed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def count(self, status: str) -> None:
+        """
+        Count a task outcome
+
+        Arguments:
+            status: status of the task as returned by nornsible.processors.result_status
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if status == "failed":
+            self.failed += 1
+        elif status == "skipped":
+            self.skipped += 1
+        else:
+            self.ok += 1
+            if status == "changed":
+                self.changed += 1
+
+
+class RecapProcessor(NornsibleProcessor):
+    # counters must be kept in the parent process; see nornsible.multiprocess
+    per_process = False
+
+    def __init__(self) -> None:
+        """
+        Keep per host counters of ok/changed/failed/skipped tasks as each host completes a task
+
+        Each completed task instance costs a single counter increment, so the recap is ready the
+        moment the run ends. Each host's counters are only updated by the worker running that
+        host (or by the main thread once the task has completed), so no locking is required.
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.hosts: Dict[str, HostRecap] = {}
+
+    def _host(self, host: str) -> HostRecap:
+        recap = self.hosts.get(host)
+        if recap is None:
+            recap = self.hosts.setdefault(host, HostRecap())
+        return recap
+
+    def task_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
+        """
+        Count the outcome of a task for a host
+
+        Arguments:
+            task: nornir.core.task.Task that completed
+            host: nornir.core.inventory.Host the task completed on
+            result: nornir.core.task.MultiResult of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self._host(host.name).count(result_status(result))
+
+    def task_completed(self, task: Task, result: AggregatedResult) -> None:
+        """
+        Count skips for hosts the task was never scheduled on
+
+        Arguments:
+            task: nornir.core.task.Task that completed
+            result: nornir.core.task.AggregatedResult of the task
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        for host, multi_result in result.items():
+            if is_unscheduled(multi_result):
+                self._host(host).skipped += 1
+
+    def format_recap(self) -> str:
+        """
+        Format an Ansible style "PLAY RECAP" of every host except the delegate host
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            str: formatted recap
+
+        Raises:
+            N/A  # noqa
+
+        """
+        from colorama import Fore, Style  # pylint: disable=C0415
+
+        msg = "PLAY RECAP "
+        lines: List[str] = [f"{Style.BRIGHT}{Fore.CYAN}{msg}{'*' * (80 - len(msg))}"]
+        for host, recap in sorted(self.hosts.items()):
+            if host == "delegate":
+                continue
+            if recap.failed:
+                color = Fore.RED
+            elif recap.changed:
+                color = Fore.YELLOW
+            else:
+                color = Fore.GREEN
+            lines.append(
+                f"{Style.BRIGHT}{color}{host:<26}{Style.RESET_ALL} : ok={recap.ok:<4} "
+                f"changed={recap.changed:<4} failed={recap.failed:<4} skipped={recap.skipped:<4}"
+            )
+        return "\n".join(lines)
+
+    def print_recap(self) -> None:
+        """
+        Print the recap via the nornsible output writer
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        OUTPUT.write(self.format_recap)
@@ -0,0 +1,224 @@
+from itertools import islice
+from typing import Any, Iterator, Mapping, Optional, Sequence
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Result
+
+
+SKIPPED = "Task skipped!"
+SKIPPED_DELEGATE = "Task skipped, delegate host!"
+SKIPPED_NON_DELEGATE = "Task skipped, non-delegate host!"
+SKIPPED_RESUMED = "Task skipped, already completed!"
+
+
+class SkippedResult(Result):
+    """
+    Result of a task nornsible skipped
+
+    Skipped results are identified by the "skipped" class attribute rather than by inspecting the
+    result payload. A new SkippedResult is built for each skip, as nornir sets the name and
+    severity_level of each result a task returns.
+
+    """
+
+    skipped = True
+
+    def __init__(self, host: Optional[Host], reason: str, unscheduled: bool = False) -> None:
+        super().__init__(host=host, result=reason, failed=False, changed=False)
+        self.unscheduled = unscheduled
+
+
+def skipped_result(
+    host: Optional[Host], reason: str = SKIPPED, unscheduled: bool = False
+) -> SkippedResult:
+    """
+    Build a skipped result for a host and skip reason
+
+    Arguments:
+        host: host the task was skipped for
+        reason: reason the task was skipped
+        unscheduled: the host was skipped by nornsible run without being scheduled at all
+
+    Returns:
+        result: SkippedResult
+
+    Raises:
+        N/A  # noqa
+
+    """
+    return SkippedResult(host, reason, unscheduled)
+
+
+def is_skipped(result: Any) -> bool:
+    """
+    Determine if a Result (or MultiResult) was skipped by nornsible
+
+    Arguments:
+        result: nornir Result or MultiResult
+
+    Returns:
+        bool: True if result was skipped
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if isinstance(result, MultiResult):
+        # MultiResult delegates attribute lookups to its first result, and explodes if empty
+        return bool(result) and getattr(result[0], "skipped", False) is True
+    return getattr(result, "skipped", False) is True
+
+
+def is_unscheduled(result: Any) -> bool:
+    """
+    Determine if a host's MultiResult is a skip of a host the task was never scheduled on
+
+    Tasks skipped by tags or by --resume, and delegate tasks on non-delegate hosts, are resolved by
+    nornsible run without scheduling each host, so processors see no task instance events for those
+    hosts; their results carry a SkippedResult marked as unscheduled.
+
+    Arguments:
+        result: nornir MultiResult
+
+    Returns:
+        bool: True if result is the result of an unscheduled host
+
+    Raises:
+        N/A  # noqa
+
+    """
+    return is_skipped(result) and result[0].unscheduled is True
+
+
+def mark_streamed(result: MultiResult) -> None:
+    """
+    Mark a host's MultiResult as already written out by the StreamingResultProcessor
+
+    Arguments:
+        result: nornir MultiResult
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        N/A  # noqa
+
+    """
+    result.nornsible_streamed = True
+
+
+def is_streamed(result: Any) -> bool:
+    """
+    Determine if a host's MultiResult was already written out by the StreamingResultProcessor
+
+    Arguments:
+        result: nornir MultiResult (or Result)
+
+    Returns:
+        bool: True if result was streamed
+
+    Raises:
+        N/A  # noqa
+
+    """
+    # checked via vars as MultiResult delegates missing attributes to its (possibly absent) first
+    # result
+    return vars(result).get("nornsible_streamed", False) is True
+
+
+class FilteredMultiResult(Sequence[Result]):
+    def __init__(self, multi_result: MultiResult) -> None:
+        """
+        Read-only view of a MultiResult that lazily omits nornsible skipped results
+
+        Nothing is copied; the view iterates the wrapped MultiResult on demand.
+
+        Arguments:
+            multi_result: nornir MultiResult to wrap
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.multi_result = multi_result
+        self.name = multi_result.name
+
+    def __iter__(self) -> Iterator[Result]:
+        return (r for r in self.multi_result if not is_skipped(r))
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            return list(self)[index]
+        try:
+            return next(islice(iter(self), index, None))
+        except StopIteration:
+            raise IndexError("FilteredMultiResult index out of range") from None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        return any(True for _ in self)
+
+    @property
+    def failed(self) -> bool:
+        return any(r.failed for r in self)
+
+    @property
+    def changed(self) -> bool:
+        return any(r.changed for r in self)
+
+
+class FilteredAggregatedResult(Mapping[str, FilteredMultiResult]):
+    def __init__(self, agg_result: AggregatedResult, include_streamed: bool = False) -> None:
+        """
+        Read-only view of an AggregatedResult that lazily omits nornsible skipped results
+
+        Hosts are included only if they have at least one result that was not skipped (and, unless
+        include_streamed is set, were not already written out by the StreamingResultProcessor);
+        each host maps to a FilteredMultiResult view of its results. Nothing is copied, so this is
+        safe to use on results with very large payloads.
+
+        Arguments:
+            agg_result: nornir AggregatedResult to wrap
+            include_streamed: include hosts whose results were already streamed
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.agg_result = agg_result
+        self.name = agg_result.name
+        self.include_streamed = include_streamed
+
+    def _visible(self, multi_result: MultiResult) -> bool:
+        if not self.include_streamed and is_streamed(multi_result):
+            return False
+        return any(not is_skipped(r) for r in multi_result)
+
+    def __getitem__(self, host: str) -> FilteredMultiResult:
+        multi_result = self.agg_result[host]
+        if not self._visible(multi_result):
+            raise KeyError(host)
+        return FilteredMultiResult(multi_result)
+
+    def __iter__(self) -> Iterator[str]:
+        return (h for h, r in self.agg_result.items() if self._visible(r))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        return any(True for _ in self)
+
+    @property
+    def failed(self) -> bool:
+        return any(r.failed for r in self.values())
@@ -0,0 +1,199 @@
+import atexit
+import os
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+from nornir.core.task import Result
+
+
+KEEP_ALL = "all"
+STATUS_ONLY = "status"
+SPILL = "spill"
+RETENTION_MODES = (KEEP_ALL, STATUS_ONLY, SPILL)
+
+# default size (in bytes) over which payloads are spilled to disk
+SPILL_THRESHOLD = 1048576
+
+PAYLOAD_ATTRS = ("result", "diff", "stdout", "stderr")
+
+_MISSING = object()
+
+
+def _payload_accessors(attr: str) -> Tuple[Callable, Callable]:
+    """
+    Build the getter and setter of a SpilledResult payload attribute property
+
+    Arguments:
+        attr: name of the payload attribute
+
+    Returns:
+        tuple: getter and setter
+
+    Raises:
+        N/A  # noqa
+
+    """
+
+    def getter(self: "SpilledResult") -> Any:
+        return self._payload(attr)  # pylint: disable=W0212
+
+    def setter(self: "SpilledResult", value: Any) -> None:
+        # the instance dict, as setattr would recurse into this property setter
+        self.__dict__[attr] = value
+
+    return getter, setter
+
+
+class SpilledResult(Result):
+    """
+    Result whose payload attributes were spilled to disk; reloaded (and cached) on first access
+
+    The class of a Result is swapped to SpilledResult when its payload is spilled, the payload
+    attributes are then served by the properties below in place of the instance attributes.
+
+    """
+
+    def _payload(self, attr: str) -> Any:
+        value = self.__dict__.get(attr, _MISSING)
+        if value is _MISSING:
+            import gzip  # pylint: disable=C0415
+            import pickle  # pylint: disable=C0415
+
+            with gzip.open(self.__dict__["nornsible_spill_file"], "rb") as f:
+                payload = pickle.load(f)
+            self.__dict__.update(payload)
+            value = payload[attr]
+        return value
+
+    result = property(*_payload_accessors("result"))
+    diff = property(*_payload_accessors("diff"))
+    stdout = property(*_payload_accessors("stdout"))
+    stderr = property(*_payload_accessors("stderr"))
+
+
+class RetentionPolicy:
+    def __init__(
+        self,
+        mode: str = KEEP_ALL,
+        spill_threshold: int = SPILL_THRESHOLD,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        """
+        How much of each result nornsible tasks hold on to once they complete
+
+        "all" keeps results untouched; "status" drops the payload (result, diff, stdout and stderr)
+        of every result, keeping only its status (failed, changed, exception); "spill" writes any
+        payload larger than spill_threshold bytes to a gzip compressed file in spill_dir, which is
+        transparently reloaded when the payload is next accessed.
+
+        Arguments:
+            mode: one of "all", "status" or "spill"
+            spill_threshold: size in bytes over which payloads are spilled
+            spill_dir: directory to spill payloads to; if not provided a temporary directory,
+                removed at exit, is created on first spill
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            ValueError: if mode is not a valid retention mode
+
+        """
+        if mode not in RETENTION_MODES:
+            raise ValueError(f"retention mode must be one of {', '.join(RETENTION_MODES)}")
+        self.mode = mode
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.lock = threading.Lock()
+
+    def ensure_spill_dir(self) -> str:
+        """
+        Get the spill directory, creating a temporary one if none was provided
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            str: spill directory
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if self.spill_dir is None:
+            with self.lock:
+                if self.spill_dir is None:
+                    import shutil  # pylint: disable=C0415
+                    import tempfile  # pylint: disable=C0415
+
+                    spill_dir = tempfile.mkdtemp(prefix="nornsible-spill-")
+                    atexit.register(shutil.rmtree, spill_dir, True)
+                    self.spill_dir = spill_dir
+        return self.spill_dir
+
+    def retain(self, result: Result) -> None:
+        """
+        Apply the retention policy to a result, in place
+
+        Arguments:
+            result: nornir Result
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if self.mode == KEEP_ALL or getattr(result, "skipped", False):
+            return
+        if self.mode == STATUS_ONLY:
+            result.result = result.stdout = result.stderr = None
+            result.diff = ""
+            return
+        if isinstance(result, SpilledResult) or "nornsible_spill_file" in vars(result):
+            return
+
+        payload = {attr: getattr(result, attr, None) for attr in PAYLOAD_ATTRS}
+        if all(isinstance(v, (str, type(None))) for v in payload.values()):
+            # cheap size check for the common case of text payloads
+            if sum(len(v) for v in payload.values() if v) <= self.spill_threshold:
+                return
+        import gzip  # pylint: disable=C0415
+        import pickle  # pylint: disable=C0415
+        import uuid  # pylint: disable=C0415
+
+        try:
+            data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:  # pylint: disable=W0703
+            # payloads that cannot be pickled stay in memory
+            return
+        if len(data) <= self.spill_threshold:
+            return
+
+        spill_file = os.path.join(self.ensure_spill_dir(), f"{uuid.uuid4().hex}.pickle.gz")
+        with gzip.open(spill_file, "wb", compresslevel=1) as f:
+            f.write(data)
+        for attr in PAYLOAD_ATTRS:
+            vars(result).pop(attr, None)
+        result.nornsible_spill_file = spill_file
+        result.__class__ = SpilledResult
+
+
+def get_retention(retention: Any) -> Optional[RetentionPolicy]:
+    """
+    Normalize a retention argument to a RetentionPolicy
+
+    Arguments:
+        retention: None, a retention mode string, or a RetentionPolicy
+
+    Returns:
+        policy: RetentionPolicy or None
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if retention is None or isinstance(retention, RetentionPolicy):
+        return retention
+    return RetentionPolicy(retention)
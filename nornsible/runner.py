@@ -0,0 +1,384 @@
+from typing import Any, Callable, List, Optional, Set
+
+from nornir.core import Nornir
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Task
+
+from nornsible import tracing
+from nornsible.cache import flush_cache
+from nornsible.decorators import nornsible_task_message
+from nornsible.journal import journal_key
+from nornsible.output import OUTPUT
+from nornsible.results import (
+    SKIPPED,
+    SKIPPED_DELEGATE,
+    SKIPPED_NON_DELEGATE,
+    SKIPPED_RESUMED,
+    skipped_result,
+)
+
+
+def _selected_hosts(nr: Nornir, on_good: bool, on_failed: bool) -> List[Host]:
+    """
+    Select hosts to run a task against in the same way nornir run does
+
+    Arguments:
+        nr: Nornir object
+        on_good: include hosts not marked as failed
+        on_failed: include hosts marked as failed
+
+    Returns:
+        hosts: list of selected hosts
+
+    Raises:
+        N/A  # noqa
+
+    """
+    hosts: List[Host] = []
+    if on_good:
+        hosts.extend(h for n, h in nr.inventory.hosts.items() if n not in nr.data.failed_hosts)
+    if on_failed:
+        hosts.extend(h for n, h in nr.inventory.hosts.items() if n in nr.data.failed_hosts)
+    return hosts
+
+
+def _skipped_result(name: str, host: Host, reason: str) -> MultiResult:
+    """
+    Build the skipped MultiResult of a host that was not scheduled
+
+    Arguments:
+        name: name of the task
+        host: host the task was skipped for
+        reason: reason the task was skipped
+
+    Returns:
+        multi_result: MultiResult containing an unscheduled SkippedResult for the reason
+
+    Raises:
+        N/A  # noqa
+
+    """
+    multi_result = MultiResult(name)
+    result = skipped_result(host, reason, unscheduled=True)
+    result.name = name
+    multi_result.append(result)
+    return multi_result
+
+
+def _run_skipped(
+    nr: Nornir, task: Callable, on_good: bool, on_failed: bool, **kwargs: Any
+) -> AggregatedResult:
+    """
+    Skip a tag filtered nornsible_task for every host without scheduling any of them
+
+    Processors (if any) see the task start and complete, but no per host task instance events;
+    processors that account for skipped hosts find them in the completed AggregatedResult (see
+    nornsible.results.is_unscheduled).
+
+    Arguments:
+        nr: Nornir object
+        task: nornsible_task wrapped function
+        on_good: include hosts not marked as failed
+        on_failed: include hosts marked as failed
+        **kwargs: keyword arguments passed to the task
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of skipped results
+
+    Raises:
+        N/A  # noqa
+
+    """
+    name = kwargs.get("name") or task.__name__
+    agg_result = AggregatedResult(name)
+    hosts = _selected_hosts(nr, on_good, on_failed)
+    for host in hosts:
+        reason = SKIPPED_DELEGATE if host.name == "delegate" else SKIPPED
+        agg_result[host.name] = _skipped_result(name, host, reason)
+
+    msg = f"---- skipping task {name} on {len(hosts)} host(s) "
+    nornsible_task_message(msg)
+
+    if nr.processors:
+        nornir_task = Task(task, **kwargs)
+        nr.processors.task_started(nornir_task)
+        nr.processors.task_completed(nornir_task, agg_result)
+    return agg_result
+
+
+def _run_delegate(
+    nr: Nornir,
+    task: Callable,
+    raise_on_error: Optional[bool],
+    on_good: bool,
+    on_failed: bool,
+    **kwargs: Any,
+) -> AggregatedResult:
+    """
+    Run a nornsible_delegate task on only the delegate host
+
+    Every other selected host gets a skipped result rather than being scheduled on a worker.
+
+    Arguments:
+        nr: Nornir object
+        task: nornsible_delegate wrapped function
+        raise_on_error: override raise_on_error behavior
+        on_good: run on hosts not marked as failed
+        on_failed: run on hosts marked as failed
+        **kwargs: keyword arguments passed to the task
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    nornir_task = Task(task, **kwargs)
+    agg_result = AggregatedResult(nornir_task.name)
+    hosts = _selected_hosts(nr, on_good, on_failed)
+    delegate = nr.inventory.hosts.get("delegate")
+
+    if delegate is None:
+        msg = f"---- WARNING no delegate available for task {nornir_task.name} "
+        nornsible_task_message(msg, critical=True)
+        for host in hosts:
+            agg_result[host.name] = _skipped_result(nornir_task.name, host, SKIPPED_DELEGATE)
+        nr.processors.task_started(nornir_task)
+        nr.processors.task_completed(nornir_task, agg_result)
+        return agg_result
+
+    nr.processors.task_started(nornir_task)
+    for host in hosts:
+        if host is delegate:
+            agg_result[host.name] = nornir_task.copy().start(host, nr)
+        else:
+            agg_result[host.name] = _skipped_result(
+                nornir_task.name, host, SKIPPED_NON_DELEGATE
+            )
+
+    raise_on_error = raise_on_error if raise_on_error is not None else nr.config.core.raise_on_error
+    if raise_on_error:
+        agg_result.raise_on_error()
+    else:
+        nr.data.failed_hosts.update(agg_result.failed_hosts.keys())
+    nr.processors.task_completed(nornir_task, agg_result)
+    return agg_result
+
+
+def _run_resumed(
+    nr: Nornir,
+    task: Callable,
+    done: Set[str],
+    num_workers: Optional[int],
+    raise_on_error: Optional[bool],
+    on_good: bool,
+    on_failed: bool,
+    **kwargs: Any,
+) -> AggregatedResult:
+    """
+    Run a nornsible_task on only the hosts a resumed journal does not record it as done for
+
+    Hosts the task is already done for get a skipped result, as with tag filtered tasks, rather
+    than being scheduled at all; the rest are handed to the (possibly throttled or
+    multiprocess) nornir scheduler, or the event loop for async tasks.
+
+    Arguments:
+        nr: Nornir object
+        task: nornsible_task wrapped function
+        done: names of hosts the task is done for
+        num_workers: override for how many hosts to run in parallel for this task
+        raise_on_error: override raise_on_error behavior
+        on_good: run on hosts not marked as failed
+        on_failed: run on hosts marked as failed
+        **kwargs: keyword arguments passed to the task
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    nornir_task = Task(task, **kwargs)
+    nr.processors.task_started(nornir_task)
+    hosts = _selected_hosts(nr, on_good, on_failed)
+    run_on = [host for host in hosts if host.name not in done]
+
+    msg = f"---- skipping task {nornir_task.name} on {len(hosts) - len(run_on)} completed host(s) "
+    nornsible_task_message(msg)
+
+    num_workers = num_workers or nr.config.core.num_workers
+    if getattr(task, "nornsible_async", None) is not None:
+        from nornsible.aio import run_async  # pylint: disable=C0415
+
+        agg_result = run_async(nr, nornir_task, run_on, num_workers)
+    elif num_workers == 1:
+        agg_result = nr._run_serial(nornir_task, run_on, **kwargs)  # pylint: disable=W0212
+    else:
+        agg_result = nr._run_parallel(  # pylint: disable=W0212
+            nornir_task, run_on, num_workers, **kwargs
+        )
+    for host in hosts:
+        if host.name in done:
+            agg_result[host.name] = _skipped_result(nornir_task.name, host, SKIPPED_RESUMED)
+
+    raise_on_error = raise_on_error if raise_on_error is not None else nr.config.core.raise_on_error
+    if raise_on_error:
+        agg_result.raise_on_error()
+    else:
+        nr.data.failed_hosts.update(agg_result.failed_hosts.keys())
+    nr.processors.task_completed(nornir_task, agg_result)
+    return agg_result
+
+
+def _run_async(
+    nr: Nornir,
+    task: Callable,
+    num_workers: Optional[int],
+    raise_on_error: Optional[bool],
+    on_good: bool,
+    on_failed: bool,
+    **kwargs: Any,
+) -> AggregatedResult:
+    """
+    Run an async nornsible_task against every selected host on the shared event loop
+
+    Hosts are multiplexed on the event loop (see nornsible.aio) rather than each occupying a nornir
+    worker thread, so num_workers only caps concurrency if passed explicitly. Throttles apply as
+    usual; --processes does not apply to async tasks.
+
+    Arguments:
+        nr: Nornir object
+        task: async nornsible_task wrapped function
+        num_workers: (optional) maximum number of hosts to run concurrently
+        raise_on_error: override raise_on_error behavior
+        on_good: run on hosts not marked as failed
+        on_failed: run on hosts marked as failed
+        **kwargs: keyword arguments passed to the task
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from nornsible.aio import run_async  # pylint: disable=C0415
+
+    nornir_task = Task(task, **kwargs)
+    nr.processors.task_started(nornir_task)
+    agg_result = run_async(nr, nornir_task, _selected_hosts(nr, on_good, on_failed), num_workers)
+
+    raise_on_error = raise_on_error if raise_on_error is not None else nr.config.core.raise_on_error
+    if raise_on_error:
+        agg_result.raise_on_error()
+    else:
+        nr.data.failed_hosts.update(agg_result.failed_hosts.keys())
+    nr.processors.task_completed(nornir_task, agg_result)
+    return agg_result
+
+
+def run(
+    self: Nornir,
+    task: Callable,
+    num_workers: Optional[int] = None,
+    raise_on_error: Optional[bool] = None,
+    on_good: bool = True,
+    on_failed: bool = False,
+    **kwargs: Any,
+) -> AggregatedResult:
+    """
+    Nornsible replacement for Nornir.run; bound to the Nornir object by InitNornsible
+
+    Tasks that do not need host fan-out -- nornsible_task tasks excluded by run/skip tags or
+    already done for some hosts per a resumed journal, and nornsible_delegate tasks -- are handled
+    here without scheduling every host, and async nornsible_task tasks run on the shared event
+    loop; everything else is handed to the normal nornir run. If a tracer is set (see
+    nornsible.tracing) the run is wrapped in a "nornsible.run" span.
+
+    Arguments:
+        self: Nornir object
+        task: function or callable to run against each host
+        num_workers: override for how many hosts to run in parallel for this task
+        raise_on_error: override raise_on_error behavior
+        on_good: run on hosts not marked as failed
+        on_failed: run on hosts marked as failed
+        **kwargs: keyword arguments passed to the task
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if tracing.TRACER is None:
+        return _run(self, task, num_workers, raise_on_error, on_good, on_failed, **kwargs)
+
+    import contextvars  # pylint: disable=C0415
+
+    name = kwargs.get("name") or getattr(task, "__name__", repr(task))
+    with tracing.span("nornsible.run", {"nornsible.task": name}):
+        # captured so that tasks running on nornir worker threads can parent their spans here
+        self.nornsible_trace_context = contextvars.copy_context()
+        try:
+            return _run(self, task, num_workers, raise_on_error, on_good, on_failed, **kwargs)
+        finally:
+            self.nornsible_trace_context = None
+
+
+def _run(
+    nr: Nornir,
+    task: Callable,
+    num_workers: Optional[int],
+    raise_on_error: Optional[bool],
+    on_good: bool,
+    on_failed: bool,
+    **kwargs: Any,
+) -> AggregatedResult:
+    """
+    Run a task; see run
+
+    Arguments:
+        nr: Nornir object
+        task: function or callable to run against each host
+        num_workers: override for how many hosts to run in parallel for this task
+        raise_on_error: override raise_on_error behavior
+        on_good: run on hosts not marked as failed
+        on_failed: run on hosts marked as failed
+        **kwargs: keyword arguments passed to the task
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    task_tags = getattr(task, "nornsible_tags", None)
+    if task_tags is not None and not nr.tag_filter.allows(task_tags):
+        return _run_skipped(nr, task, on_good, on_failed, **kwargs)
+    if getattr(task, "nornsible_delegate", False):
+        return _run_delegate(nr, task, raise_on_error, on_good, on_failed, **kwargs)
+    try:
+        done = nr.resume.get(journal_key(Task(task, **kwargs))) if task_tags and nr.resume else None
+        if done:
+            return _run_resumed(
+                nr, task, done, num_workers, raise_on_error, on_good, on_failed, **kwargs
+            )
+        if getattr(task, "nornsible_async", None) is not None:
+            return _run_async(nr, task, num_workers, raise_on_error, on_good, on_failed, **kwargs)
+        return Nornir.run(
+            nr,
+            task,
+            num_workers=num_workers,
+            raise_on_error=raise_on_error,
+            on_good=on_good,
+            on_failed=on_failed,
+            **kwargs,
+        )
+    finally:
+        # write the grouped skip banners of any subtasks skipped during the run
+        OUTPUT.flush()
+        flush_cache()
@@ -0,0 +1,151 @@
+from collections import defaultdict, deque
+from typing import Any, DefaultDict, Deque, Dict, Hashable, List, Tuple, TYPE_CHECKING
+
+from nornir.core import Nornir
+from nornir.core.inventory import Group, Host
+from nornir.core.task import AggregatedResult, MultiResult, Task
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future  # noqa
+
+
+THROTTLE_VAR = "nornsible_throttle"
+
+Slot = Tuple[Hashable, ...]
+
+
+def _group_slots(groups: List[Group], limits: Dict[Slot, int]) -> List[Slot]:
+    """
+    Recursively collect throttle slots for groups (and parent groups) that set a throttle
+
+    Arguments:
+        groups: list of nornir.core.inventory.Group objects to inspect
+        limits: dict of slot to concurrency limit; updated in place with any group limits found
+
+    Returns:
+        slots: list of throttle slots for the provided groups
+
+    Raises:
+        N/A  # noqa
+
+    """
+    slots: List[Slot] = []
+    for group in groups:
+        limit = group.data.get(THROTTLE_VAR)
+        if limit is not None:
+            slot = ("group", group.name)
+            limits[slot] = max(int(limit), 1)
+            slots.append(slot)
+        slots.extend(_group_slots(group.groups.refs, limits))
+    return slots
+
+
+def host_slots(host: Host, throttle: Dict[str, int], limits: Dict[Slot, int]) -> List[Slot]:
+    """
+    Determine the throttle slots a host occupies while it is running a task
+
+    Arguments:
+        host: nornir.core.inventory.Host object
+        throttle: dict of host variable name to per-value concurrency limit
+        limits: dict of slot to concurrency limit; updated in place with slots for this host
+
+    Returns:
+        slots: deduplicated list of throttle slots for the host
+
+    Raises:
+        N/A  # noqa
+
+    """
+    slots = _group_slots(host.groups.refs, limits)
+    for var, limit in throttle.items():
+        value = host.get(var)
+        if value is None:
+            continue
+        slot = ("var", var, str(value))
+        limits[slot] = max(limit, 1)
+        slots.append(slot)
+    return list(dict.fromkeys(slots))
+
+
+def inventory_throttled(nr: Nornir) -> bool:
+    """
+    Determine if any throttles are configured via cli arguments or inventory group data
+
+    Arguments:
+        nr: Nornir object
+
+    Returns:
+        bool: True if any throttles are configured
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if nr.throttle:
+        return True
+    return any(THROTTLE_VAR in group.data for group in nr.inventory.groups.values())
+
+
+def run_throttled(
+    self: Nornir, task: Task, hosts: List[Host], num_workers: int, **kwargs: Dict[str, Any]
+) -> AggregatedResult:
+    """
+    Drop-in replacement for Nornir._run_parallel that enforces per group/var concurrency limits
+
+    Hosts whose throttle slots are saturated are parked on the first saturated slot rather than
+    blocking a worker; each time a host completes, one parked host per freed slot is moved back to
+    the ready queue. Workers are therefore always kept busy with eligible hosts from other groups.
+
+    Arguments:
+        self: Nornir object
+        task: nornir.core.task.Task object to run
+        hosts: list of hosts to run the task against
+        num_workers: maximum number of hosts to run concurrently
+        **kwargs: keyword arguments passed to nornir run
+
+    Returns:
+        agg_result: nornir.core.task.AggregatedResult of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    from concurrent.futures import (  # pylint: disable=C0415
+        FIRST_COMPLETED,
+        ThreadPoolExecutor,
+        wait,
+    )
+
+    limits: Dict[Slot, int] = {}
+    slots = {host.name: host_slots(host, self.throttle, limits) for host in hosts}
+    active: DefaultDict[Slot, int] = defaultdict(int)
+    parked: DefaultDict[Slot, Deque[Host]] = defaultdict(deque)
+    ready: Deque[Host] = deque(hosts)
+    in_flight: Dict["Future", Host] = {}
+    results: Dict[str, MultiResult] = {}
+
+    with ThreadPoolExecutor(num_workers) as pool:
+        while ready or in_flight:
+            while ready and len(in_flight) < num_workers:
+                host = ready.popleft()
+                blocked = next((s for s in slots[host.name] if active[s] >= limits[s]), None)
+                if blocked is not None:
+                    parked[blocked].append(host)
+                    continue
+                for slot in slots[host.name]:
+                    active[slot] += 1
+                in_flight[pool.submit(task.copy().start, host, self)] = host
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                host = in_flight.pop(future)
+                results[host.name] = future.result()
+                for slot in slots[host.name]:
+                    active[slot] -= 1
+                    if parked[slot]:
+                        ready.appendleft(parked[slot].popleft())
+
+    agg_result = AggregatedResult(kwargs.get("name") or task.name)
+    for host in hosts:
+        agg_result[host.name] = results[host.name]
+    return agg_result
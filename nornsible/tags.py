@@ -0,0 +1,152 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+ALWAYS = "always"
+NEVER = "never"
+
+# a term is a conjunction of tags that must be present and tags that must not be present
+Term = Tuple[FrozenSet[str], FrozenSet[str]]
+
+_INHERITED: Dict[Tuple[FrozenSet[str], FrozenSet[str]], FrozenSet[str]] = {}
+
+
+def compile_tag_expressions(expressions: Iterable[str]) -> List[Term]:
+    """
+    Compile tag expressions into a list of terms, any of which may match
+
+    Each expression is an "or" ("|") of "and" ("&") terms of tags, each optionally negated with
+    "!"; i.e. "deploy&!reload|render" matches tasks tagged "deploy" but not "reload", or tagged
+    "render". Multiple (comma separated on the cli) expressions are also "or"-ed together.
+
+    Arguments:
+        expressions: tag expressions
+
+    Returns:
+        terms: list of (required tags, excluded tags) terms
+
+    Raises:
+        N/A  # noqa
+
+    """
+    terms = []
+    for expression in expressions:
+        for raw_term in expression.split("|"):
+            literals = [t.strip() for t in raw_term.split("&") if t.strip()]
+            if not literals:
+                continue
+            required = frozenset(t for t in literals if not t.startswith("!"))
+            excluded = frozenset(t[1:] for t in literals if t.startswith("!"))
+            terms.append((required, excluded))
+    return terms
+
+
+def _term_matches(term: Term, tags: FrozenSet[str]) -> bool:
+    """
+    Determine if a compiled term matches a set of tags
+
+    Arguments:
+        term: tuple of required tags and excluded tags
+        tags: tags of a task
+
+    Returns:
+        bool: True if all required tags and none of the excluded tags are present
+
+    Raises:
+        N/A  # noqa
+
+    """
+    required, excluded = term
+    return required <= tags and not excluded & tags
+
+
+def inherit_tags(tags: FrozenSet[str], parent_tags: Optional[FrozenSet[str]]) -> FrozenSet[str]:
+    """
+    Combine a (sub)task's own tags with those inherited from its parent task; memoized
+
+    Arguments:
+        tags: tags of the task
+        parent_tags: effective tags of the parent task, if any
+
+    Returns:
+        tags: effective tags of the task
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if not parent_tags:
+        return tags
+    key = (tags, parent_tags)
+    inherited = _INHERITED.get(key)
+    if inherited is None:
+        inherited = _INHERITED[key] = tags | parent_tags
+    return inherited
+
+
+class TagFilter:
+    def __init__(self, run_tags: Iterable[str], skip_tags: Iterable[str]) -> None:
+        """
+        Compiled run/skip tag expressions with memoized decisions per set of task tags
+
+        Decisions are cached in the "decisions" dict keyed by (frozen) set of task tags, so once a
+        task has been decided the per-host check is a single dict lookup.
+
+        Arguments:
+            run_tags: tag expressions to explicitly run; if empty all tasks not skipped are run
+                (except those tagged "never")
+            skip_tags: tag expressions to skip
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.run_terms = compile_tag_expressions(run_tags)
+        self.skip_terms = compile_tag_expressions(skip_tags)
+        self.decisions: Dict[FrozenSet[str], bool] = {}
+
+    def allows(self, tags: FrozenSet[str]) -> bool:
+        """
+        Determine if a task with the given tags should run
+
+        Arguments:
+            tags: effective tags of the task (its name, declared tags, and any inherited tags)
+
+        Returns:
+            bool: True if the task should run
+
+        Raises:
+            N/A  # noqa
+
+        """
+        decision = self.decisions.get(tags)
+        if decision is None:
+            decision = self.decisions[tags] = self._decide(tags)
+        return decision
+
+    def _decide(self, tags: FrozenSet[str]) -> bool:
+        """
+        Decide if a task with the given tags should run
+
+        Skip expressions always win. Tasks tagged "always" run unless skipped; tasks tagged
+        "never" run only when a run expression explicitly requires one of their tags.
+
+        Arguments:
+            tags: effective tags of the task
+
+        Returns:
+            bool: True if the task should run
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if any(_term_matches(term, tags) for term in self.skip_terms):
+            return False
+        if NEVER in tags:
+            return any(term[0] and _term_matches(term, tags) for term in self.run_terms)
+        if not self.run_terms or ALWAYS in tags:
+            return True
+        return any(_term_matches(term, tags) for term in self.run_terms)
@@ -0,0 +1,315 @@
+import json
+import math
+import threading
+from typing import Any, Dict, List, Tuple
+
+
+# log-linear buckets: this many buckets per doubling of duration, i.e. ~9% relative error
+BUCKETS_PER_DOUBLING = 8
+# durations are recorded in seconds; anything quicker than this lands in the lowest bucket
+MIN_DURATION = 1e-6
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _bucket(duration: float) -> int:
+    """
+    Get the histogram bucket index of a duration
+
+    Arguments:
+        duration: duration in seconds
+
+    Returns:
+        int: bucket index
+
+    Raises:
+        N/A  # noqa
+
+    """
+    return math.ceil(math.log2(max(duration, MIN_DURATION)) * BUCKETS_PER_DOUBLING)
+
+
+def _bucket_bound(bucket: int) -> float:
+    """
+    Get the upper bound (in seconds) of a histogram bucket
+
+    Arguments:
+        bucket: bucket index
+
+    Returns:
+        float: upper bound of the bucket
+
+    Raises:
+        N/A  # noqa
+
+    """
+    return float(2 ** (bucket / BUCKETS_PER_DOUBLING))
+
+
+class Histogram:
+    """
+    Log-linear histogram of durations; recording is a dict increment, quantiles are approximate
+
+    """
+
+    __slots__ = ("buckets", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, duration: float) -> None:
+        """
+        Record a duration
+
+        Arguments:
+            duration: duration in seconds
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        bucket = _bucket(duration)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.sum += duration
+        self.max = max(self.max, duration)
+
+    def quantile(self, q: float) -> float:
+        """
+        Get the approximate duration at quantile q
+
+        Arguments:
+            q: quantile between 0 and 1
+
+        Returns:
+            float: upper bound of the bucket holding the quantile, capped at the max duration
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(_bucket_bound(bucket), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Summarize the histogram
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            dict: count, sum, max, and p50/p95/p99 durations
+
+        Raises:
+            N/A  # noqa
+
+        """
+        summary = {"count": self.count, "sum": self.sum, "max": self.max}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = self.quantile(q)
+        return summary
+
+
+class Timings:
+    def __init__(self) -> None:
+        """
+        Wall time of nornsible wrapped tasks, by task and by host
+
+        Each task name gets a Histogram of its durations across hosts; the total duration of each
+        task on each host is kept as well to find slow devices.
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        self.lock = threading.Lock()
+        self.tasks: Dict[str, Histogram] = {}
+        self.hosts: Dict[str, Dict[str, float]] = {}
+
+    def record(self, task: str, host: str, duration: float) -> None:
+        """
+        Record the duration of a task on a host
+
+        Arguments:
+            task: name of the task
+            host: name of the host
+            duration: duration in seconds
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            histogram = self.tasks.get(task)
+            if histogram is None:
+                histogram = self.tasks[task] = Histogram()
+            histogram.record(duration)
+            host_tasks = self.hosts.get(host)
+            if host_tasks is None:
+                host_tasks = self.hosts[host] = {}
+            host_tasks[task] = host_tasks.get(task, 0.0) + duration
+
+    def reset(self) -> None:
+        """
+        Discard all recorded timings
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            self.tasks = {}
+            self.hosts = {}
+
+    def snapshot(self) -> Tuple[Dict[str, Histogram], Dict[str, Dict[str, float]]]:
+        """
+        Get the raw recorded timings, i.e. to send from a worker process to the parent
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            tuple: task histograms and host timings
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            return self.tasks, self.hosts
+
+    def merge(self, snapshot: Tuple[Dict[str, Histogram], Dict[str, Dict[str, float]]]) -> None:
+        """
+        Merge a snapshot of timings (from another process) into these timings
+
+        Arguments:
+            snapshot: task histograms and host timings as returned by snapshot
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        tasks, hosts = snapshot
+        with self.lock:
+            for name, other in tasks.items():
+                histogram = self.tasks.get(name)
+                if histogram is None:
+                    histogram = self.tasks[name] = Histogram()
+                for bucket, count in other.buckets.items():
+                    histogram.buckets[bucket] = histogram.buckets.get(bucket, 0) + count
+                histogram.count += other.count
+                histogram.sum += other.sum
+                histogram.max = max(histogram.max, other.max)
+            for name, other_tasks in hosts.items():
+                host_tasks = self.hosts.setdefault(name, {})
+                for task, duration in other_tasks.items():
+                    host_tasks[task] = host_tasks.get(task, 0.0) + duration
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize recorded timings
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            dict: "tasks" mapping task name to histogram summary, and "hosts" mapping host name to
+                total duration per task
+
+        Raises:
+            N/A  # noqa
+
+        """
+        with self.lock:
+            return {
+                "tasks": {name: h.summary() for name, h in sorted(self.tasks.items())},
+                "hosts": {name: dict(tasks) for name, tasks in sorted(self.hosts.items())},
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Render per task histograms in the Prometheus text exposition format
+
+        Arguments:
+            N/A  # noqa
+
+        Returns:
+            str: prometheus textfile contents
+
+        Raises:
+            N/A  # noqa
+
+        """
+        metric = "nornsible_task_duration_seconds"
+        lines: List[str] = [
+            f"# HELP {metric} Wall time of nornsible wrapped tasks per host.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self.lock:
+            for name, histogram in sorted(self.tasks.items()):
+                label = json.dumps(name)
+                cumulative = 0
+                for bucket in sorted(histogram.buckets):
+                    cumulative += histogram.buckets[bucket]
+                    le = repr(_bucket_bound(bucket))
+                    lines.append(f'{metric}_bucket{{task={label},le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{task={label},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{task={label}}} {histogram.sum!r}")
+                lines.append(f"{metric}_count{{task={label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write recorded timings to a json file, or a Prometheus textfile if path ends in ".prom"
+
+        Arguments:
+            path: path of the file to write
+
+        Returns:
+            N/A  # noqa
+
+        Raises:
+            N/A  # noqa
+
+        """
+        if path.endswith(".prom"):
+            contents = self.to_prometheus()
+        else:
+            contents = json.dumps(self.summary(), indent=2)
+        with open(path, "w") as f:
+            f.write(contents)
+
+
+TIMINGS = Timings()
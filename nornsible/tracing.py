@@ -0,0 +1,69 @@
+import sys
+from typing import Any, ContextManager, Dict, Optional, cast
+
+
+# OpenTelemetry compatible tracer (anything with a start_as_current_span(name, attributes=...)
+# context manager), or None to disable tracing; see set_tracer
+TRACER: Optional[Any] = None
+
+
+class _NoopSpan:
+    """
+    Reusable do-nothing context manager returned by span when tracing is disabled
+
+    """
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *args: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def set_tracer(tracer: Optional[Any]) -> None:
+    """
+    Set (or, with None, unset) the tracer nornsible emits spans to
+
+    Any OpenTelemetry compatible tracer works, i.e. opentelemetry.trace.get_tracer("nornsible").
+    Tracing requires python 3.7+, as spans are carried to worker threads with contextvars.
+
+    Arguments:
+        tracer: tracer providing start_as_current_span, or None
+
+    Returns:
+        N/A  # noqa
+
+    Raises:
+        RuntimeError: if a tracer is set on python older than 3.7
+
+    """
+    if tracer is not None and sys.version_info < (3, 7):
+        raise RuntimeError("nornsible tracing requires python 3.7+ (contextvars)")
+    global TRACER  # pylint: disable=W0603
+    TRACER = tracer
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> ContextManager:
+    """
+    Start a span as the current span if a tracer is set, otherwise return a shared no-op
+
+    Per host code paths should check TRACER for None themselves rather than calling this, so that
+    no attributes are built at all when tracing is disabled.
+
+    Arguments:
+        name: name of the span
+        attributes: span attributes
+
+    Returns:
+        span: context manager of the span
+
+    Raises:
+        N/A  # noqa
+
+    """
+    if TRACER is None:
+        return _NOOP_SPAN
+    return cast(ContextManager, TRACER.start_as_current_span(name, attributes=attributes or {}))
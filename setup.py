@@ -16,7 +16,7 @@ setuptools.setup(
     long_description=README,
     long_description_content_type="text/markdown",
     packages=setuptools.find_packages(),
-    install_requires=["colorama>=0.3.9", "nornir>=2.2.0"],
+    install_requires=["colorama>=0.3.9", "nornir>=2.4.0"],
     classifiers=[
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
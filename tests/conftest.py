@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    # nornsible writes <script>.retry (and other default files) to the cwd
+    monkeypatch.chdir(tmp_path)
@@ -1,11 +1,26 @@
+import asyncio
+import gzip
+import json
+import os
 from pathlib import Path
+import pstats
 import sys
+import threading
+import time
 from unittest.mock import patch
 
 from nornir import InitNornir
+from nornir.core.connections import ConnectionPlugin, Connections
+import pytest
 
 import nornsible
-from nornsible import InitNornsible, nornsible_delegate, nornsible_task
+from nornsible import InitNornsible, nornsible_delegate, nornsible_task, profiling
+from nornsible.aio import run_subtask
+from nornsible.cache import get_cache, set_cache
+from nornsible.cli import parse_cli_args
+from nornsible.output import OUTPUT
+from nornsible.processors import NornsibleProcessor
+from nornsible.timings import TIMINGS
 
 
 NORNSIBLE_DIR = nornsible.__file__
@@ -160,3 +175,972 @@ def test_nornsible_delegate_disable_delegate():
             task_results.append(nr.run(task=task))
 
         assert task_results[0]["localhost"].result == "Task skipped, delegate host!"
+
+
+@nornsible_task
+def custom_task_pid(task):
+    return os.getpid()
+
+
+def test_nornsible_task_processes():
+    testargs = ["somescript", "--processes", "2"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_pid)
+        assert list(task_result.keys()) == list(nr.inventory.hosts.keys())
+        assert task_result["delegate"].result == "Task skipped, delegate host!"
+        pids = {r.result for h, r in task_result.items() if h != "delegate"}
+        assert len(pids) == 2
+        assert os.getpid() not in pids
+        assert task_result["localhost"].host is nr.inventory.hosts["localhost"]
+
+
+@nornsible_task
+def custom_task_pid_window(task):
+    started = time.monotonic()
+    time.sleep(0.2)
+    return os.getpid(), started, time.monotonic()
+
+
+def test_nornsible_task_processes_throttled():
+    testargs = ["somescript", "--processes", "2", "-w", "4", "--disable-delegate"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_pid_window)
+    first_pid, first_start, first_end = task_result["sea-eos-1"].result
+    second_pid, second_start, second_end = task_result["sea-eos-2"].result
+    # the ha pair (nornsible_throttle: 1) runs in one process, one host after the other
+    assert first_pid == second_pid
+    assert first_end <= second_start or second_end <= first_start
+
+
+@nornsible_task
+def custom_task_fail_upper(task):
+    if task.host.name.startswith("UPPER") or task.host.name == "localhost":
+        raise ValueError("boom")
+    return "Hello, world!"
+
+
+def test_nornsible_retry_file(tmp_path):
+    retry_file = tmp_path / "somescript.retry"
+    testargs = ["somescript", "--retry-file", str(retry_file)]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_fail_upper)
+        assert sorted(retry_file.read_text().splitlines()) == ["UPPER-HOST", "localhost"]
+
+    testargs = ["somescript", "--retry-file", str(retry_file), "--retry"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        assert set(nr.inventory.hosts.keys()) == {"UPPER-HOST", "localhost", "delegate"}
+        assert retry_file.read_text() == ""
+        nr.run(task=custom_task_fail_upper)
+        assert sorted(retry_file.read_text().splitlines()) == ["UPPER-HOST", "localhost"]
+
+
+def test_nornsible_retry_file_default(tmp_path):
+    # the isolated_cwd fixture runs each test in tmp_path
+    retry_file = tmp_path / "somescript.retry"
+    with patch.object(sys, "argv", ["somescript"]):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_fail_upper)
+        assert sorted(retry_file.read_text().splitlines()) == ["UPPER-HOST", "localhost"]
+
+    with patch.object(sys, "argv", ["somescript", "--retry"]):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        assert set(nr.inventory.hosts.keys()) == {"UPPER-HOST", "localhost", "delegate"}
+
+
+def test_nornsible_retry_missing_file(tmp_path):
+    testargs = ["somescript", "--retry-file", str(tmp_path / "missing.retry"), "--retry"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        with pytest.raises(SystemExit, match="missing.retry does not exist"):
+            InitNornsible(nr)
+
+
+def test_nornsible_limit_from_file(tmp_path):
+    limit_file = tmp_path / "hosts.txt"
+    limit_file.write_text("sea-eos-1\nupper-host\n")
+    testargs = ["somescript", "-l", f"@{limit_file}", "-d"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        assert set(nr.inventory.hosts.keys()) == {"sea-eos-1", "UPPER-HOST"}
+
+
+def test_nornsible_limit_from_empty_file(tmp_path):
+    limit_file = tmp_path / "hosts.txt"
+    limit_file.write_text("")
+    testargs = ["somescript", "-l", f"@{limit_file}", "-d"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        assert set(nr.inventory.hosts.keys()) == set()
+
+
+class CountingProcessor(NornsibleProcessor):
+    def __init__(self):
+        self.started_hosts = []
+
+    def task_instance_started(self, task, host):
+        self.started_hosts.append(host.name)
+
+
+def test_nornsible_delegate_runs_once():
+    testargs = ["somescript"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        processor = CountingProcessor()
+        nr.processors.append(processor)
+        task_result = nr.run(task=custom_task_example_3)
+        assert processor.started_hosts == ["delegate"]
+        assert set(task_result.keys()) == set(nr.inventory.hosts.keys())
+        assert task_result["delegate"].result == "Hello, world!"
+        assert task_result["sea-eos-1"].result == "Task skipped, non-delegate host!"
+        assert task_result["sea-eos-1"][0].host is nr.inventory.hosts["sea-eos-1"]
+
+
+def test_nornsible_task_skip_task_not_scheduled(capfd):
+    testargs = ["somescript", "-s", "custom_task_example"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        processor = CountingProcessor()
+        nr.processors.append(processor)
+        task_result = nr.run(task=custom_task_example)
+        assert processor.started_hosts == []
+        assert set(task_result.keys()) == set(nr.inventory.hosts.keys())
+        assert task_result["sea-eos-1"].result == "Task skipped!"
+        assert task_result["delegate"].result == "Task skipped, delegate host!"
+        std_out, std_err = capfd.readouterr()
+        assert std_out.count("skipping task custom_task_example on 5 host(s)") == 1
+
+
+@nornsible_task(tags=["render"])
+def custom_task_render(task):
+    return "rendered!"
+
+
+@nornsible_task(tags=["deploy", "always"])
+def custom_task_deploy(task):
+    return task.run(task=custom_task_render).result
+
+
+def test_nornsible_task_tags():
+    testargs = ["somescript", "-l", "localhost", "-d", "-t", "render&!deploy"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_render)
+        assert task_result["localhost"].result == "rendered!"
+        # runs as it is tagged "always", which its subtask inherits
+        task_result = nr.run(task=custom_task_deploy)
+        assert task_result["localhost"].result == "rendered!"
+
+
+def test_nornsible_task_tags_skip_always_subtask():
+    testargs = ["somescript", "-l", "localhost", "-d", "-s", "render"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_deploy)
+        assert task_result["localhost"].result == "Task skipped!"
+
+
+@nornsible_task(tags=["always"])
+def custom_task_skip_subtasks(task):
+    task.run(task=custom_task_render, name="first")
+    task.run(task=custom_task_render, name="second")
+
+
+def test_nornsible_task_skipped_subtask_names():
+    testargs = ["somescript", "-l", "localhost", "-d", "-s", "render"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_skip_subtasks)
+        multi_result = task_result["localhost"]
+        assert [r.name for r in multi_result] == ["custom_task_skip_subtasks", "first", "second"]
+        assert multi_result[1] is not multi_result[2]
+        assert multi_result[1].host is nr.inventory.hosts["localhost"]
+
+
+def test_nornsible_task_tags_inherited():
+    testargs = ["somescript", "-l", "localhost", "-d", "-t", "deploy"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_render)
+        assert task_result["localhost"].result == "Task skipped!"
+        task_result = nr.run(task=custom_task_deploy)
+        assert task_result["localhost"].result == "rendered!"
+
+
+def test_nornsible_stream(capfd):
+    testargs = ["somescript", "-l", "localhost", "--stream"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_example)
+        std_out, std_err = capfd.readouterr()
+        assert std_out.count("custom_task_example*") == 1
+        assert std_out.count("* localhost") == 1
+        assert std_out.count("Hello, world!") == 1
+        assert "delegate" not in std_out
+        assert task_result["localhost"].result is None
+        assert task_result["localhost"].failed is False
+
+        nornsible.print_result(task_result)
+        std_out, std_err = capfd.readouterr()
+        assert std_out == ""
+
+
+def test_nornsible_stream_processes(capfd):
+    testargs = ["somescript", "--stream", "--processes", "2", "--disable-delegate"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_example)
+        std_out, std_err = capfd.readouterr()
+        assert std_out.count("Hello, world!") == 4
+        assert std_out.count("* localhost") == 1
+
+        nornsible.print_result(task_result)
+        std_out, std_err = capfd.readouterr()
+        assert std_out == ""
+
+
+def test_nornsible_stream_json_payload(tmp_path, capfd):
+    json_output = tmp_path / "results.jsonl"
+    testargs = ["somescript", "-d", "-w", "4", "--stream", "--json-output", str(json_output)]
+    with patch.object(sys, "argv", testargs + ["--json-payload"]):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_example)
+        for processor in nr.processors:
+            processor.flush()
+        std_out, std_err = capfd.readouterr()
+    assert std_out.count("Hello, world!") == 4
+    assert task_result["localhost"].result is None
+    lines = [json.loads(line) for line in json_output.read_text().splitlines()]
+    assert [line["payload"][0]["result"] for line in lines] == ["Hello, world!"] * 4
+
+
+def test_nornsible_json_output(tmp_path):
+    json_output = tmp_path / "results.jsonl.gz"
+    testargs = [
+        "somescript",
+        "-s",
+        "custom_task_example",
+        "--json-output",
+        str(json_output),
+        "--json-payload",
+    ]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_example)
+        nr.run(task=custom_task_fail_upper)
+
+    with gzip.open(json_output, "rt") as f:
+        lines = [json.loads(line) for line in f]
+    skipped = [line for line in lines if line["task"] == "custom_task_example"]
+    assert len(skipped) == len(nr.inventory.hosts)
+    assert {line["status"] for line in skipped} == {"skipped"}
+    assert all(line["payload"] == [] for line in skipped)
+    failed = {line["host"]: line for line in lines if line["task"] == "custom_task_fail_upper"}
+    assert failed["UPPER-HOST"]["status"] == "failed"
+    assert failed["sea-eos-1"]["status"] == "ok"
+    assert failed["sea-eos-1"]["duration"] >= 0
+    assert failed["sea-eos-1"]["payload"][0]["name"] == "custom_task_fail_upper"
+
+
+def test_nornsible_recap():
+    testargs = ["somescript", "-s", "custom_task_example"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_example)
+        nr.run(task=custom_task_example_2)
+        nr.run(task=custom_task_fail_upper)
+        recap = nr.recap.hosts
+        assert (recap["sea-eos-1"].ok, recap["sea-eos-1"].skipped) == (2, 1)
+        assert (recap["UPPER-HOST"].ok, recap["UPPER-HOST"].failed) == (1, 1)
+        assert recap["delegate"].skipped == 3
+        formatted = nr.recap.format_recap()
+        assert "PLAY RECAP" in formatted
+        assert "sea-eos-1" in formatted
+        assert "delegate" not in formatted
+
+
+def test_nornsible_recap_processes():
+    testargs = ["somescript", "--processes", "2"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_fail_upper)
+        assert nr.recap.hosts["sea-eos-1"].ok == 1
+        assert nr.recap.hosts["UPPER-HOST"].failed == 1
+
+
+@nornsible_task
+def custom_task_collect(task):
+    output = task.run(task=custom_task_example_2)
+    assert output[0].result == "Hello, world!"
+    return "x" * 100
+
+
+def test_nornsible_retention_status():
+    testargs = ["somescript", "-l", "localhost", "--retention", "status"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_collect)
+        assert task_result["localhost"].failed is False
+        assert task_result["localhost"][0].result is None
+        assert task_result["localhost"][1].result is None
+
+
+@nornsible_task
+def custom_task_print(task):
+    nornsible.print_result(task.run(task=custom_task_example_2))
+
+
+def test_nornsible_retention_print_result_in_task(capfd):
+    testargs = ["somescript", "--retention", "status", "-w", "4", "--disable-delegate"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_print)
+        OUTPUT.flush()
+        std_out, std_err = capfd.readouterr()
+        assert std_out.count("Hello, world!") == 4
+
+
+def test_nornsible_retention_spill_processes():
+    testargs = ["somescript", "--processes", "2", "--retention", "spill", "--spill-threshold", "50"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_collect)
+        assert "result" not in vars(task_result["sea-eos-1"][0])
+        assert task_result["sea-eos-1"][0].result == "x" * 100
+        assert task_result["sea-eos-1"][1].result == "Hello, world!"
+
+
+def test_nornsible_timings_processes():
+    TIMINGS.reset()
+    testargs = ["somescript", "--processes", "2"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_example)
+        summary = TIMINGS.summary()
+        assert summary["tasks"]["custom_task_example"]["count"] == 4
+        assert set(summary["hosts"]) == set(nr.inventory.hosts) - {"delegate"}
+
+
+def test_nornsible_profile(tmp_path, capfd):
+    profile = tmp_path / "run.pstats"
+    testargs = ["somescript", "--profile", str(profile)]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        try:
+            nr = InitNornsible(nr)
+            nr.run(task=custom_task_example)
+            profiling.PROFILER.finish()
+        finally:
+            profiling.PROFILER = None
+
+    stats = pstats.Stats(str(profile))
+    functions = {func for _, _, func in stats.stats}
+    assert "custom_task_example" in functions
+    std_out, std_err = capfd.readouterr()
+    assert f"written to {profile}" in std_out
+
+
+def test_parse_cli_args_profile():
+    assert parse_cli_args(["--profile"])["profile"] is True
+    assert parse_cli_args(["--profile", "run.pstats"])["profile"] == "run.pstats"
+    assert parse_cli_args([])["profile"] is False
+
+
+@nornsible_task
+async def custom_async_task(task):
+    await asyncio.sleep(0.5)
+    if task.host.name == "UPPER-HOST":
+        raise ValueError("upper")
+    return threading.current_thread().name
+
+
+@nornsible_task
+async def custom_async_task_parent(task):
+    output = await run_subtask(task, task=custom_async_task)
+    return f"parent of {output.result}"
+
+
+@nornsible_task
+def custom_sync_task_parent(task):
+    output = task.run(task=custom_async_task)
+    return f"parent of {output.result}"
+
+
+def test_nornsible_async_task():
+    testargs = ["somescript"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            core={"num_workers": 1},
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        started = time.perf_counter()
+        task_result = nr.run(task=custom_async_task)
+        # every host sleeps on the event loop at the same time, even with a single worker thread
+        assert time.perf_counter() - started < 1.5
+        assert task_result["sea-eos-1"].result == "nornsible-loop"
+        assert task_result["delegate"].result == "Task skipped, delegate host!"
+        assert task_result["UPPER-HOST"].failed
+        assert set(task_result.failed_hosts) == {"UPPER-HOST"}
+
+        task_result = nr.run(task=custom_async_task_parent, on_failed=True)
+        assert task_result["localhost"][0].result == "parent of nornsible-loop"
+        assert task_result["localhost"][1].result == "nornsible-loop"
+        assert task_result["UPPER-HOST"].failed is True
+
+
+def test_nornsible_async_task_sync_bridge():
+    testargs = ["somescript", "-l", "localhost"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_sync_task_parent)
+        assert task_result["localhost"][0].result == "parent of nornsible-loop"
+
+
+def test_nornsible_async_task_skip_task():
+    testargs = ["somescript", "-l", "localhost", "-s", "custom_async_task"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_async_task)
+        assert task_result["localhost"].result == "Task skipped!"
+        task_result = nr.run(task=custom_async_task_parent)
+        assert task_result["localhost"][1].result == "Task skipped!"
+
+
+class StandInConnection(ConnectionPlugin):
+    def open(
+        self, hostname, username, password, port, platform, extras=None, configuration=None
+    ):
+        if hostname == "5.4.3.2":
+            raise ConnectionRefusedError(hostname)
+        self.connection = hostname
+        self.pid = os.getpid()
+
+    def close(self):
+        self.connection = None
+
+
+@nornsible_task
+def custom_task_connection(task):
+    return task.host.get_connection("stand_in", task.nornir.config)
+
+
+def test_nornsible_prewarm(tmp_path):
+    Connections.register("stand_in", StandInConnection)
+    retry_file = tmp_path / "retry"
+    testargs = ["somescript", "--prewarm", "--retry-file", str(retry_file)]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr.inventory.defaults.data["nornsible_prewarm"] = ["stand_in"]
+        nr = InitNornsible(nr)
+        assert nr.data.failed_hosts == {"UPPER-HOST"}
+        assert retry_file.read_text() == "UPPER-HOST\n"
+        assert "stand_in" in nr.inventory.hosts["sea-eos-1"].connections
+        assert "stand_in" not in nr.inventory.hosts["delegate"].connections
+        task_result = nr.run(task=custom_task_connection)
+        assert "UPPER-HOST" not in task_result
+        assert task_result["sea-eos-1"].result == "1.2.3.4"
+    Connections.deregister("stand_in")
+
+
+@nornsible_task
+def custom_task_connection_pid(task):
+    task.host.get_connection("stand_in", task.nornir.config)
+    return task.host.connections["stand_in"].pid
+
+
+def test_nornsible_prewarm_processes():
+    Connections.register("stand_in", StandInConnection)
+    testargs = ["somescript", "--prewarm", "--processes", "2", "--disable-delegate"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr.inventory.defaults.data["nornsible_prewarm"] = ["stand_in"]
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_connection_pid)
+        # worker processes open their own connections rather than using the parent's
+        assert os.getpid() not in {r.result for r in task_result.values()}
+        assert nr.inventory.hosts["sea-eos-1"].connections["stand_in"].pid == os.getpid()
+        assert nr.inventory.hosts["sea-eos-1"].connections["stand_in"].connection == "1.2.3.4"
+    Connections.deregister("stand_in")
+
+
+def test_parse_cli_args_prewarm():
+    cli_args = parse_cli_args(["--prewarm", "--prewarm-workers", "500", "--prewarm-timeout", "5"])
+    assert cli_args["prewarm"] is True
+    assert cli_args["prewarm_workers"] == 500
+    assert cli_args["prewarm_timeout"] == 5.0
+
+
+CACHED_RUNS = []
+
+
+@nornsible_task(cache_ttl=3600)
+def custom_task_cached(task, getter="facts"):
+    CACHED_RUNS.append(task.host.name)
+    return {"host": task.host.name, "getter": getter}
+
+
+def test_nornsible_fact_cache(tmp_path):
+    fact_cache = str(tmp_path / "facts.db")
+    testargs = ["somescript", "-l", "localhost,sea-eos-1", "-d", "--fact-cache", fact_cache]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        assert get_cache().path == fact_cache
+        CACHED_RUNS.clear()
+        nr.run(task=custom_task_cached)
+        task_result = nr.run(task=custom_task_cached)
+        assert sorted(CACHED_RUNS) == ["localhost", "sea-eos-1"]
+        assert task_result["localhost"].result == {"host": "localhost", "getter": "facts"}
+        assert task_result["localhost"][0].nornsible_cached
+        nr.run(task=custom_task_cached, getter="interfaces")
+        assert len(CACHED_RUNS) == 4
+
+    with patch.object(sys, "argv", testargs + ["--flush-cache"]):
+        nr = InitNornsible(nr)
+        CACHED_RUNS.clear()
+        nr.run(task=custom_task_cached)
+        assert sorted(CACHED_RUNS) == ["localhost", "sea-eos-1"]
+    set_cache(None)
+
+
+def test_nornsible_journal_resume(tmp_path):
+    journal = tmp_path / "somescript.journal"
+    testargs = ["somescript", "--journal", str(journal)]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=custom_task_fail_upper)
+        nr.run(task=custom_task_example, on_failed=True)
+    records = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert len(records) == 10
+    assert {r["host"] for r in records if r["status"] == "failed"} == {"UPPER-HOST", "localhost"}
+
+    testargs = ["somescript", "--resume", str(journal)]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_fail_upper)
+        assert task_result["sea-eos-1"].result == "Task skipped, already completed!"
+        assert task_result["sea-eos-1"][0].host is nr.inventory.hosts["sea-eos-1"]
+        assert task_result["UPPER-HOST"].failed
+        task_result = nr.run(task=custom_task_example)
+        assert task_result["sea-eos-1"].result == "Task skipped, already completed!"
+        assert task_result["delegate"].result == "Task skipped, delegate host!"
+        assert nr.recap.hosts["sea-eos-1"].skipped == 2
+    records = [json.loads(line) for line in journal.read_text().splitlines()]
+    # only hosts that were scheduled again are recorded again
+    assert sorted(r["host"] for r in records[10:]) == [
+        "UPPER-HOST",
+        "delegate",
+        "delegate",
+        "localhost",
+    ]
+
+
+@nornsible_task
+def custom_task_section(task, section):
+    return section
+
+
+def test_nornsible_journal_resume_arguments(tmp_path):
+    journal = tmp_path / "somescript.journal"
+    for testargs in (["--journal", str(journal)], ["--resume", str(journal)]):
+        with patch.object(sys, "argv", ["somescript", "-d"] + testargs):
+            nr = InitNornir(
+                inventory={
+                    "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                    "options": {
+                        "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                        "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                    },
+                },
+                logging={"enabled": False},
+            )
+            nr = InitNornsible(nr)
+            task_result = nr.run(task=custom_task_section, section="a")
+        if testargs[0] == "--resume":
+            assert task_result["sea-eos-1"].result == "Task skipped, already completed!"
+    # the run "crashed" before section b; resuming must not treat b as done
+    with patch.object(sys, "argv", ["somescript", "-d", "--resume", str(journal)]):
+        nr = InitNornsible(nr)
+        task_result = nr.run(task=custom_task_section, section="b")
+    assert task_result["sea-eos-1"].result == "b"
+
+
+def test_parse_cli_args_script_short_p():
+    # -p belongs to the script (i.e. a port or password option), not to nornsible
+    assert parse_cli_args(["-p", "secret"])["processes"] is False
+
+
+def test_parse_cli_args_rate():
+    cli_args = parse_cli_args(["--rate", "120/m", "--burst", "5", "--rate-scope", "group:sea"])
+    assert cli_args["rate"] == 2.0
+    assert cli_args["burst"] == 5
+    assert cli_args["rate_scope"] == "group:sea"
+    assert parse_cli_args(["--rate", "10"])["rate"] == 10.0
+    assert parse_cli_args([])["rate"] is False
+
+
+def test_parse_cli_args_rate_invalid():
+    with pytest.raises(SystemExit):
+        parse_cli_args(["--rate", "10/h"])
+    with pytest.raises(SystemExit):
+        parse_cli_args(["--rate", "0/s"])
+
+
+def test_nornsible_rate_limit():
+    testargs = ["somescript", "--rate", "10/s", "--disable-delegate"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        started = time.monotonic()
+        task_result = nr.run(task=custom_task_example)
+        elapsed = time.monotonic() - started
+    assert not task_result.failed
+    assert len(task_result) == 4
+    # first start is immediate, the other three are spaced 0.1s apart
+    assert elapsed >= 0.25
+
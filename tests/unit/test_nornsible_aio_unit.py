@@ -0,0 +1,26 @@
+import asyncio
+import threading
+
+import pytest
+
+from nornsible.aio import EVENT_LOOP, run_coroutine
+
+
+async def loop_thread_name():
+    await asyncio.sleep(0)
+    return threading.current_thread().name
+
+
+async def nested_run_coroutine():
+    return run_coroutine(loop_thread_name())
+
+
+def test_run_coroutine():
+    assert run_coroutine(loop_thread_name()) == "nornsible-loop"
+    assert EVENT_LOOP.get() is EVENT_LOOP.get()
+    assert not EVENT_LOOP.in_loop_thread()
+
+
+def test_run_coroutine_from_loop():
+    with pytest.raises(RuntimeError, match="run_subtask"):
+        run_coroutine(nested_run_coroutine())
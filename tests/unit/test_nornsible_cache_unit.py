@@ -0,0 +1,78 @@
+import json
+import time
+
+from nornir.core.inventory import Host
+from nornir.core.task import Result
+import pytest
+
+from nornsible.cache import (
+    FactCache,
+    JsonFactCache,
+    SqliteFactCache,
+    cache_key,
+    cached_result,
+    open_cache,
+)
+
+
+@pytest.fixture(params=["facts.json", "facts.db"])
+def fact_cache(request, tmp_path):
+    return open_cache(str(tmp_path / request.param))
+
+
+def test_open_cache(tmp_path):
+    assert isinstance(open_cache(str(tmp_path / "facts.json")), JsonFactCache)
+    assert isinstance(open_cache(str(tmp_path / "facts.sqlite")), SqliteFactCache)
+
+
+def test_fact_cache_is_abstract():
+    with pytest.raises(TypeError):
+        FactCache()
+
+    class PartialCache(FactCache):
+        def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialCache()
+
+
+def test_cache_key():
+    key = cache_key("get_facts", "sea-eos-1", (), {"getters": ["facts"]})
+    assert key.startswith("get_facts|sea-eos-1|")
+    assert key == cache_key("get_facts", "sea-eos-1", (), {"getters": ["facts"]})
+    assert key != cache_key("get_facts", "sea-eos-1", (), {"getters": ["interfaces"]})
+    assert key != cache_key("get_facts", "sea-nxos-1", (), {"getters": ["facts"]})
+
+
+def test_fact_cache(fact_cache):
+    host = Host(name="sea-eos-1")
+    fact_cache.store("plain", {"version": "4.22"})
+    fact_cache.store("result", Result(host, result="facts", diff="diff", changed=True))
+    fact_cache.store("failed", Result(host, result="error", failed=True))
+    fact_cache.store("unserializable", object())
+    fact_cache.flush()
+
+    assert fact_cache.get("plain", 60)[1] == {"result": {"version": "4.22"}}
+    result = cached_result(host, fact_cache.get("result", 60))
+    assert (result.result, result.diff, result.changed) == ("facts", "diff", True)
+    assert result.nornsible_cached <= time.time()
+    assert fact_cache.get("failed", 60) is None
+    assert fact_cache.get("unserializable", 60) is None
+    assert fact_cache.get("plain", -1) is None
+
+    reopened = open_cache(fact_cache.path)
+    assert reopened.get("plain", 60)[1] == {"result": {"version": "4.22"}}
+    reopened.clear()
+    assert open_cache(fact_cache.path).get("plain", 60) is None
+
+
+def test_json_fact_cache_flush_merges(tmp_path):
+    path = str(tmp_path / "facts.json")
+    first, second = JsonFactCache(path), JsonFactCache(path)
+    first.store("one", 1)
+    second.store("two", 2)
+    first.flush()
+    second.flush()
+    with open(path) as f:
+        assert set(json.load(f)) == {"one", "two"}
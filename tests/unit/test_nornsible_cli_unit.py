@@ -3,13 +3,24 @@ from pathlib import Path
 from unittest.mock import patch
 
 from nornir import InitNornir
+import pytest
+from nornir.core.inventory import Host
 from nornir.core.task import AggregatedResult, MultiResult, Result
 
 import nornsible
-from nornsible import InitNornsible, print_result
+from nornsible import InitNornsible, nornsible_task, print_result
 from nornsible.nornsible import patch_config, patch_inventory
 from nornsible.cli import parse_cli_args
 from nornsible.decorators import nornsible_task_message
+from nornsible.results import (
+    SKIPPED,
+    FilteredAggregatedResult,
+    FilteredMultiResult,
+    is_skipped,
+    is_unscheduled,
+    skipped_result,
+)
+from nornsible.scheduler import run_throttled
 
 
 NORNSIBLE_DIR = nornsible.__file__
@@ -400,14 +411,14 @@ def test_process_tags_messages(capfd):
     assert "this is a test message" in std_out
 
 
-def test_nornsible_print_task_no_results():
+def test_nornsible_print_task_no_results(capfd):
     test_result = AggregatedResult("testresult")
     test_result["localhost"] = MultiResult("testresult")
-    test_result["localhost"].append(
-        Result(host="localhost", result="Task skipped", failed=False, changed=False)
-    )
+    test_result["localhost"].append(skipped_result(None))
     output = print_result(test_result)
     assert output is None
+    std_out, std_err = capfd.readouterr()
+    assert std_out == ""
 
 
 def test_nornsible_print_task_results(capfd):
@@ -419,3 +430,302 @@ def test_nornsible_print_task_results(capfd):
     print_result(test_result)
     std_out, std_err = capfd.readouterr()
     assert "stuff happening" in std_out
+
+
+def test_parse_cli_args_throttle():
+    args = parse_cli_args(["--throttle", "site=4,ha_pair=1"])
+    assert args["throttle"] == {"site": 4, "ha_pair": 1}
+
+
+def test_parse_cli_args_throttle_invalid():
+    with pytest.raises(SystemExit):
+        parse_cli_args(["--throttle", "site"])
+
+
+def test_set_nornsible_throttle():
+    testargs = ["somescript", "--throttle", "site=4"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        assert nr.throttle == {"site": 4}
+        assert nr._run_parallel.__func__ is run_throttled
+
+
+def test_parse_cli_args_shard():
+    args = parse_cli_args(["--shard", "2/4", "--shard-weight", "cost"])
+    assert args["shard"] == (2, 4)
+    assert args["shard_weight"] == "cost"
+
+
+def test_parse_cli_args_shard_invalid():
+    with pytest.raises(SystemExit):
+        parse_cli_args(["--shard", "5/4"])
+
+
+def test_patch_inventory_shard_disjoint():
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    shards = []
+    for i in range(1, 4):
+        args = parse_cli_args(["--shard", f"{i}/3"])
+        shards.append(set(patch_inventory(args, nr.inventory).hosts.keys()))
+    assert set.union(*shards) == set(nr.inventory.hosts.keys())
+    assert sum(len(s) for s in shards) == len(nr.inventory.hosts)
+    args = parse_cli_args(["--shard", "1/3"])
+    assert set(patch_inventory(args, nr.inventory).hosts.keys()) == shards[0]
+
+
+def test_patch_inventory_shard_after_limit():
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    hosts = set()
+    for i in range(1, 3):
+        args = parse_cli_args(["-l", "iad-eos-1,iad-eos-2", "--shard", f"{i}/2"])
+        hosts.update(patch_inventory(args, nr.inventory).hosts.keys())
+    assert hosts == {"iad-eos-1", "iad-eos-2"}
+
+
+def test_patch_inventory_shard_weight_var():
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    nr.inventory.defaults.data["cost"] = 1
+    nr.inventory.hosts["sea-eos-1"].data["cost"] = 100
+    args = parse_cli_args(["--shard", "1/2", "--shard-weight", "cost"])
+    shard_1 = set(patch_inventory(args, nr.inventory).hosts.keys())
+    args = parse_cli_args(["--shard", "2/2", "--shard-weight", "cost"])
+    shard_2 = set(patch_inventory(args, nr.inventory).hosts.keys())
+    expensive, cheap = (shard_1, shard_2) if "sea-eos-1" in shard_1 else (shard_2, shard_1)
+    assert expensive == {"sea-eos-1"}
+    assert len(cheap) == 5
+
+
+def test_patch_inventory_shard_weight_invalid():
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    nr.inventory.hosts["sea-eos-1"].data["cost"] = "expensive"
+    args = parse_cli_args(["--shard", "1/2", "--shard-weight", "cost"])
+    with pytest.raises(ValueError, match="'expensive' for host sea-eos-1 in host var cost"):
+        patch_inventory(args, nr.inventory)
+
+
+def test_patch_inventory_shard_weight_durations_file_invalid(tmp_path):
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    durations = tmp_path / "durations.json"
+    durations.write_text('{"iad-eos-1": 30, "iad-eos-2": -1}')
+    args = parse_cli_args(["--shard", "1/2", "--shard-weight", f"@{durations}"])
+    with pytest.raises(ValueError, match="-1 for host iad-eos-2"):
+        patch_inventory(args, nr.inventory)
+
+
+def test_patch_inventory_shard_weight_durations_file(tmp_path):
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    durations = tmp_path / "durations.json"
+    durations.write_text('{"iad-eos-1": 30, "iad-eos-2": 30, "not-in-inventory": 1000}')
+    shards = []
+    for i in range(1, 3):
+        args = parse_cli_args(["--shard", f"{i}/2", "--shard-weight", f"@{durations}"])
+        shards.append(set(patch_inventory(args, nr.inventory).hosts.keys()))
+    assert not shards[0] & shards[1]
+    assert all(len(s) == 3 for s in shards)
+    assert all(len(s & {"iad-eos-1", "iad-eos-2"}) == 1 for s in shards)
+
+
+def test_patch_inventory_shard_weight_timings_file(tmp_path):
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    timings = tmp_path / "timings.json"
+    timings.write_text(
+        '{"tasks": {}, "hosts": {"iad-eos-1": {"backup": 20, "deploy": 10}, "iad-eos-2": '
+        '{"backup": 30}}}'
+    )
+    shards = []
+    for i in range(1, 3):
+        args = parse_cli_args(["--shard", f"{i}/2", "--shard-weight", f"@{timings}"])
+        shards.append(set(patch_inventory(args, nr.inventory).hosts.keys()))
+    assert not shards[0] & shards[1]
+    assert all(len(s & {"iad-eos-1", "iad-eos-2"}) == 1 for s in shards)
+
+
+@nornsible_task
+def list_task_example(task):
+    return "Hello, world!"
+
+
+@nornsible_task
+def list_task_example_2(task):
+    return "Hello, world!"
+
+
+def test_set_nornsible_list_hosts(capfd):
+    testargs = ["somescript", "-g", "sea", "--list-hosts"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        with pytest.raises(SystemExit) as exc:
+            InitNornsible(nr)
+        assert exc.value.code == 0
+        std_out, std_err = capfd.readouterr()
+        assert std_out == "hosts (2):\n  sea-eos-1\n  sea-nxos-1\n"
+
+
+def test_set_nornsible_list_tasks(capfd):
+    testargs = ["somescript", "-t", "list_task_example", "--list-tasks"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        with pytest.raises(SystemExit):
+            InitNornsible(nr)
+        std_out, std_err = capfd.readouterr()
+        assert "  run  list_task_example\n" in std_out
+        assert "  skip list_task_example_2\n" in std_out
+        assert "hosts (" not in std_out
+
+
+def test_skipped_result_per_skip():
+    host = Host(name="sea-eos-1")
+    result = skipped_result(host)
+    assert result is not skipped_result(host, SKIPPED)
+    assert result.host is host
+    assert result.result == SKIPPED
+    assert result.failed is False
+    assert result.unscheduled is False
+
+
+def test_is_unscheduled():
+    multi_result = MultiResult("testresult")
+    multi_result.append(skipped_result(Host(name="sea-eos-1")))
+    assert is_unscheduled(multi_result) is False
+    multi_result[0] = skipped_result(Host(name="sea-eos-1"), unscheduled=True)
+    assert is_unscheduled(multi_result) is True
+
+
+def test_is_skipped():
+    multi_result = MultiResult("testresult")
+    assert is_skipped(multi_result) is False
+    multi_result.append(Result(host=None, result="Task skipped! (not really)"))
+    assert is_skipped(multi_result) is False
+    assert is_skipped(multi_result[0]) is False
+    multi_result.insert(0, skipped_result(None))
+    assert is_skipped(multi_result) is True
+
+
+def test_filtered_result_views():
+    payload = Result(host=None, result="stuff happening!", changed=True)
+    test_result = AggregatedResult("testresult")
+    test_result["localhost"] = MultiResult("testresult")
+    test_result["localhost"].extend([skipped_result(None), payload])
+    test_result["skipped-host"] = MultiResult("testresult")
+    test_result["skipped-host"].append(skipped_result(None))
+
+    view = FilteredAggregatedResult(test_result)
+    assert list(view) == ["localhost"]
+    assert len(view) == 1
+    assert "skipped-host" not in view
+    assert view["localhost"][0] is payload
+    assert list(view["localhost"]) == [payload]
+    assert view["localhost"].changed is True
+    with pytest.raises(IndexError):
+        view["localhost"][1]
+    with pytest.raises(KeyError):
+        view["skipped-host"]
+    assert not FilteredMultiResult(test_result["skipped-host"])
+
+
+def test_nornsible_print_task_results_filtered(capfd):
+    test_result = AggregatedResult("testresult")
+    test_result["localhost"] = MultiResult("testresult")
+    test_result["localhost"].extend(
+        [skipped_result(None), Result(host=None, result="stuff happening!")]
+    )
+    test_result["localhost"][1].name = "testresult"
+    test_result["skipped-host"] = MultiResult("testresult")
+    test_result["skipped-host"].append(skipped_result(None))
+    print_result(test_result)
+    std_out, std_err = capfd.readouterr()
+    assert "stuff happening" in std_out
+    assert "* localhost" in std_out
+    assert "skipped-host" not in std_out
+    assert "Task skipped" not in std_out
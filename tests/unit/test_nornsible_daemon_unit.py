@@ -0,0 +1,116 @@
+from pathlib import Path
+import threading
+
+from nornir import InitNornir
+import pytest
+
+import nornsible
+from nornsible.daemon import NornsibleDaemon, job_args, main, submit
+
+
+NORNSIBLE_DIR = nornsible.__file__
+TEST_DIR = f"{Path(NORNSIBLE_DIR).parents[1]}/tests/"
+
+JOB_MODULE = """
+from nornsible import nornsible_task
+
+RUNS = []
+
+
+@nornsible_task
+def daemon_task(task):
+    if task.host.name == "UPPER-HOST":
+        raise ValueError("upper")
+    return task.host.name
+
+
+@nornsible_task
+def daemon_other_task(task):
+    return "other"
+
+
+def run(nr):
+    RUNS.append(sorted(nr.inventory.hosts))
+    nr.run(task=daemon_task)
+    nr.run(task=daemon_other_task)
+
+
+def broken(nr):
+    raise RuntimeError("broken job")
+"""
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    (tmp_path / "nornsible_daemon_job.py").write_text(JOB_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    daemon = NornsibleDaemon(nr, str(tmp_path / "nornsible.sock"))
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    daemon.server_close()
+    thread.join()
+
+
+def test_job_args():
+    request = {"args": ["-d"], "tags": ["deploy", "render"], "limit": ["sea-eos-1"]}
+    assert job_args(request) == ["-d", "-t", "deploy,render", "-l", "sea-eos-1"]
+
+
+def test_daemon_jobs(daemon):
+    replies = list(submit(daemon.socket_path, "nornsible_daemon_job", skip=["daemon_other_task"]))
+    lines = {(r["task"], r["host"]): r["status"] for r in replies[:-1]}
+    assert lines[("daemon_task", "sea-eos-1")] == "ok"
+    assert lines[("daemon_task", "UPPER-HOST")] == "failed"
+    assert lines[("daemon_other_task", "sea-eos-1")] == "skipped"
+    assert replies[-1] == {"event": "done", "failed_hosts": ["UPPER-HOST"]}
+
+    # failed hosts, limits and the delegate host belong to the job, not the daemon
+    replies = list(
+        submit(daemon.socket_path, "nornsible_daemon_job", limit=["UPPER-HOST"], payload=True)
+    )
+    upper = next(r for r in replies if r.get("host") == "UPPER-HOST")
+    assert "ValueError" in upper["payload"][0]["result"]
+    assert replies[-1]["failed_hosts"] == ["UPPER-HOST"]
+    assert "delegate" not in daemon.nr.inventory.hosts
+    assert not daemon.nr.data.failed_hosts
+
+    import nornsible_daemon_job  # pylint: disable=C0415
+
+    assert nornsible_daemon_job.RUNS[-1] == ["UPPER-HOST", "delegate"]
+
+
+def test_daemon_job_error(daemon):
+    replies = list(submit(daemon.socket_path, "nornsible_daemon_job", entrypoint="broken"))
+    assert replies[-1]["event"] == "error"
+    assert replies[-1]["error"] == "RuntimeError: broken job"
+
+
+def test_daemon_job_rejected_options(daemon):
+    args = ["--fact-cache", "facts.db", "--list-hosts"]
+    replies = list(submit(daemon.socket_path, "nornsible_daemon_job", args=args))
+    assert len(replies) == 1
+    assert replies[0]["event"] == "error"
+    assert replies[0]["error"].endswith("not supported in daemon jobs: --fact-cache, --list-hosts")
+
+    args = ["--journal", "run.journal", "--recap", "--processes", "2", "--retention", "spill"]
+    replies = list(submit(daemon.socket_path, "nornsible_daemon_job", args=args))
+    assert replies[0]["error"].endswith("--recap, --journal, --processes, --retention spill")
+
+
+def test_daemon_submit_cli(daemon, capsys):
+    args = ["--socket", daemon.socket_path, "submit", "nornsible_daemon_job", "-l", "sea-eos-1"]
+    status = main(args)
+    assert status == 0
+    assert '"event": "done"' in capsys.readouterr().out
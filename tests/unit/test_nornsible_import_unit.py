@@ -0,0 +1,127 @@
+import ast
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+import nornsible
+
+
+NORNSIBLE_ROOT = Path(nornsible.__file__).parents[1]
+
+# budget (in microseconds) for the cumulative cost of "import nornsible"; eagerly importing nornir
+# alone is well over a second, so this leaves plenty of headroom for slow CI machines
+IMPORT_BUDGET_US = 100_000
+
+# budget (in microseconds) for "from nornsible import InitNornsible" on top of an already imported
+# nornir, which is the import real scripts pay for
+INIT_NORNSIBLE_BUDGET_US = 250_000
+
+# modules that must only be imported by the code paths that actually use them
+DEFERRED_IMPORTS = {
+    "asyncio",
+    "concurrent.futures",
+    "gzip",
+    "pickle",
+    "shutil",
+    "sqlite3",
+    "tempfile",
+    "uuid",
+}
+
+# -X importtime and module level __getattr__ (which the lazy imports rely on) are python 3.7+
+requires_py37 = pytest.mark.skipif(sys.version_info < (3, 7), reason="requires python 3.7+")
+
+
+@requires_py37
+def test_import_time_budget():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import nornsible"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=NORNSIBLE_ROOT,
+        check=True,
+    )
+    timings = {}
+    for line in proc.stderr.decode().splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        timings[module.strip()] = int(cumulative)
+    assert timings["nornsible"] < IMPORT_BUDGET_US
+
+
+@requires_py37
+def test_import_is_lazy():
+    heavy = ["nornir", "colorama", "ruamel.yaml", "subprocess", "json", "nornsible.decorators"]
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, nornsible; print([m for m in {heavy!r} if m in sys.modules])",
+        ],
+        stdout=subprocess.PIPE,
+        cwd=NORNSIBLE_ROOT,
+        check=True,
+    )
+    assert proc.stdout.decode().strip() == "[]"
+
+
+@requires_py37
+def test_init_nornsible_import_time_budget():
+    code = (
+        "import time, nornir.core; start = time.perf_counter(); "
+        "from nornsible import InitNornsible; print(int((time.perf_counter() - start) * 1e6))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        stdout=subprocess.PIPE,
+        cwd=NORNSIBLE_ROOT,
+        check=True,
+    )
+    assert int(proc.stdout.decode().strip()) < INIT_NORNSIBLE_BUDGET_US
+
+
+def test_init_nornsible_defers_heavy_imports():
+    code = (
+        "import sys; from nornsible import InitNornsible; "
+        "print(' '.join(m for m in sys.modules if m.startswith('nornsible.')))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        stdout=subprocess.PIPE,
+        cwd=NORNSIBLE_ROOT,
+        check=True,
+    )
+    eager = {}
+    for module in proc.stdout.decode().split():
+        path = NORNSIBLE_ROOT / (module.replace(".", "/") + ".py")
+        for node in ast.parse(path.read_text()).body:
+            if isinstance(node, ast.Import):
+                names = {alias.name for alias in node.names}
+            elif isinstance(node, ast.ImportFrom):
+                names = {node.module or ""}
+            else:
+                continue
+            if names & DEFERRED_IMPORTS:
+                eager[module] = sorted(names & DEFERRED_IMPORTS)
+    assert eager == {}
+
+
+def test_lazy_attributes():
+    from nornsible.decorators import nornsible_task
+    from nornsible.nornsible import InitNornsible
+
+    assert nornsible.nornsible_task is nornsible_task
+    assert nornsible.InitNornsible is InitNornsible
+    assert "print_result" in dir(nornsible)
+
+
+def test_lazy_attributes_invalid():
+    try:
+        nornsible.not_a_thing
+    except AttributeError as exc:
+        assert "not_a_thing" in str(exc)
+    else:
+        raise AssertionError("expected AttributeError")
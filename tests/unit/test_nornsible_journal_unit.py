@@ -0,0 +1,37 @@
+from nornir.core.task import Task
+
+from nornsible.journal import journal_key, read_journal
+
+
+def deploy(task, section="a"):
+    return section
+
+
+def test_journal_key():
+    assert journal_key(Task(deploy)) == journal_key(Task(deploy))
+    assert journal_key(Task(deploy, section="a")) != journal_key(Task(deploy, section="b"))
+    assert journal_key(Task(deploy, name="other")).startswith("other|")
+
+
+def test_read_journal(tmp_path):
+    journal = tmp_path / "run.journal"
+    journal.write_text(
+        '{"host": "sea-eos-1", "task": "deploy", "key": "deploy|a", "status": "ok"}\n'
+        '{"host": "sea-nxos-1", "task": "deploy", "key": "deploy|a", "status": "changed"}\n'
+        '{"host": "UPPER-HOST", "task": "deploy", "key": "deploy|a", "status": "failed"}\n'
+        '{"host": "sea-eos-1", "task": "deploy", "key": "deploy|b", "status": "failed"}\n'
+        '{"host": "sea-eos-1", "task": "verify", "key": "verify|a", "status": "ok"}\n'
+        '{"host": "sea-eos-1", "task": "verify", "key": "verify|a", "status": "failed"}\n'
+        '{"host": "sea-nxos-1", "task": "verify", "key": "verify|a", "status": "skipped"}\n'
+        '{"host": "sea-nxos-1", "task": "verify", "status": "ok"}\n'
+        '{"host": "UPPER-HOST", "task": "ver'
+    )
+    assert read_journal(str(journal)) == {
+        "deploy|a": {"sea-eos-1", "sea-nxos-1"},
+        "deploy|b": set(),
+        "verify|a": set(),
+    }
+
+
+def test_read_journal_missing(tmp_path):
+    assert read_journal(str(tmp_path / "missing.journal")) == {}
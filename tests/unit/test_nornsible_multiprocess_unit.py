@@ -0,0 +1,89 @@
+from pathlib import Path
+import threading
+
+from nornir import InitNornir
+from nornir.core.inventory import Host
+from nornir.core.task import MultiResult, Result
+
+import nornsible
+from nornsible.multiprocess import _dehydrate, _rehydrate, host_chunks
+from nornsible.results import is_streamed, mark_streamed
+
+
+NORNSIBLE_DIR = nornsible.__file__
+TEST_DIR = f"{Path(NORNSIBLE_DIR).parents[1]}/tests/"
+
+
+def test_dehydrate_rehydrate_round_trip():
+    host = Host(name="sea-eos-1")
+    multi_result = MultiResult("parent")
+    multi_result.append(Result(host=host, result="parent result", changed=True))
+    sub_result = MultiResult("child")
+    sub_result.append(Result(host=host, result={"some": "data"}, failed=True))
+    multi_result.append(sub_result)
+
+    dehydrated = _dehydrate(multi_result)
+    assert "host" not in dehydrated[2][0][2]
+
+    new_host = Host(name="sea-eos-1")
+    rehydrated = _rehydrate(dehydrated, new_host)
+    assert isinstance(rehydrated, MultiResult)
+    assert rehydrated.name == "parent"
+    assert rehydrated[0].result == "parent result"
+    assert rehydrated[0].changed is True
+    assert rehydrated[0].host is new_host
+    assert isinstance(rehydrated[1], MultiResult)
+    assert rehydrated[1][0].result == {"some": "data"}
+    assert rehydrated.failed is True
+    assert is_streamed(rehydrated) is False
+
+
+def test_dehydrate_rehydrate_streamed():
+    host = Host(name="sea-eos-1")
+    multi_result = MultiResult("parent")
+    multi_result.append(Result(host=host, result="parent result"))
+    mark_streamed(multi_result)
+    assert is_streamed(_rehydrate(_dehydrate(multi_result), Host(name="sea-eos-1"))) is True
+
+
+def test_dehydrate_sanitize_unpicklable():
+    host = Host(name="sea-eos-1")
+    result = Result(host=host, result=threading.Lock(), exception=ValueError("broken"))
+    dehydrated = _dehydrate(result, sanitize=True)
+    assert isinstance(dehydrated[2]["result"], str)
+    assert isinstance(dehydrated[2]["exception"], ValueError)
+
+
+def _throttle_nornir(throttle):
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    nr.throttle = throttle
+    return nr
+
+
+def test_host_chunks_keeps_throttled_hosts_together():
+    nr = _throttle_nornir({})
+    hosts = list(nr.inventory.hosts.values())
+    chunks = [sorted(h.name for h in chunk) for chunk in host_chunks(nr, hosts, 2)]
+    assert sum(len(chunk) for chunk in chunks) == len(hosts)
+    assert any({"sea-eos-1", "sea-eos-2"} <= set(chunk) for chunk in chunks)
+    assert sorted(len(chunk) for chunk in chunks) == [3, 3]
+
+
+def test_host_chunks_var_throttle():
+    nr = _throttle_nornir({"site": 2})
+    hosts = list(nr.inventory.hosts.values())
+    chunks = [sorted(h.name for h in chunk) for chunk in host_chunks(nr, hosts, 4)]
+    assert chunks == [
+        ["sea-eos-1", "sea-eos-2", "sea-nxos-1", "sea-nxos-2"],
+        ["iad-eos-1", "iad-eos-2"],
+    ]
+
@@ -0,0 +1,48 @@
+import threading
+
+from nornsible.output import OutputWriter, flush_output
+
+
+def _in_thread(func, *args):
+    thread = threading.Thread(target=func, args=args)
+    thread.start()
+    thread.join()
+
+
+def test_output_writer_groups_skips(capfd):
+    writer = OutputWriter()
+    for _ in range(3):
+        _in_thread(writer.skip, "custom_task_example")
+    _in_thread(writer.skip, "custom_task_other")
+    writer.flush()
+    std_out, std_err = capfd.readouterr()
+    assert std_out.count("skipping task custom_task_example on 3 host(s)") == 1
+    assert std_out.count("skipping task custom_task_other on 1 host(s)") == 1
+
+
+def test_output_writer_worker_write_does_not_wait(capfd):
+    writer = OutputWriter()
+    release = threading.Event()
+
+    def slow_render():
+        release.wait()
+        return "slow message"
+
+    _in_thread(writer.write, slow_render)
+    _in_thread(writer.write, "fast message")
+    release.set()
+    writer.flush()
+    std_out, std_err = capfd.readouterr()
+    assert std_out == "slow message\nfast message\n"
+
+
+def test_output_writer_main_thread_write_flushes(capfd):
+    writer = OutputWriter()
+    writer.write("main thread message")
+    writer.write(lambda: "")
+    std_out, std_err = capfd.readouterr()
+    assert std_out == "main thread message\n"
+
+
+def test_flush_output_without_writer():
+    flush_output()
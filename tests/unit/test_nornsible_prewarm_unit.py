@@ -0,0 +1,85 @@
+from pathlib import Path
+import threading
+
+from nornir import InitNornir
+from nornir.core.connections import ConnectionPlugin, Connections
+from nornir.core.inventory import ConnectionOptions
+import pytest
+
+import nornsible
+from nornsible.processors import NornsibleProcessor
+from nornsible.prewarm import host_connections, prewarm
+
+
+NORNSIBLE_DIR = nornsible.__file__
+TEST_DIR = f"{Path(NORNSIBLE_DIR).parents[1]}/tests/"
+
+RELEASE = threading.Event()
+
+
+class StandInConnection(ConnectionPlugin):
+    def open(
+        self, hostname, username, password, port, platform, extras=None, configuration=None
+    ):
+        if hostname == "5.4.3.2":
+            raise ConnectionRefusedError(hostname)
+        if hostname == "4.3.2.1":
+            RELEASE.wait(5)
+        self.connection = hostname
+
+    def close(self):
+        self.connection = None
+
+
+class CompletedProcessor(NornsibleProcessor):
+    def __init__(self):
+        self.completed = {}
+
+    def task_instance_completed(self, task, host, result):
+        self.completed[host.name] = result.failed
+
+
+@pytest.fixture
+def nr():
+    Connections.register("stand_in", StandInConnection)
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    nr.inventory.defaults.connection_options["stand_in"] = ConnectionOptions()
+    yield nr
+    RELEASE.set()
+    Connections.deregister("stand_in")
+
+
+def test_host_connections(nr):
+    host = nr.inventory.hosts["sea-eos-1"]
+    assert host_connections(host) == ["stand_in"]
+    nr.inventory.groups["eos"].connection_options["netmiko"] = ConnectionOptions()
+    assert host_connections(host) == ["netmiko", "stand_in"]
+    host.data["nornsible_prewarm"] = "napalm,netmiko"
+    assert host_connections(host) == ["napalm", "netmiko"]
+
+
+def test_prewarm(nr):
+    RELEASE.clear()
+    processor = CompletedProcessor()
+    nr.processors.append(processor)
+    agg_result = prewarm(nr, num_workers=10, timeout=0.5)
+    assert agg_result["sea-eos-1"].result == ["stand_in"]
+    assert nr.inventory.hosts["sea-eos-1"].connections["stand_in"].connection == "1.2.3.4"
+    assert "ConnectionRefusedError" in agg_result["UPPER-HOST"].result
+    assert "timed out" in agg_result["sea-nxos-1"].result
+    assert nr.data.failed_hosts == {"UPPER-HOST", "sea-nxos-1"}
+    assert processor.completed == {
+        "sea-eos-1": False,
+        "sea-nxos-1": True,
+        "UPPER-HOST": True,
+        "localhost": False,
+    }
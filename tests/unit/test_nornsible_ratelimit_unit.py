@@ -0,0 +1,88 @@
+from pathlib import Path
+import time
+
+from nornir import InitNornir
+import pytest
+
+import nornsible
+from nornsible.ratelimit import GCRA, RateLimit
+
+
+NORNSIBLE_DIR = nornsible.__file__
+TEST_DIR = f"{Path(NORNSIBLE_DIR).parents[1]}/tests/"
+
+
+def _hosts():
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    return nr.inventory.hosts
+
+
+def test_gcra_burst_then_interval():
+    bucket = GCRA(10, burst=3)
+    delays = [bucket.reserve() for _ in range(5)]
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert delays[3] == pytest.approx(0.1, abs=0.01)
+    assert delays[4] == pytest.approx(0.2, abs=0.01)
+
+
+def test_gcra_refills_after_quiet_period():
+    bucket = GCRA(100, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() > 0.0
+    time.sleep(0.05)
+    assert bucket.reserve() == 0.0
+
+
+def test_gcra_invalid():
+    with pytest.raises(ValueError):
+        GCRA(0)
+    with pytest.raises(ValueError):
+        RateLimit(10, burst=0)
+
+
+def test_rate_limit_global_scope():
+    hosts = _hosts()
+    rate_limit = RateLimit(10)
+    assert rate_limit.bucket(hosts["sea-eos-1"]) is rate_limit.bucket(hosts["UPPER-HOST"])
+    assert rate_limit.reserve(hosts["sea-eos-1"]) == 0.0
+    assert rate_limit.reserve(hosts["UPPER-HOST"]) > 0.0
+
+
+def test_rate_limit_group_scope():
+    hosts = _hosts()
+    rate_limit = RateLimit(10, scope="group:sea")
+    assert rate_limit.bucket(hosts["sea-eos-1"]) is rate_limit.bucket(hosts["sea-nxos-1"])
+    assert rate_limit.bucket(hosts["UPPER-HOST"]) is None
+    assert rate_limit.reserve(hosts["sea-eos-1"]) == 0.0
+    assert rate_limit.reserve(hosts["sea-nxos-1"]) > 0.0
+    assert rate_limit.reserve(hosts["UPPER-HOST"]) == 0.0
+    assert rate_limit.reserve(hosts["UPPER-HOST"]) == 0.0
+
+
+def test_rate_limit_var_scope():
+    hosts = _hosts()
+    hosts["sea-eos-1"].data["jump_host"] = "jump-1"
+    hosts["sea-nxos-1"].data["jump_host"] = "jump-1"
+    hosts["UPPER-HOST"].data["jump_host"] = "jump-2"
+    rate_limit = RateLimit(10, scope="jump_host")
+    assert rate_limit.bucket(hosts["sea-eos-1"]) is rate_limit.bucket(hosts["sea-nxos-1"])
+    assert rate_limit.bucket(hosts["sea-eos-1"]) is not rate_limit.bucket(hosts["UPPER-HOST"])
+    assert rate_limit.bucket(hosts["localhost"]) is None
+
+
+def test_rate_limit_share():
+    shared = RateLimit(100, burst=10, scope="group:sea").share(4)
+    assert shared.rate == 25
+    assert shared.burst == 2
+    assert shared.scope == "group:sea"
+    assert RateLimit(100, burst=3).share(4).burst == 1
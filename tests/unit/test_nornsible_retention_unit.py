@@ -0,0 +1,64 @@
+import os
+
+import pytest
+from nornir.core.task import Result
+
+from nornsible.results import skipped_result
+from nornsible.retention import RetentionPolicy, SpilledResult, get_retention
+
+
+def test_retention_invalid_mode():
+    with pytest.raises(ValueError):
+        RetentionPolicy("some")
+
+
+def test_retention_keep_all():
+    result = Result(host=None, result="x" * 100, diff="diff")
+    RetentionPolicy().retain(result)
+    assert result.result == "x" * 100
+    assert result.diff == "diff"
+
+
+def test_retention_status_only():
+    result = Result(host=None, result="x" * 100, diff="diff", changed=True)
+    RetentionPolicy("status").retain(result)
+    assert result.result is None
+    assert result.diff == ""
+    assert result.changed is True
+
+
+def test_retention_skipped_untouched():
+    result = skipped_result(None)
+    RetentionPolicy("status").retain(result)
+    assert result.result == "Task skipped!"
+
+
+def test_retention_spill(tmp_path):
+    policy = RetentionPolicy("spill", spill_threshold=10, spill_dir=str(tmp_path))
+    small = Result(host=None, result="small")
+    large = Result(host=None, result={"output": "x" * 100}, stdout="out")
+    policy.retain(small)
+    policy.retain(large)
+    assert not isinstance(small, SpilledResult)
+    assert isinstance(large, SpilledResult)
+    assert "result" not in vars(large)
+    assert os.listdir(tmp_path) == [os.path.basename(large.nornsible_spill_file)]
+    assert large.result == {"output": "x" * 100}
+    assert large.stdout == "out"
+    large.result = "replaced"
+    assert large.result == "replaced"
+
+
+def test_retention_spill_temporary_dir():
+    policy = RetentionPolicy("spill", spill_threshold=10)
+    result = Result(host=None, result="x" * 100)
+    policy.retain(result)
+    assert os.path.isdir(policy.spill_dir)
+    assert result.result == "x" * 100
+
+
+def test_get_retention():
+    policy = RetentionPolicy("status")
+    assert get_retention(None) is None
+    assert get_retention(policy) is policy
+    assert get_retention("spill").mode == "spill"
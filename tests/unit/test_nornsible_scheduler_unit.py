@@ -0,0 +1,87 @@
+from pathlib import Path
+import threading
+import time
+
+from nornir import InitNornir
+
+import nornsible
+from nornsible.scheduler import host_slots, inventory_throttled, run_throttled
+
+
+NORNSIBLE_DIR = nornsible.__file__
+TEST_DIR = f"{Path(NORNSIBLE_DIR).parents[1]}/tests/"
+
+
+def init_nornir():
+    nr = InitNornir(
+        inventory={
+            "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+            "options": {
+                "host_file": f"{TEST_DIR}_test_nornir_inventory/throttle/hosts.yaml",
+                "group_file": f"{TEST_DIR}_test_nornir_inventory/throttle/groups.yaml",
+            },
+        },
+        logging={"enabled": False},
+    )
+    nr.throttle = {}
+    return nr
+
+
+def test_host_slots_group_throttle():
+    nr = init_nornir()
+    limits = {}
+    slots = host_slots(nr.inventory.hosts["sea-eos-1"], {}, limits)
+    assert slots == [("group", "ha_pair_1")]
+    assert limits == {("group", "ha_pair_1"): 1}
+
+
+def test_host_slots_var_throttle():
+    nr = init_nornir()
+    limits = {}
+    slots = host_slots(nr.inventory.hosts["sea-eos-1"], {"site": 2}, limits)
+    assert slots == [("group", "ha_pair_1"), ("var", "site", "sea")]
+    assert limits[("var", "site", "sea")] == 2
+
+
+def test_host_slots_var_throttle_missing_var():
+    nr = init_nornir()
+    limits = {}
+    slots = host_slots(nr.inventory.hosts["iad-eos-1"], {"rack": 2}, limits)
+    assert slots == []
+
+
+def test_inventory_throttled():
+    nr = init_nornir()
+    assert inventory_throttled(nr) is True
+    nr.inventory.groups["ha_pair_1"].data.pop("nornsible_throttle")
+    assert inventory_throttled(nr) is False
+    nr.throttle = {"site": 4}
+    assert inventory_throttled(nr) is True
+
+
+def test_run_throttled_respects_limits():
+    nr = init_nornir()
+    nr.throttle = {"site": 2}
+    lock = threading.Lock()
+    running = {"sea": 0, "iad": 0, "ha_pair_1": 0}
+    peak = {"sea": 0, "iad": 0, "ha_pair_1": 0}
+
+    def track(task):
+        keys = [task.host["site"]]
+        if task.host.name.startswith("sea-eos"):
+            keys.append("ha_pair_1")
+        with lock:
+            for key in keys:
+                running[key] += 1
+                peak[key] = max(peak[key], running[key])
+        time.sleep(0.05)
+        with lock:
+            for key in keys:
+                running[key] -= 1
+        return task.host.name
+
+    nr._run_parallel = run_throttled.__get__(nr)
+    result = nr.run(task=track, num_workers=6)
+    assert list(result.keys()) == list(nr.inventory.hosts.keys())
+    assert all(result[h].result == h for h in result)
+    assert peak == {"sea": 2, "iad": 2, "ha_pair_1": 1}
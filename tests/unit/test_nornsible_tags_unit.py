@@ -0,0 +1,61 @@
+from nornsible.tags import TagFilter, compile_tag_expressions, inherit_tags
+
+
+def test_compile_tag_expressions():
+    terms = compile_tag_expressions(["deploy&!reload|render", "backup"])
+    assert terms == [
+        (frozenset({"deploy"}), frozenset({"reload"})),
+        (frozenset({"render"}), frozenset()),
+        (frozenset({"backup"}), frozenset()),
+    ]
+
+
+def test_tag_filter_no_tags():
+    tag_filter = TagFilter([], [])
+    assert tag_filter.allows(frozenset({"deploy"})) is True
+
+
+def test_tag_filter_run_tags():
+    tag_filter = TagFilter({"deploy"}, [])
+    assert tag_filter.allows(frozenset({"deploy"})) is True
+    assert tag_filter.allows(frozenset({"render"})) is False
+
+
+def test_tag_filter_skip_tags():
+    tag_filter = TagFilter([], {"deploy"})
+    assert tag_filter.allows(frozenset({"deploy", "render"})) is False
+    assert tag_filter.allows(frozenset({"render"})) is True
+
+
+def test_tag_filter_expression():
+    tag_filter = TagFilter({"deploy&!reload"}, [])
+    assert tag_filter.allows(frozenset({"deploy"})) is True
+    assert tag_filter.allows(frozenset({"deploy", "reload"})) is False
+    assert tag_filter.allows(frozenset({"reload"})) is False
+
+
+def test_tag_filter_always():
+    assert TagFilter({"deploy"}, []).allows(frozenset({"facts", "always"})) is True
+    assert TagFilter([], {"always"}).allows(frozenset({"facts", "always"})) is False
+
+
+def test_tag_filter_never():
+    assert TagFilter([], []).allows(frozenset({"reload", "never"})) is False
+    assert TagFilter({"!deploy"}, []).allows(frozenset({"reload", "never"})) is False
+    assert TagFilter({"reload"}, []).allows(frozenset({"reload", "never"})) is True
+    assert TagFilter({"never"}, []).allows(frozenset({"reload", "never"})) is True
+
+
+def test_tag_filter_memoized():
+    tag_filter = TagFilter({"deploy"}, [])
+    tags = frozenset({"deploy"})
+    tag_filter.allows(tags)
+    assert tag_filter.decisions == {tags: True}
+
+
+def test_inherit_tags():
+    tags = frozenset({"render"})
+    assert inherit_tags(tags, None) is tags
+    inherited = inherit_tags(tags, frozenset({"deploy"}))
+    assert inherited == {"render", "deploy"}
+    assert inherit_tags(tags, frozenset({"deploy"})) is inherited
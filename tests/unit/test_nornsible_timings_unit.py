@@ -0,0 +1,43 @@
+import json
+
+from nornsible.timings import Histogram, Timings
+
+
+def test_histogram_quantiles():
+    histogram = Histogram()
+    for duration in [0.01] * 90 + [1.0] * 9 + [10.0]:
+        histogram.record(duration)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["max"] == 10.0
+    assert 0.01 <= summary["p50"] <= 0.011
+    assert 1.0 <= summary["p95"] <= 1.1
+    assert 1.0 <= summary["p99"] <= 1.1
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_timings_record_and_merge():
+    timings = Timings()
+    timings.record("backup", "sea-eos-1", 1.0)
+    timings.record("backup", "sea-eos-1", 2.0)
+    other = Timings()
+    other.record("backup", "sea-nxos-1", 4.0)
+    timings.merge(other.snapshot())
+    summary = timings.summary()
+    assert summary["tasks"]["backup"]["count"] == 3
+    assert summary["tasks"]["backup"]["max"] == 4.0
+    assert summary["hosts"] == {"sea-eos-1": {"backup": 3.0}, "sea-nxos-1": {"backup": 4.0}}
+
+
+def test_timings_write(tmp_path):
+    timings = Timings()
+    timings.record("backup", "sea-eos-1", 0.5)
+    timings.write(str(tmp_path / "timings.json"))
+    assert json.loads((tmp_path / "timings.json").read_text())["hosts"] == {
+        "sea-eos-1": {"backup": 0.5}
+    }
+    timings.write(str(tmp_path / "timings.prom"))
+    prom = (tmp_path / "timings.prom").read_text()
+    assert "# TYPE nornsible_task_duration_seconds histogram" in prom
+    assert 'nornsible_task_duration_seconds_bucket{task="backup",le="+Inf"} 1' in prom
+    assert 'nornsible_task_duration_seconds_count{task="backup"} 1' in prom
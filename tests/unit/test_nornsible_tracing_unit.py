@@ -0,0 +1,142 @@
+from contextlib import contextmanager
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+from nornir import InitNornir
+import pytest
+
+import nornsible
+from nornsible import InitNornsible, nornsible_task
+from nornsible.inventory import AnsibleInventory
+from nornsible.tracing import set_tracer, span
+
+contextvars = pytest.importorskip("contextvars")
+
+
+NORNSIBLE_DIR = nornsible.__file__
+TEST_DIR = f"{Path(NORNSIBLE_DIR).parents[1]}/tests/"
+
+
+class InMemorySpan:
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.parent = parent
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class InMemoryTracer:
+    def __init__(self):
+        self.spans = []
+        self.current = contextvars.ContextVar("current_span", default=None)
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = InMemorySpan(name, attributes or {}, self.current.get())
+        self.spans.append(span)
+        token = self.current.set(span)
+        try:
+            yield span
+        finally:
+            self.current.reset(token)
+
+
+@pytest.fixture
+def tracer():
+    tracer = InMemoryTracer()
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(None)
+
+
+@nornsible_task
+def traced_subtask(task):
+    return "Hello, world!"
+
+
+@nornsible_task
+def traced_task(task):
+    task.run(task=traced_subtask)
+    return "Hello, world!"
+
+
+@nornsible_task
+async def traced_async_task(task):
+    return "Hello, world!"
+
+
+def test_span_noop_without_tracer():
+    assert span("one") is span("two", {"some": "attribute"})
+    with span("one") as current:
+        assert current is None
+
+
+def test_set_tracer_requires_py37():
+    with patch.object(sys, "version_info", (3, 6, 9)):
+        with pytest.raises(RuntimeError, match="python 3.7"):
+            set_tracer(InMemoryTracer())
+        set_tracer(None)
+    assert span("one") is span("two")
+
+
+def test_tracing_run(tracer):
+    testargs = ["somescript", "-l", "localhost,sea-eos-1"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=traced_task)
+
+    patch_span = next(s for s in tracer.spans if s.name == "nornsible.patch_inventory")
+    assert patch_span.attributes == {"nornsible.hosts": 4, "nornsible.selected_hosts": 2}
+
+    run_span = next(s for s in tracer.spans if s.name == "nornsible.run")
+    task_spans = [s for s in tracer.spans if s.name == "traced_task"]
+    subtask_spans = [s for s in tracer.spans if s.name == "traced_subtask"]
+    assert {s.attributes["nornsible.host"] for s in task_spans} == {"localhost", "sea-eos-1"}
+    assert all(s.parent is run_span for s in task_spans)
+    assert {s.parent for s in subtask_spans} == set(task_spans)
+
+
+def test_tracing_async_run(tracer):
+    testargs = ["somescript", "-l", "localhost,sea-eos-1"]
+    with patch.object(sys, "argv", testargs):
+        nr = InitNornir(
+            inventory={
+                "plugin": "nornir.plugins.inventory.simple.SimpleInventory",
+                "options": {
+                    "host_file": f"{TEST_DIR}_test_nornir_inventory/basic/hosts.yaml",
+                    "group_file": f"{TEST_DIR}_test_nornir_inventory/basic/groups.yaml",
+                },
+            },
+            logging={"enabled": False},
+        )
+        nr = InitNornsible(nr)
+        nr.run(task=traced_async_task)
+
+    run_span = next(s for s in tracer.spans if s.name == "nornsible.run")
+    task_spans = [s for s in tracer.spans if s.name == "traced_async_task"]
+    assert {s.attributes["nornsible.host"] for s in task_spans} == {"localhost", "sea-eos-1"}
+    assert all(s.parent is run_span for s in task_spans)
+
+
+def test_tracing_inventory_sources(tracer):
+    case = f"{TEST_DIR}_test_nornir_inventory/multiple_sources/source"
+    AnsibleInventory.deserialize(inventory=f"{case}/source1,{case}/source2")
+    sources = [
+        s.attributes["nornsible.source"]
+        for s in tracer.spans
+        if s.name == "nornsible.inventory.parse"
+    ]
+    assert sources == [f"{case}/source1/hosts", f"{case}/source2/hosts"]